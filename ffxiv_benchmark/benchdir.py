@@ -0,0 +1,164 @@
+import subprocess
+import tempfile
+import shutil
+import os
+
+# How a run gets its private view of the benchmark directory:
+#
+#   none      run in the benchmark directory itself
+#   symlink   mirror the directory tree and symlink every file, except
+#             for the given private files which are copied
+#   reflink   copy the whole tree with reflinks, only works on file
+#             systems that support them such as btrfs or XFS
+#   overlay   mount the benchmark directory through fuse-overlayfs
+#   auto      overlay if fuse-overlayfs is installed, symlink otherwise
+#
+# Game data is never duplicated in any of these modes, so a run can
+# only ever modify its own copy of files it writes to.
+VIEW_MODE_NONE = "none"
+VIEW_MODE_SYMLINK = "symlink"
+VIEW_MODE_REFLINK = "reflink"
+VIEW_MODE_OVERLAY = "overlay"
+VIEW_MODE_AUTO = "auto"
+
+VIEW_MODES = [ VIEW_MODE_AUTO, VIEW_MODE_NONE, VIEW_MODE_SYMLINK, VIEW_MODE_REFLINK, VIEW_MODE_OVERLAY ]
+
+# Files written by a run that are larger than this are not kept,
+# except for screenshots which get a larger limit
+MAX_COLLECTED_FILE_SIZE = 1048576
+MAX_COLLECTED_SCREENSHOT_SIZE = 16777216
+
+SCREENSHOT_EXTENSIONS = [ ".png", ".jpg", ".jpeg", ".bmp" ]
+
+def find_executable(name):
+  for p in os.getenv("PATH", "").split(":"):
+    if os.path.isfile(os.path.join(p, name)):
+      return os.path.join(p, name)
+
+  return None
+
+def get_max_file_size(file_path):
+  if os.path.splitext(file_path)[1].lower() in SCREENSHOT_EXTENSIONS:
+    return MAX_COLLECTED_SCREENSHOT_SIZE
+
+  return MAX_COLLECTED_FILE_SIZE
+
+def resolve_mode(mode):
+  if mode == VIEW_MODE_AUTO:
+    return VIEW_MODE_OVERLAY if not find_executable("fuse-overlayfs") is None else VIEW_MODE_SYMLINK
+
+  return mode
+
+class FFXIVBenchmarkView:
+  def __init__(self, source, mode=VIEW_MODE_AUTO, private_files=[ ]):
+    self.source = source
+    self.private_files = [ os.path.join(source, f) for f in private_files ]
+    self.mode = resolve_mode(mode)
+    self.base_dir = None
+    self.mounted = False
+
+    if not self.mode in VIEW_MODES:
+      raise ValueError("Invalid benchmark view mode: " + mode)
+
+    if self.mode == VIEW_MODE_NONE:
+      self.path = source
+      return
+
+    self.base_dir = tempfile.mkdtemp(prefix="ffxiv_benchmark_view_")
+    self.path = os.path.join(self.base_dir, "benchmark")
+
+    try:
+      if self.mode == VIEW_MODE_SYMLINK:
+        self.create_symlinks()
+      elif self.mode == VIEW_MODE_REFLINK:
+        subprocess.run([ "cp", "-a", "--reflink=always", source, self.path ],
+          check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+      else:
+        self.mount_overlay()
+    except:
+      self.cleanup()
+      raise
+
+  def create_symlinks(self):
+    for (root, dirs, files) in os.walk(self.source):
+      target = os.path.normpath(os.path.join(self.path, os.path.relpath(root, self.source)))
+      os.mkdir(target)
+
+      # Symlinked directories are not descended into by walk
+      for d in dirs:
+        if os.path.islink(os.path.join(root, d)):
+          os.symlink(os.path.join(root, d), os.path.join(target, d))
+
+      for f in files:
+        path = os.path.join(root, f)
+
+        if path in self.private_files:
+          shutil.copy2(path, os.path.join(target, f))
+        else:
+          os.symlink(path, os.path.join(target, f))
+
+  def mount_overlay(self):
+    upper = os.path.join(self.base_dir, "upper")
+    work = os.path.join(self.base_dir, "work")
+
+    for d in [ upper, work, self.path ]:
+      os.mkdir(d)
+
+    subprocess.run([ "fuse-overlayfs", "-o", "lowerdir=" + self.source +
+      ",upperdir=" + upper + ",workdir=" + work, self.path ], check=True)
+    self.mounted = True
+
+  # Returns the contents of the files the run created or modified, as a
+  # record of what the benchmark produced.
+  def collect_files(self):
+    result = { }
+
+    if self.mode == VIEW_MODE_NONE:
+      return result
+
+    if self.mode == VIEW_MODE_OVERLAY:
+      root_dir = os.path.join(self.base_dir, "upper")
+    else:
+      root_dir = self.path
+
+    for (root, dirs, files) in os.walk(root_dir):
+      for f in files:
+        path = os.path.join(root, f)
+
+        if os.path.islink(path) or not os.path.isfile(path) or path.endswith(".bak"):
+          continue
+
+        # Reflink copies contain everything, only keep what changed
+        if self.mode == VIEW_MODE_REFLINK and not self.is_modified(root_dir, path):
+          continue
+
+        if os.path.getsize(path) > get_max_file_size(path):
+          continue
+
+        with open(path, "rb") as fd:
+          result[os.path.relpath(path, root_dir)] = fd.read()
+
+    return result
+
+  def is_modified(self, root_dir, path):
+    try:
+      original = os.stat(os.path.join(self.source, os.path.relpath(path, root_dir)))
+    except OSError:
+      return True
+
+    return os.stat(path).st_mtime_ns != original.st_mtime_ns
+
+  def cleanup(self):
+    if self.base_dir is None:
+      return
+
+    if self.mounted:
+      for cmd in [ "fusermount3", "fusermount" ]:
+        if not find_executable(cmd) is None:
+          subprocess.run([ cmd, "-u", self.path ])
+          break
+
+      self.mounted = False
+
+    shutil.rmtree(self.base_dir, ignore_errors=True)
+    self.base_dir = None
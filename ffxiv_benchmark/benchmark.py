@@ -0,0 +1,405 @@
+from configparser import ConfigParser, Error
+
+from .config import read_config, write_config
+from .frametimes import FFXIVFrametimeCapture
+from .shadercache import FFXIVShaderCache, get_cache_metrics
+from .telemetry import FFXIVTelemetrySampler
+from .benchdir import FFXIVBenchmarkView
+from .prefixes import FFXIVPrefixClone
+from . import frametimes
+from . import shadercache
+from . import benchdir
+from . import prefixes
+from . import settings
+
+import subprocess
+import copy
+import os
+
+class FFXIVBenchmarkResult:
+  def __init__(self, score, fps, frametimes=None):
+    self.score = score
+    self.fps = fps
+    self.frametimes = frametimes
+    self.telemetry = None
+    self.metrics = { }
+    self.files = { }
+    # Fingerprint of the host and launcher config the run happened
+    # with, if not this one and the config it was started with
+    self.host = None
+    self.cfg = None
+
+  # All figures to be stored alongside score and FPS
+  def get_metrics(self):
+    result = { }
+
+    if not self.frametimes is None:
+      result.update(self.frametimes)
+
+    if not self.telemetry is None:
+      result.update(self.telemetry.get_summary())
+
+    result.update(self.metrics)
+    return result
+
+def get_benchmark_exe_path(benchmark_dir):
+  return benchmark_dir + "/game/ffxiv_dx11.exe"
+
+def get_benchmark_config_file(benchmark_dir):
+  return benchmark_dir + "/ffxivbenchmarklauncher.ini"
+
+def is_supported_benchmark(benchmark_dir):
+  return os.path.isdir(benchmark_dir + "/game/sqpack/ex5")
+
+def get_benchmark_version_file(benchmark_dir):
+  return benchmark_dir + "/game/ffxivgame.ver"
+
+# Returns the game version the benchmark was built from, along with the
+# latest expansion whose data it ships, e.g. "2021.11.16.0000.0000 (ex4)"
+def get_benchmark_version(benchmark_dir):
+  version = ""
+
+  try:
+    with open(get_benchmark_version_file(benchmark_dir)) as f:
+      version = f.read().strip()
+  except (OSError, UnicodeDecodeError):
+    pass
+
+  try:
+    expansions = [ int(d[2:]) for d in os.listdir(benchmark_dir + "/game/sqpack")
+      if d.startswith("ex") and d[2:].isdigit() ]
+  except OSError:
+    expansions = [ ]
+
+  if len(expansions) > 0:
+    version = (version + " (ex" + str(max(expansions)) + ")").strip()
+
+  return version
+
+def parse_environment(environment):
+  result = { }
+
+  for e in environment.split():
+    v = e.split("=", 1)
+    if len(v) == 2:
+      result[v[0]] = v[1]
+
+  return result
+
+def build_environment(wine_prefix_path, environment):
+  result = { "WINEPREFIX" : wine_prefix_path }
+  result.update(parse_environment(environment))
+  return result
+
+def update_benchmark_config(file_path, width, height):
+  if not os.path.isfile(file_path):
+    return False
+
+  config = ConfigParser()
+  config.optionxform=str
+
+  try:
+    # A backup is only used if the file itself is broken
+    if not read_config(config, file_path, [ "EVN" ]):
+      return False
+
+    # Be ultra-conservative here and don't mess around with the
+    # configuration if we can't find the options we're overwriting.
+    if (not config.has_option("EVN", "LAUNGUAGE") or
+        not config.has_option("EVN", "SPEC_DX11") or
+        not config.has_option("EVN", "SCREENWIDTH_DX11") or
+        not config.has_option("EVN", "SCREENHEIGHT_DX11")):
+      return False
+
+    # Yes, they really misspelt 'language'
+    config.set("EVN", "LAUNGUAGE", "1")
+    # Always pretend we're using custom settings, it's annoying
+    # to validate all the settings against the presets
+    config.set("EVN", "SPEC_DX11", "8")
+    # This may or may not be the resolution the benchmark
+    # will actually run at, we can't really know
+    config.set("EVN", "SCREENWIDTH_DX11", str(width))
+    config.set("EVN", "SCREENHEIGHT_DX11", str(height))
+
+    write_config(config, file_path)
+  except:
+    return False
+
+  return True
+
+# Sections of the benchmark config file that hold settings rather
+# than results
+SETTINGS_SECTIONS = [ "EVN" ]
+
+RESULT_METRIC_PREFIX = "result_"
+
+# Results the benchmark is known to report besides score and average
+# frame rate, as named by get_results
+RESULT_METRICS = [ "result_fpsminimum", "result_loadtime" ]
+
+def parse_number(value):
+  try:
+    return float(value.strip())
+  except ValueError:
+    return None
+
+# Reads what the benchmark wrote to its config file. Besides score and
+# average frame rate, every other number it reports is kept as a metric
+# named after its key, e.g. SCORE_FPSMINIMUM becomes result_fpsminimum
+# and a loading time in a [LOADING] section would become
+# result_loading_<key>. Returns None if there is no complete score,
+# e.g. because the run was aborted or the file is unreadable.
+def get_results(file_path):
+  if not os.path.isfile(file_path):
+    return None
+
+  config = ConfigParser(interpolation=None)
+  config.optionxform=str
+
+  try:
+    config.read(file_path)
+  except (Error, UnicodeDecodeError):
+    return None
+
+  if not config.has_option("SCORE", "SCORE") or not config.has_option("SCORE", "SCORE_FPSAVERAGE"):
+    return None
+
+  result = FFXIVBenchmarkResult(config.get("SCORE", "SCORE"), config.get("SCORE", "SCORE_FPSAVERAGE"))
+
+  if parse_number(result.score) is None or parse_number(result.fps) is None:
+    return None
+
+  for section in config.sections():
+    if section in SETTINGS_SECTIONS:
+      continue
+
+    prefix = RESULT_METRIC_PREFIX if section == "SCORE" else RESULT_METRIC_PREFIX + section.lower() + "_"
+
+    for (k, v) in config.items(section):
+      name = k.lower()
+
+      if name.startswith("score_"):
+        name = name[6:]
+
+      value = parse_number(v)
+
+      if value is None or (section == "SCORE" and name in [ "score", "fpsaverage" ]):
+        continue
+
+      result.metrics[prefix + name] = value
+
+  return result
+
+def format_result_metrics(metrics):
+  values = [ k[len(RESULT_METRIC_PREFIX):] + " " + ("%g" % v) for (k, v) in sorted(metrics.items())
+    if k.startswith(RESULT_METRIC_PREFIX) ]
+
+  if len(values) == 0:
+    return ""
+
+  return "Other results: " + ", ".join(values)
+
+def build_cmdline(cfg, vsync):
+  return [ "SYS.Language=1", "SYS.Fps=" + str(int(vsync)) ] + settings.build_args(cfg)
+
+# Returns the process return code, and the telemetry recorded while the
+# benchmark was running if a sampling interval is given. The wrapper is
+# a command that wine is started through, e.g. taskset, and on_start is
+# called with the process once it runs, e.g. to be able to cancel it.
+def run_benchmark(wine_binary_path, benchmark_dir, environment, args, telemetry_interval=0.0, wrapper=None,
+    on_start=None):
+  process_env = copy.deepcopy(os.environ)
+  process_env.update(environment)
+
+  cmdline = [ wine_binary_path, get_benchmark_exe_path(benchmark_dir) ] + args
+
+  if not wrapper is None:
+    cmdline = wrapper + cmdline
+  process = subprocess.Popen(cmdline, env=process_env, cwd=benchmark_dir)
+  sampler = None
+
+  # Never leave the benchmark running if anything fails while
+  # waiting for it
+  try:
+    if not on_start is None:
+      on_start(process)
+
+    if telemetry_interval > 0.0:
+      sampler = FFXIVTelemetrySampler(process.pid, telemetry_interval)
+      sampler.start()
+
+    returncode = process.wait()
+  except BaseException:
+    process.kill()
+    process.wait()
+    raise
+  finally:
+    if not sampler is None:
+      sampler.stop()
+
+  return (returncode, sampler.buffer if not sampler is None else None)
+
+# Returns an error message if the configuration cannot be launched.
+def check_config(cfg):
+  benchmark_exe_path = get_benchmark_exe_path(cfg.get("benchmark", "path"))
+  wine_binary_path = cfg.get("wine", "path")
+
+  if not os.path.isfile(benchmark_exe_path):
+    return "Benchmark executable (" + benchmark_exe_path + ") not found."
+
+  if not os.path.isfile(wine_binary_path):
+    return "Wine executable (" + wine_binary_path + ") not found."
+
+  if cfg.getboolean("benchmark", "capture_frametimes") and not frametimes.is_available():
+    return "Frame time capture requires NumPy."
+
+  if not cfg.get("benchmark", "shader_cache") in shadercache.SHADER_CACHE_MODES:
+    return "Invalid shader cache mode: " + cfg.get("benchmark", "shader_cache")
+
+  if not cfg.get("benchmark", "view_mode") in benchdir.VIEW_MODES:
+    return "Invalid benchmark view mode: " + cfg.get("benchmark", "view_mode")
+
+  if (benchdir.resolve_mode(cfg.get("benchmark", "view_mode")) == benchdir.VIEW_MODE_OVERLAY and
+      benchdir.find_executable("fuse-overlayfs") is None):
+    return "Overlay views require fuse-overlayfs."
+
+  return prefixes.check_prefix_config(cfg, parse_environment(cfg.get("wine", "environment")))
+
+def get_mtime(file_path):
+  try:
+    return os.stat(file_path).st_mtime_ns
+  except OSError:
+    return None
+
+# Runs the benchmark for a launcher configuration. The function that
+# executes wine can be replaced, which allows simulating runs without
+# wine or the game being present. Steps that take a while on top of
+# the run itself are reported through log, if given.
+class FFXIVBenchmarkRunner:
+  def __init__(self, cfg, execute=run_benchmark, log=None):
+    self.cfg = cfg
+    self.execute = execute
+    self.log = log
+    self.cmdline = build_cmdline(cfg, False)
+
+  def check(self):
+    return check_config(self.cfg)
+
+  # Returns the process return code along with the results, if any
+  # were written.
+  def run(self, cmdline=None):
+    if cmdline is None:
+      cmdline = self.cmdline
+
+    template = None
+
+    # Every run starts from a fresh snapshot of the template, which is
+    # built by the first run that needs it
+    if self.cfg.get("wine", "prefix_mode") == prefixes.PREFIX_MODE_TEMPLATE:
+      template = prefixes.get_template(self.cfg, parse_environment(self.cfg.get("wine", "environment")))
+      template.ensure(self.log)
+
+    mode = self.cfg.get("benchmark", "shader_cache")
+
+    if mode == shadercache.SHADER_CACHE_DEFAULT:
+      return self.run_once(cmdline, None, template)
+
+    cache = FFXIVShaderCache()
+
+    try:
+      cold_result = None
+
+      # Warm up the cache with a full run, and report its results
+      # separately so that shader compile cost can be quantified.
+      if mode == shadercache.SHADER_CACHE_WARM:
+        if not self.log is None:
+          self.log("Warming up shader cache")
+
+        (returncode, cold_result) = self.run_once(cmdline, cache, template)
+
+        if returncode != 0 or cold_result is None:
+          return (returncode, None)
+
+      cache_sizes = cache.get_sizes()
+      (returncode, result) = self.run_once(cmdline, cache, template)
+
+      if not result is None:
+        result.metrics.update(get_cache_metrics(cache_sizes, cache.get_sizes()))
+
+        if not cold_result is None:
+          result.metrics.update(dict([ ("cold_" + k, v) for (k, v) in cold_result.get_metrics().items() ]))
+          result.metrics["cold_score"] = float(cold_result.score)
+          result.metrics["cold_fps"] = float(cold_result.fps)
+
+      return (returncode, result)
+    finally:
+      cache.cleanup()
+
+  def run_once(self, cmdline, cache, template=None):
+    cfg = self.cfg
+
+    # Each run gets a private view of the benchmark directory, so that
+    # concurrent runs can't clobber each other's config and results.
+    view = FFXIVBenchmarkView(cfg.get("benchmark", "path"), cfg.get("benchmark", "view_mode"),
+      [ os.path.basename(get_benchmark_config_file(cfg.get("benchmark", "path"))) ])
+
+    benchmark_dir = view.path
+    file_path = get_benchmark_config_file(benchmark_dir)
+    wine_prefix = cfg.get("wine", "prefix")
+    prefix_clone = None
+    capture = None
+
+    try:
+      if not template is None:
+        prefix_clone = FFXIVPrefixClone(template)
+        wine_prefix = prefix_clone.path
+
+        # Booting wine for the template may have replaced DLLs
+        errors = prefixes.verify_prefix_config(cfg, wine_prefix, parse_environment(cfg.get("wine", "environment")))
+
+        if len(errors) > 0:
+          raise RuntimeError("Wine prefix template check failed: " + "; ".join(errors))
+
+      # There is no screen to query for borderless mode here, so
+      # callers that have one put its size into the config.
+      update_benchmark_config(file_path,
+        cfg.get("graphics", "display_res_x"), cfg.get("graphics", "display_res_y"))
+
+      mtime = get_mtime(file_path)
+
+      process_env = build_environment(wine_prefix, cfg.get("wine", "environment"))
+
+      if not cache is None:
+        cache.update_environment(process_env)
+
+      if cfg.getboolean("benchmark", "capture_frametimes"):
+        capture = FFXIVFrametimeCapture()
+        capture.update_environment(process_env)
+
+      (returncode, telemetry) = self.execute(cfg.get("wine", "path"), benchmark_dir,
+        process_env, cmdline, cfg.getfloat("benchmark", "telemetry_interval"))
+
+      # Don't report the score of a previous run if the
+      # benchmark exited without writing a new one
+      if returncode != 0 or get_mtime(file_path) == mtime:
+        return (returncode, None)
+
+      result = get_results(file_path)
+
+      if result is None:
+        return (returncode, None)
+
+      if not capture is None:
+        result.frametimes = capture.collect()
+
+      result.telemetry = telemetry
+      result.files = view.collect_files()
+      return (returncode, result)
+    finally:
+      if not capture is None:
+        capture.cleanup()
+
+      if not prefix_clone is None:
+        prefix_clone.cleanup()
+
+      view.cleanup()
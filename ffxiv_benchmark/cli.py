@@ -0,0 +1,1147 @@
+from .config import FFXIVBenchmarkConfig, clone_config
+from .history import FFXIVResultHistory
+from .sweep import FFXIVSweepSpec, run_sweep
+from .frametimes import format_stats
+from .telemetry import format_telemetry
+from .stats import FFXIVRunSeries, FFXIVSummary
+from . import shadercache
+from . import settings
+from . import scheduler
+from . import benchdir
+from . import export
+from . import hostinfo
+from . import regression
+from . import optimizer
+from . import impact
+from . import scaling
+from . import profiles
+from . import presets
+from . import remote
+from . import prefixes
+from . import benchmark
+from . import fakewine
+
+import argparse
+import tempfile
+import shutil
+import time
+import sys
+import os
+
+EXIT_OK = 0
+EXIT_CONFIG_ERROR = 1
+EXIT_LAUNCH_FAILED = 2
+EXIT_NO_RESULTS = 3
+EXIT_REGRESSION = 4
+
+CURRENT_PRESET = "current"
+
+def print_error(message):
+  print(message, file=sys.stderr)
+
+def print_warnings(cfg):
+  benchmark_dir = cfg.get("benchmark", "path")
+  wine_prefix_path = cfg.get("wine", "prefix")
+
+  if not benchmark.is_supported_benchmark(benchmark_dir):
+    print_error("Unsupported version of the FFXIV benchmark detected. Graphics options will not work as expected.")
+
+  if not os.path.isdir(wine_prefix_path):
+    print_error("The given wine prefix (" + wine_prefix_path + ") does not exist.")
+
+def format_cmdline(cfg, cmdline):
+  benchmark_exe_path = benchmark.get_benchmark_exe_path(cfg.get("benchmark", "path"))
+  return " ".join([ cfg.get("wine", "path"), benchmark_exe_path ] + cmdline)
+
+def apply_overrides(cfg, args):
+  if not args.benchmark is None:
+    cfg.set("benchmark", "path", args.benchmark)
+
+  if not args.wine is None:
+    cfg.set("wine", "path", args.wine)
+
+  if not args.prefix is None:
+    cfg.set("wine", "prefix", args.prefix)
+
+  if not args.env is None:
+    cfg.set("wine", "environment", args.env)
+
+  if not args.prefix_mode is None:
+    cfg.set("wine", "prefix_mode", args.prefix_mode)
+
+  if not args.prefix_snapshot is None:
+    cfg.set("wine", "prefix_snapshot", args.prefix_snapshot)
+
+  if args.frametimes:
+    cfg.set("benchmark", "capture_frametimes", "True")
+
+  if not args.runs is None:
+    cfg.set("benchmark", "runs", str(args.runs))
+
+  if not args.warmup is None:
+    cfg.set("benchmark", "warmup_runs", str(args.warmup))
+
+  if not args.ci_target is None:
+    cfg.set("benchmark", "ci_target", str(args.ci_target))
+
+  if not args.telemetry_interval is None:
+    cfg.set("benchmark", "telemetry_interval", str(args.telemetry_interval))
+
+  if not args.shader_cache is None:
+    cfg.set("benchmark", "shader_cache", args.shader_cache)
+
+  if not args.view_mode is None:
+    cfg.set("benchmark", "view_mode", args.view_mode)
+
+  # Presets go first, so that single options can be overridden
+  if not args.preset is None:
+    for (k, v) in presets.get_library(args.preset_file).get(args.preset).items():
+      cfg.set("graphics", k, v)
+
+  for s in args.set:
+    v = s.split("=", 1)
+
+    if len(v) != 2 or settings.get_setting(v[0]) is None:
+      raise ValueError("Invalid graphics option: " + s)
+
+    error = settings.get_setting(v[0]).validate(v[1])
+
+    if not error is None:
+      raise ValueError(error)
+
+    cfg.set("graphics", v[0], v[1])
+
+# Returns the launcher configuration with command line overrides
+# applied, or None if it is unusable.
+def load_config(args):
+  cfg = FFXIVBenchmarkConfig(args.config).cfg
+
+  try:
+    apply_overrides(cfg, args)
+  except ValueError as e:
+    print_error(str(e))
+    return None
+
+  # Agents use their own benchmark and wine, which need not exist here
+  if is_remote_only(cfg, args):
+    return cfg
+
+  error = benchmark.check_config(cfg)
+
+  if not error is None:
+    print_error(error)
+    return None
+
+  print_warnings(cfg)
+  return cfg
+
+def cmd_run(args):
+  cfg = load_config(args)
+
+  if cfg is None:
+    return EXIT_CONFIG_ERROR
+
+  cmdline = benchmark.build_cmdline(cfg, args.character_creation)
+
+  if args.character_creation:
+    cmdline.append("Bench.CharacterCreation=1")
+
+  if args.dry_run:
+    print(format_cmdline(cfg, cmdline))
+    return EXIT_OK
+
+  if args.character_creation:
+    (returncode, telemetry) = benchmark.run_benchmark(cfg.get("wine", "path"), cfg.get("benchmark", "path"),
+      benchmark.build_environment(cfg.get("wine", "prefix"), cfg.get("wine", "environment")), cmdline)
+
+    if returncode != 0:
+      print_error("Command execution failed with return code " + str(returncode) + ".")
+      return EXIT_LAUNCH_FAILED
+
+    return EXIT_OK
+
+  series = FFXIVRunSeries(cfg.getint("benchmark", "runs"),
+    cfg.getint("benchmark", "warmup_runs"), cfg.getfloat("benchmark", "ci_target") / 100.0)
+
+  runner = benchmark.FFXIVBenchmarkRunner(cfg)
+  history = open_history(args)
+
+  try:
+    while not series.is_done():
+      desc = series.describe_next()
+      warmup = series.is_warmup()
+
+      try:
+        (returncode, results) = runner.run(cmdline)
+      except RuntimeError as e:
+        print_error(str(e))
+        return EXIT_LAUNCH_FAILED
+      except Exception as e:
+        print_error("Failed to read benchmark results: " + str(e))
+        return EXIT_NO_RESULTS
+
+      if returncode != 0:
+        print_error("Command execution failed with return code " + str(returncode) + ".")
+        return EXIT_LAUNCH_FAILED
+
+      if results is None:
+        print_error("No benchmark results found.")
+        return EXIT_NO_RESULTS
+
+      series.add(results.score, results.fps)
+
+      if series.runs > 1 or series.warmup > 0:
+        print(desc + ": score " + str(results.score) + ", " + str(results.fps) + " fps" +
+          (" (discarded)" if warmup else ""))
+      else:
+        print("Score: " + str(results.score))
+        print("FPS: " + str(results.fps))
+
+      if not results.frametimes is None and not warmup:
+        print(format_stats(results.frametimes))
+
+      if "shader_cache_dxvk_bytes" in results.metrics and not warmup:
+        print(shadercache.format_metrics(results.metrics))
+
+      if not warmup and benchmark.format_result_metrics(results.metrics) != "":
+        print(benchmark.format_result_metrics(results.metrics))
+
+      if not history is None and not warmup:
+        history.add_result(cfg, results)
+  finally:
+    if not history is None:
+      history.close()
+
+  if len(series.scores) > 1:
+    print("Score: " + series.score_summary().format(0))
+    print("FPS: " + series.fps_summary().format(1))
+
+  return EXIT_OK
+
+def cmd_sweep(args):
+  cfg = load_config(args)
+
+  if cfg is None:
+    return EXIT_CONFIG_ERROR
+
+  try:
+    slots = get_slots(cfg, args)
+  except ValueError as e:
+    print_error(str(e))
+    return EXIT_CONFIG_ERROR
+
+  history = None
+  output = None
+
+  try:
+    spec = FFXIVSweepSpec(args.spec, presets.get_library(args.preset_file))
+
+    if not args.dry_run:
+      history = open_history(args)
+
+      if not args.export is None:
+        output = export.open_export(args.export, args.export_format, export.get_result_columns())
+
+    failed = run_sweep(cfg, spec, args.output, args.dry_run, print, history, slots, output)
+  except ValueError as e:
+    print_error(str(e))
+    return EXIT_CONFIG_ERROR
+  finally:
+    if not history is None:
+      history.close()
+
+    if not output is None:
+      output.close()
+
+  if failed > 0:
+    print_error(str(failed) + " configurations failed.")
+    return EXIT_LAUNCH_FAILED
+
+  return EXIT_OK
+
+def get_slot_names(cfg, args):
+  if getattr(args, "slots", None) is None:
+    return None
+
+  names = [ n.strip() for n in args.slots.split(",") if n.strip() != "" ]
+
+  if len(names) == 0:
+    names = scheduler.get_slots(cfg)
+
+  return names
+
+def is_remote_only(cfg, args):
+  names = get_slot_names(cfg, args)
+
+  if names is None or len(names) == 0:
+    return False
+
+  return len([ n for n in names if not scheduler.is_remote_slot(cfg, n) ]) == 0
+
+# Returns the slots selected with --slots, or None to run sequentially
+def get_slots(cfg, args):
+  names = get_slot_names(cfg, args)
+
+  if names is None:
+    return None
+
+  if len(names) == 0:
+    raise ValueError("No slots defined in the launcher configuration.")
+
+  return [ scheduler.open_slot(cfg, n, args.slot_dir) for n in names ]
+
+def cmd_ab(args):
+  cfg = load_config(args)
+
+  if cfg is None:
+    return EXIT_CONFIG_ERROR
+
+  if len(args.profiles) < 2:
+    print_error("At least two profiles are needed, available profiles: " +
+      ", ".join([ profiles.DEFAULT_PROFILE ] + profiles.get_profiles(cfg)))
+    return EXIT_CONFIG_ERROR
+
+  try:
+    for name in args.profiles:
+      error = benchmark.check_config(profiles.apply_profile(cfg, name))
+
+      if not error is None:
+        raise ValueError(name + ": " + error)
+  except ValueError as e:
+    print_error(str(e))
+    return EXIT_CONFIG_ERROR
+
+  history = open_history(args)
+
+  try:
+    comparison = profiles.run_interleaved(cfg, args.profiles,
+      args.rounds, args.warmup_rounds, print, history)
+  except RuntimeError as e:
+    print_error(str(e))
+    return EXIT_LAUNCH_FAILED
+  finally:
+    if not history is None:
+      history.close()
+
+  print(comparison.format())
+  return EXIT_OK
+
+def cmd_impact(args):
+  cfg = load_config(args)
+
+  if cfg is None:
+    return EXIT_CONFIG_ERROR
+
+  keys = None
+
+  if not args.options is None:
+    keys = [ k.strip() for k in args.options.split(",") if k.strip() != "" ]
+
+  try:
+    for k in keys or [ ]:
+      if settings.get_setting(k) is None:
+        raise ValueError("Invalid graphics option: " + k)
+
+    slots = get_slots(cfg, args)
+
+    # The preset is applied on top of the config, which fills in
+    # whatever options it does not set
+    preset = args.preset or "maximum"
+    values = presets.get_library(args.preset_file).get(preset)
+    values = presets.get_current(presets.apply_preset(cfg, values))
+  except ValueError as e:
+    print_error(str(e))
+    return EXIT_CONFIG_ERROR
+
+  analysis = impact.FFXIVImpactAnalysis(values, keys)
+  metric = "score" if args.score else "fps"
+  history = open_history(args)
+
+  try:
+    impacts = analysis.run(cfg, args.repeats, print, history, slots, metric)
+  except RuntimeError as e:
+    print_error(str(e))
+    return EXIT_LAUNCH_FAILED
+  finally:
+    if not history is None:
+      history.close()
+
+  print("Cost of each option relative to the " + preset + " preset:")
+  print(impact.format_impacts(impacts, metric))
+  return EXIT_OK
+
+def cmd_scaling(args):
+  cfg = load_config(args)
+
+  if cfg is None:
+    return EXIT_CONFIG_ERROR
+
+  width = cfg.getint("graphics", "display_res_x")
+  height = cfg.getint("graphics", "display_res_y")
+
+  try:
+    if not args.resolutions is None:
+      # Borderless windows always cover the desktop, so the resolution
+      # would not change between steps
+      if cfg.getint("graphics", "display_mode") == 2:
+        raise ValueError("Resolution scans need windowed or fullscreen mode, set display_mode to 0 or 1")
+
+      ladder = [ parse_resolution(r.strip()) + (100,) for r in args.resolutions.split(",") ]
+    else:
+      scales = scaling.DEFAULT_SCALES
+
+      if not args.scales is None:
+        scales = [ s.strip() for s in args.scales.split(",") ]
+
+        for s in scales:
+          error = settings.get_setting("res_scale").validate(s)
+
+          if not error is None:
+            raise ValueError(error)
+
+      ladder = [ (width, height, int(s)) for s in scales ]
+
+    slots = get_slots(cfg, args)
+  except ValueError as e:
+    print_error(str(e))
+    return EXIT_CONFIG_ERROR
+
+  history = open_history(args)
+
+  try:
+    model = scaling.run_scaling(cfg, ladder, args.repeats, print, history, slots)
+  except RuntimeError as e:
+    print_error(str(e))
+    return EXIT_LAUNCH_FAILED
+  finally:
+    if not history is None:
+      history.close()
+
+  print(model.format())
+  return EXIT_OK
+
+def cmd_optimize(args):
+  cfg = load_config(args)
+
+  if cfg is None:
+    return EXIT_CONFIG_ERROR
+
+  target = args.target_fps if not args.target_fps is None else args.target_score
+  metric = "fps" if args.target_score is None else "score"
+
+  try:
+    slots = get_slots(cfg, args)
+    weights = optimizer.read_weights(args.weights) if not args.weights is None else { }
+    model = optimizer.FFXIVQualityModel(weights)
+  except ValueError as e:
+    print_error(str(e))
+    return EXIT_CONFIG_ERROR
+
+  history = open_history(args)
+
+  try:
+    search = optimizer.FFXIVOptimizer(cfg, model, target, metric,
+      args.repeats, print, history, slots)
+    front = search.run(args.candidates)
+  except RuntimeError as e:
+    print_error(str(e))
+    return EXIT_LAUNCH_FAILED
+  finally:
+    if not history is None:
+      history.close()
+
+  recommended = search.recommend(front, args.presets)
+
+  print("Pareto front after " + str(len(search.measurements) * args.repeats) + " runs:")
+  print(optimizer.format_front(front, recommended))
+
+  if len(recommended) == 0:
+    print_error("No measured settings reach the target.")
+    return EXIT_NO_RESULTS
+
+  if not args.output is None:
+    optimizer.write_presets(args.output, recommended, metric)
+    print("Wrote " + str(len(recommended)) + " presets to " + args.output)
+
+  return EXIT_OK
+
+# Measures how many runs per hour the launcher itself can sustain, by
+# running the full pipeline against the fake wine in a scratch directory.
+def cmd_self_benchmark(args):
+  cfg = clone_config(FFXIVBenchmarkConfig(args.config).cfg)
+  benchmark_dir = tempfile.mkdtemp(prefix="ffxiv_benchmark_self_")
+
+  try:
+    fakewine.create_benchmark(benchmark_dir)
+
+    cfg.set("benchmark", "path", benchmark_dir)
+    cfg.set("wine", "path", os.path.abspath(fakewine.__file__))
+    cfg.set("wine", "environment", "FAKE_WINE_DELAY=" + str(args.delay))
+    cfg.set("benchmark", "capture_frametimes", str(args.frametimes))
+
+    if not args.shader_cache is None:
+      cfg.set("benchmark", "shader_cache", args.shader_cache)
+
+    if not args.telemetry_interval is None:
+      cfg.set("benchmark", "telemetry_interval", str(args.telemetry_interval))
+
+    runner = benchmark.FFXIVBenchmarkRunner(cfg)
+    error = runner.check()
+
+    if not error is None:
+      print_error(error)
+      return EXIT_CONFIG_ERROR
+
+    durations = [ ]
+
+    for i in range(args.runs):
+      start = time.monotonic()
+      (returncode, result) = runner.run()
+      durations.append(time.monotonic() - start)
+
+      if returncode != 0 or result is None:
+        print_error("Run " + str(i + 1) + " failed.")
+        return EXIT_LAUNCH_FAILED
+  finally:
+    shutil.rmtree(benchmark_dir, ignore_errors=True)
+
+  # Warm shader cache runs launch the benchmark twice
+  launches = 2 if cfg.get("benchmark", "shader_cache") == shadercache.SHADER_CACHE_WARM else 1
+
+  summary = FFXIVSummary([ 1000.0 * (d - args.delay * launches) for d in durations ])
+  total = sum(durations)
+
+  print("Runs: " + str(len(durations)) + " in %.2f s" % total)
+  print("Overhead per run: " + summary.format(1) + " ms")
+  print("Throughput: %.0f runs/hour" % (3600.0 * len(durations) / total))
+  return EXIT_OK
+
+def parse_resolution(resolution):
+  v = resolution.lower().split("x")
+
+  if len(v) != 2 or not v[0].isdigit() or not v[1].isdigit():
+    raise ValueError("Invalid resolution: " + resolution)
+
+  return (int(v[0]), int(v[1]))
+
+# Returns the graphics settings and resolution to filter history by
+def parse_filters(args):
+  settings = { }
+  resolution = None
+
+  for s in args.where:
+    v = s.split("=", 1)
+
+    if len(v) != 2:
+      raise ValueError("Invalid filter: " + s)
+
+    settings[v[0]] = v[1]
+
+  if not args.resolution is None:
+    resolution = parse_resolution(args.resolution)
+
+  return (settings, resolution)
+
+def cmd_history(args):
+  try:
+    (settings, resolution) = parse_filters(args)
+  except ValueError as e:
+    print_error(str(e))
+    return EXIT_CONFIG_ERROR
+
+  history = FFXIVResultHistory(args.history)
+  rows = history.query(settings, resolution, args.best, args.limit)
+
+  for row in rows:
+    print("%6d  %s  %5dx%-5d  %6d  %7.1f fps  %s" % (row["id"],
+      time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row["timestamp"])),
+      row["res_x"], row["res_y"], row["score"], row["fps"], row["wine_path"]))
+
+    if args.verbose:
+      print("        " + " ".join([ k + "=" + v for (k, v) in history.get_settings(row["id"]).items() ]))
+
+      metrics = history.get_metrics(row["id"])
+
+      if len(metrics) > 0:
+        print("        " + " ".join([ k + "=" + ("%g" % v) for (k, v) in metrics.items() ]))
+
+      host = history.get_host(row["id"])
+
+      if len(host) > 0:
+        print("        " + ", ".join([ host[k] for k in hostinfo.HOST_INFO_KEYS if host.get(k, "") != "" ]))
+
+      files = history.get_files(row["id"])
+
+      if len(files) > 0:
+        print("        files: " + " ".join(files.keys()))
+
+    if args.telemetry:
+      text = format_telemetry(history.get_telemetry(row["id"]))
+
+      if text != "":
+        print(text)
+
+  history.close()
+  return EXIT_OK
+
+def cmd_host(args):
+  cfg = load_config(args)
+
+  if cfg is None:
+    return EXIT_CONFIG_ERROR
+
+  print(hostinfo.format_host_info(hostinfo.get_host_info(cfg)))
+  return EXIT_OK
+
+# Builds, verifies, shows and removes the template prefix for the
+# configured prefix, wine and environment
+def cmd_prefix(args):
+  cfg = FFXIVBenchmarkConfig(args.config).cfg
+
+  try:
+    apply_overrides(cfg, args)
+
+    if not cfg.get("wine", "prefix_snapshot") in prefixes.SNAPSHOT_METHODS:
+      raise ValueError("Invalid prefix snapshot method: " + cfg.get("wine", "prefix_snapshot"))
+
+    environment = benchmark.parse_environment(cfg.get("wine", "environment"))
+    template = prefixes.get_template(cfg, environment)
+
+    if args.action == "build":
+      start = time.monotonic()
+      template.ensure(print, args.force)
+      clone = prefixes.FFXIVPrefixClone(template)
+
+      try:
+        errors = prefixes.verify_prefix_config(cfg, clone.path, environment)
+      finally:
+        clone.cleanup()
+
+      print("Template in " + template.base_dir + " is ready (" + template.method + ", %.1f s)" % (time.monotonic() - start))
+
+      for e in errors:
+        print_error(e)
+
+      return EXIT_CONFIG_ERROR if len(errors) > 0 else EXIT_OK
+    elif args.action == "verify":
+      errors = prefixes.verify_prefix_config(cfg, cfg.get("wine", "prefix"), environment)
+
+      for e in errors:
+        print_error(e)
+
+      if len(errors) > 0:
+        return EXIT_CONFIG_ERROR
+
+      print(cfg.get("wine", "prefix") + ": OK")
+    elif args.action == "show":
+      manifest = template.get_manifest()
+
+      print("Template:  " + template.base_dir)
+      print("Method:    " + template.method)
+
+      if manifest is None or not template.exists():
+        print("State:     not built")
+        return EXIT_OK
+
+      print("State:     " + ("up to date" if template.is_current() else "outdated"))
+      print("Created:   " + time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(manifest["created"])))
+
+      for (d, v) in sorted(manifest["dlls"].items()):
+        print("%-10s %s" % (d + ":", v))
+    elif args.action == "clean":
+      template.clean()
+      print("Removed " + template.base_dir)
+  except (ValueError, RuntimeError, OSError) as e:
+    print_error(str(e))
+    return EXIT_CONFIG_ERROR
+
+  return EXIT_OK
+
+# Serves benchmark runs to launchers on other machines
+def cmd_agent(args):
+  cfg = load_config(args)
+
+  if cfg is None:
+    return EXIT_CONFIG_ERROR
+
+  try:
+    remote.run_agent(cfg, args.listen, args.token or os.getenv("FFXIV_AGENT_TOKEN"))
+  except (ValueError, OSError) as e:
+    print_error(str(e))
+    return EXIT_CONFIG_ERROR
+  except KeyboardInterrupt:
+    pass
+
+  return EXIT_OK
+
+# Shows the state of every agent in the launcher config
+def cmd_agents(args):
+  cfg = FFXIVBenchmarkConfig(args.config).cfg
+  names = [ n for n in scheduler.get_slots(cfg) if scheduler.is_remote_slot(cfg, n) ]
+
+  if len(names) == 0:
+    print_error("No agents defined in the launcher configuration.")
+    return EXIT_CONFIG_ERROR
+
+  failed = 0
+
+  for n in names:
+    slot = scheduler.open_slot(cfg, n)
+
+    try:
+      info = slot.get_info()
+    except RuntimeError as e:
+      print(n + " (" + slot.url + "): unreachable, " + str(e))
+      failed += 1
+      continue
+
+    state = "busy" if info["busy"] else "idle"
+    print(n + " (" + slot.url + "): " + state + ", " + str(info["completed"]) + " runs completed")
+
+    if args.verbose:
+      print("  " + hostinfo.format_host_info(info["host"]).replace("\n", "\n  "))
+
+  return EXIT_LAUNCH_FAILED if failed > 0 else EXIT_OK
+
+# Lists, shows, compares, applies and saves graphics presets. The name
+# 'current' refers to the graphics options in the launcher config.
+def cmd_preset(args):
+  config = FFXIVBenchmarkConfig(args.config)
+
+  try:
+    library = presets.get_library(args.preset_file)
+
+    # Presets are compared by the settings they would result in, so
+    # options a preset does not set are taken from the config
+    def get_values(name):
+      if name == CURRENT_PRESET and not library.has(name):
+        return presets.get_current(config.cfg)
+      return presets.get_current(presets.apply_preset(config.cfg, library.get(name)))
+
+    if args.action == "list":
+      for n in library.get_names():
+        print("%-24s %s" % (n, library.get_source(n)))
+    elif args.action == "show":
+      if args.name == CURRENT_PRESET and not library.has(args.name):
+        print(presets.format_preset(presets.get_current(config.cfg)))
+      else:
+        print(presets.format_preset(library.get(args.name)))
+    elif args.action == "diff":
+      diff = presets.diff_presets(get_values(args.name), get_values(args.other))
+      print(presets.format_diff(diff, args.name, args.other))
+    elif args.action == "apply":
+      config.cfg = presets.apply_preset(config.cfg, library.get(args.name))
+      config.save()
+      print("Applied preset " + args.name + " to " + config.cfg_path)
+    elif args.action == "save":
+      file_path = args.output
+
+      if file_path is None:
+        file_path = os.path.join(presets.get_default_preset_dir(), args.name + ".ini")
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+      presets.write_presets(file_path, [ (args.name, presets.get_current(config.cfg)) ])
+      print("Saved current settings as preset " + args.name + " to " + file_path)
+  except (ValueError, OSError) as e:
+    print_error(str(e))
+    return EXIT_CONFIG_ERROR
+
+  return EXIT_OK
+
+# Returns run IDs given on the command line, or the most recent ones
+def get_run_ids(history, args):
+  if not args.last is None:
+    return [ row["id"] for row in history.query(limit=args.last) ]
+
+  return args.run_ids
+
+def cmd_baseline(args):
+  history = FFXIVResultHistory(args.history)
+
+  try:
+    if args.name is None:
+      for row in history.get_baselines():
+        print("%-20s %3d runs  %s" % (row["name"], row["runs"],
+          time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row["timestamp"]))))
+      return EXIT_OK
+
+    if args.delete:
+      if not history.delete_baseline(args.name):
+        print_error("No baseline named " + args.name)
+        return EXIT_CONFIG_ERROR
+      return EXIT_OK
+
+    run_ids = get_run_ids(history, args)
+
+    for run_id in run_ids:
+      if history.get_run(run_id) is None:
+        print_error("No run with ID " + str(run_id))
+        return EXIT_CONFIG_ERROR
+
+    if len(run_ids) == 0:
+      print_error("No runs given for baseline " + args.name)
+      return EXIT_CONFIG_ERROR
+
+    history.set_baseline(args.name, run_ids)
+    print("Saved " + str(len(run_ids)) + " runs as baseline " + args.name)
+    return EXIT_OK
+  finally:
+    history.close()
+
+def parse_tolerances(values):
+  result = { }
+
+  for s in values:
+    v = s.split("=", 1)
+
+    if len(v) != 2 or not v[0] in [ n for (n, h) in regression.COMPARE_METRICS ]:
+      raise ValueError("Invalid metric tolerance: " + s)
+
+    result[v[0]] = float(v[1])
+
+  return result
+
+# Runs the benchmark as configured and returns the IDs of the measured
+# runs, which are always recorded in the history
+def run_for_compare(args, history):
+  cfg = load_config(args)
+
+  if cfg is None:
+    return None
+
+  runs = cfg.getint("benchmark", "runs")
+  warmup = cfg.getint("benchmark", "warmup_runs")
+  runner = benchmark.FFXIVBenchmarkRunner(cfg)
+  result = [ ]
+
+  for i in range(warmup + runs):
+    (returncode, results) = runner.run()
+
+    if returncode != 0 or results is None:
+      raise RuntimeError("Run " + str(i + 1) + ": benchmark failed")
+
+    print("Run %d/%d: score %s, %s fps%s" % (i + 1, warmup + runs, results.score, results.fps,
+      " (discarded)" if i < warmup else ""))
+
+    if i >= warmup:
+      result.append(history.add_result(cfg, results))
+
+  return result
+
+def cmd_compare(args):
+  try:
+    tolerances = parse_tolerances(args.metric_tolerance)
+  except ValueError as e:
+    print_error(str(e))
+    return EXIT_CONFIG_ERROR
+
+  history = FFXIVResultHistory(args.history)
+
+  try:
+    baseline_ids = history.get_baseline(args.baseline)
+
+    if len(baseline_ids) == 0:
+      print_error("No baseline named " + args.baseline)
+      return EXIT_CONFIG_ERROR
+
+    if args.run:
+      run_ids = run_for_compare(args, history)
+
+      if run_ids is None:
+        return EXIT_CONFIG_ERROR
+    else:
+      run_ids = get_run_ids(history, args)
+
+    if len(run_ids) == 0:
+      print_error("No runs to compare, give run IDs, --last or --run")
+      return EXIT_CONFIG_ERROR
+
+    baseline = [ regression.get_run_values(history, r) for r in baseline_ids ]
+    current = [ regression.get_run_values(history, r) for r in run_ids ]
+  except ValueError as e:
+    print_error(str(e))
+    return EXIT_CONFIG_ERROR
+  except RuntimeError as e:
+    print_error(str(e))
+    return EXIT_LAUNCH_FAILED
+  finally:
+    history.close()
+
+  check = regression.FFXIVRegressionCheck(baseline, current, args.tolerance, tolerances, args.alpha)
+
+  print("Comparing " + str(len(current)) + " runs against baseline " + args.baseline +
+    " (" + str(len(baseline)) + " runs):")
+  print(check.format())
+
+  if len(check.get_regressions()) > 0:
+    print_error("Slower than baseline " + args.baseline + ": " +
+      ", ".join([ m.name for m in check.get_regressions() ]))
+    return EXIT_REGRESSION
+
+  return EXIT_OK
+
+def cmd_export(args):
+  history = None
+
+  try:
+    (settings, resolution) = parse_filters(args)
+
+    history = FFXIVResultHistory(args.history)
+
+    if args.aggregate:
+      (groups, count) = export.export_aggregate(history, args.output, args.format, settings, resolution, args.limit)
+    else:
+      count = export.export_history(history, args.output, args.format, settings, resolution, args.limit)
+  except (ValueError, OSError) as e:
+    print_error(str(e))
+    return EXIT_CONFIG_ERROR
+  finally:
+    if not history is None:
+      history.close()
+
+  if args.aggregate:
+    print("Exported " + str(groups) + " combinations of " + str(count) + " runs to " + args.output)
+  else:
+    print("Exported " + str(count) + " runs to " + args.output)
+
+  return EXIT_OK
+
+def open_history(args):
+  if args.no_history:
+    return None
+
+  return FFXIVResultHistory(args.history)
+
+def add_config_arguments(parser):
+  parser.add_argument("--config", help="launcher configuration file")
+  parser.add_argument("--benchmark", help="benchmark directory")
+  parser.add_argument("--wine", help="wine executable")
+  parser.add_argument("--prefix", help="wine prefix")
+  parser.add_argument("--env", help="environment variables passed to wine")
+  parser.add_argument("--prefix-mode", choices=prefixes.PREFIX_MODES,
+    help="run in the prefix itself, or in a fresh snapshot of a template built from it")
+  parser.add_argument("--prefix-snapshot", choices=prefixes.SNAPSHOT_METHODS,
+    help="how runs get their snapshot of the template prefix")
+  parser.add_argument("--preset", help="start from the graphics options of a preset")
+  parser.add_argument("--preset-file", action="append", default=[], metavar="FILE",
+    help="load additional presets from this file")
+  parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+    help="override a graphics option")
+  parser.add_argument("--frametimes", action="store_true",
+    help="capture frame times through MangoHud")
+  parser.add_argument("--runs", type=int, help="number of measured runs")
+  parser.add_argument("--warmup", type=int, help="number of discarded warm-up runs")
+  parser.add_argument("--ci-target", type=float, metavar="PERCENT",
+    help="stop early once the 95%% confidence interval of the score is within this percentage")
+  parser.add_argument("--shader-cache", choices=shadercache.SHADER_CACHE_MODES,
+    help="run with the system shader caches, or an empty (cold) or pre-filled (warm) private cache")
+  parser.add_argument("--telemetry-interval", type=float, metavar="SECONDS",
+    help="how often to sample CPU, memory and GPU telemetry, 0 to disable")
+  parser.add_argument("--view-mode", choices=benchdir.VIEW_MODES,
+    help="how each run gets a private view of the benchmark directory")
+  parser.add_argument("--history", help="result history database")
+  parser.add_argument("--no-history", action="store_true",
+    help="do not record results in the history database")
+
+def build_parser():
+  parser = argparse.ArgumentParser(prog="ffxiv-benchmark.py",
+    description="Runs the FFXIV benchmark without a GUI.")
+  subparsers = parser.add_subparsers(dest="command", required=True)
+
+  parser_run = subparsers.add_parser("run", help="run the benchmark once")
+  add_config_arguments(parser_run)
+  parser_run.add_argument("--character-creation", action="store_true",
+    help="launch character creation instead of the benchmark")
+  parser_run.add_argument("--dry-run", action="store_true",
+    help="print the command line instead of running it")
+  parser_run.set_defaults(func=cmd_run)
+
+  parser_sweep = subparsers.add_parser("sweep", help="benchmark every combination of the given settings")
+  add_config_arguments(parser_sweep)
+  parser_sweep.add_argument("spec", help="sweep spec listing the values to try per graphics option")
+  parser_sweep.add_argument("-o", "--output", default="sweep.csv",
+    help="results file, existing results are skipped (default: sweep.csv)")
+  parser_sweep.add_argument("--dry-run", action="store_true",
+    help="print the command lines instead of running them")
+  parser_sweep.add_argument("--slots", nargs="?", const="", metavar="NAME,...",
+    help="run concurrently on the given slots, or all slots defined in the config")
+  parser_sweep.add_argument("--slot-dir", help="where to keep per-slot prefixes and benchmark directories")
+  parser_sweep.add_argument("--export", metavar="FILE",
+    help="also write a full report of every run, in a format chosen by the file extension")
+  parser_sweep.add_argument("--export-format", choices=export.EXPORT_FORMATS,
+    help="format of the report, if not given by the file extension")
+  parser_sweep.set_defaults(func=cmd_sweep)
+
+  parser_ab = subparsers.add_parser("ab", help="compare wine profiles in interleaved runs")
+  add_config_arguments(parser_ab)
+  parser_ab.add_argument("profiles", nargs="*", metavar="PROFILE",
+    help="profiles to compare, the first one is the baseline")
+  parser_ab.add_argument("--rounds", type=int, default=5, help="measured runs per profile (default: 5)")
+  parser_ab.add_argument("--warmup-rounds", type=int, default=1, help="discarded runs per profile (default: 1)")
+  parser_ab.set_defaults(func=cmd_ab)
+
+  parser_optimize = subparsers.add_parser("optimize",
+    help="search for the best looking settings that reach a performance target")
+  add_config_arguments(parser_optimize)
+  target = parser_optimize.add_mutually_exclusive_group()
+  target.add_argument("--target-fps", type=float, help="average frame rate to reach")
+  target.add_argument("--target-score", type=float, help="benchmark score to reach")
+  parser_optimize.add_argument("--weights", metavar="FILE",
+    help="INI file with a [weights] section giving the visual importance of each graphics option (default: 1)")
+  parser_optimize.add_argument("--candidates", type=int, default=4,
+    help="extra settings to measure along the search path (default: 4)")
+  parser_optimize.add_argument("--repeats", type=int, default=1,
+    help="benchmark runs per measured setting (default: 1)")
+  parser_optimize.add_argument("--presets", type=int, default=3,
+    help="number of recommended presets (default: 3)")
+  parser_optimize.add_argument("-o", "--output", help="write the recommended presets to this file")
+  parser_optimize.add_argument("--slots", nargs="?", const="", metavar="NAME,...",
+    help="run concurrently on the given slots, or all slots defined in the config")
+  parser_optimize.add_argument("--slot-dir", help="where to keep per-slot prefixes and benchmark directories")
+  parser_optimize.set_defaults(func=cmd_optimize)
+
+  parser_impact = subparsers.add_parser("impact",
+    help="measure what each graphics option costs, relative to a preset (--preset, default: maximum)")
+  add_config_arguments(parser_impact)
+  parser_impact.add_argument("--options", metavar="KEY,...", help="only measure these options")
+  parser_impact.add_argument("--repeats", type=int, default=3,
+    help="benchmark runs per option, interleaved with the preset (default: 3)")
+  parser_impact.add_argument("--score", action="store_true", help="rank by score instead of frame rate")
+  parser_impact.add_argument("--slots", nargs="?", const="", metavar="NAME,...",
+    help="run concurrently on the given slots, or all slots defined in the config")
+  parser_impact.add_argument("--slot-dir", help="where to keep per-slot prefixes and benchmark directories")
+  parser_impact.set_defaults(func=cmd_impact)
+
+  parser_scaling = subparsers.add_parser("scaling",
+    help="run across render scales or resolutions to tell CPU-bound from GPU-bound")
+  add_config_arguments(parser_scaling)
+  ladder = parser_scaling.add_mutually_exclusive_group()
+  ladder.add_argument("--scales", metavar="PERCENT,...",
+    help="render scales to run at the configured resolution (default: 50,60,70,80,90,100)")
+  ladder.add_argument("--resolutions", metavar="WxH,...",
+    help="resolutions to run at full render scale, e.g. 1280x720,1920x1080,3840x2160")
+  parser_scaling.add_argument("--repeats", type=int, default=1,
+    help="benchmark runs per step (default: 1)")
+  parser_scaling.add_argument("--slots", nargs="?", const="", metavar="NAME,...",
+    help="run concurrently on the given slots, or all slots defined in the config")
+  parser_scaling.add_argument("--slot-dir", help="where to keep per-slot prefixes and benchmark directories")
+  parser_scaling.set_defaults(func=cmd_scaling)
+
+  parser_history = subparsers.add_parser("history", help="list previous benchmark runs")
+  parser_history.add_argument("--history", help="result history database")
+  parser_history.add_argument("--resolution", metavar="WxH", help="only show runs at this resolution")
+  parser_history.add_argument("--where", action="append", default=[], metavar="KEY=VALUE",
+    help="only show runs with the given graphics option")
+  parser_history.add_argument("--best", action="store_true", help="sort by score instead of date")
+  parser_history.add_argument("-n", "--limit", type=int, default=20, help="number of runs to show")
+  parser_history.add_argument("-v", "--verbose", action="store_true", help="show graphics settings")
+  parser_history.add_argument("-t", "--telemetry", action="store_true", help="show telemetry")
+  parser_history.set_defaults(func=cmd_history)
+
+  parser_baseline = subparsers.add_parser("baseline",
+    help="save runs from the history as a named baseline, or list baselines")
+  parser_baseline.add_argument("name", nargs="?", help="baseline name, list all baselines if omitted")
+  parser_baseline.add_argument("run_ids", nargs="*", type=int, metavar="RUN_ID", help="runs to save")
+  parser_baseline.add_argument("--last", type=int, metavar="N", help="save the N most recent runs")
+  parser_baseline.add_argument("--delete", action="store_true", help="delete the baseline")
+  parser_baseline.add_argument("--history", help="result history database")
+  parser_baseline.set_defaults(func=cmd_baseline)
+
+  parser_compare = subparsers.add_parser("compare",
+    help="compare runs against a baseline, exit with status " + str(EXIT_REGRESSION) + " if slower")
+  add_config_arguments(parser_compare)
+  parser_compare.add_argument("baseline", help="baseline name")
+  parser_compare.add_argument("run_ids", nargs="*", type=int, metavar="RUN_ID", help="runs to compare")
+  parser_compare.add_argument("--last", type=int, metavar="N", help="compare the N most recent runs")
+  parser_compare.add_argument("--run", action="store_true",
+    help="run the benchmark as configured and compare the new runs")
+  parser_compare.add_argument("--tolerance", type=float, default=regression.DEFAULT_TOLERANCE, metavar="PERCENT",
+    help="slowdown to tolerate (default: %.1f%%%%)" % regression.DEFAULT_TOLERANCE)
+  parser_compare.add_argument("--metric-tolerance", action="append", default=[], metavar="METRIC=PERCENT",
+    help="slowdown to tolerate for one metric, e.g. frametime_p99=10")
+  parser_compare.add_argument("--alpha", type=float, default=regression.DEFAULT_ALPHA,
+    help="significance level slowdowns have to reach with several runs (default: %g)" % regression.DEFAULT_ALPHA)
+  parser_compare.set_defaults(func=cmd_compare)
+
+  parser_prefix = subparsers.add_parser("prefix",
+    help="build and check the template wine prefix that runs start from with prefix_mode = template")
+  add_config_arguments(parser_prefix)
+  parser_prefix.add_argument("action", choices=[ "build", "verify", "show", "clean" ],
+    help="build or rebuild the template if outdated, check the DLLs of the configured prefix, "
+      "show the state of the template, or remove it")
+  parser_prefix.add_argument("--force", action="store_true", help="rebuild the template even if up to date")
+  parser_prefix.set_defaults(func=cmd_prefix)
+
+  parser_agent = subparsers.add_parser("agent", help="run benchmarks on behalf of launchers on other machines")
+  add_config_arguments(parser_agent)
+  parser_agent.add_argument("--listen", default="127.0.0.1:" + str(remote.AGENT_DEFAULT_PORT), metavar="HOST:PORT",
+    help="address to listen on (default: 127.0.0.1:%d)" % remote.AGENT_DEFAULT_PORT)
+  parser_agent.add_argument("--token",
+    help="token controllers have to send, defaults to $FFXIV_AGENT_TOKEN, required unless listening on loopback")
+  parser_agent.set_defaults(func=cmd_agent)
+
+  parser_agents = subparsers.add_parser("agents", help="show the state of the agents in the launcher config")
+  parser_agents.add_argument("--config", help="launcher configuration file")
+  parser_agents.add_argument("-v", "--verbose", action="store_true", help="show the host of every agent")
+  parser_agents.set_defaults(func=cmd_agents)
+
+  parser_preset = subparsers.add_parser("preset", help="list, compare and apply graphics presets")
+  parser_preset.add_argument("--config", help="launcher configuration file")
+  parser_preset.add_argument("--preset-file", action="append", default=[], metavar="FILE",
+    help="load additional presets from this file")
+  preset_actions = parser_preset.add_subparsers(dest="action", required=True)
+  preset_actions.add_parser("list", help="list presets and where they are defined")
+  preset_show = preset_actions.add_parser("show", help="show the graphics options of a preset")
+  preset_show.add_argument("name", help="preset name, or '" + CURRENT_PRESET + "'")
+  preset_diff = preset_actions.add_parser("diff", help="show the options two presets disagree on")
+  preset_diff.add_argument("name", help="preset name, or '" + CURRENT_PRESET + "'")
+  preset_diff.add_argument("other", nargs="?", default=CURRENT_PRESET,
+    help="preset to compare with (default: the current settings)")
+  preset_apply = preset_actions.add_parser("apply", help="apply a preset to the launcher config")
+  preset_apply.add_argument("name", help="preset name")
+  preset_save = preset_actions.add_parser("save", help="save the current settings as a preset")
+  preset_save.add_argument("name", help="preset name")
+  preset_save.add_argument("-o", "--output",
+    help="preset file to write (default: NAME.ini in " + presets.get_default_preset_dir() + ")")
+  parser_preset.set_defaults(func=cmd_preset)
+
+  parser_host = subparsers.add_parser("host", help="show the host and software fingerprint recorded with runs")
+  add_config_arguments(parser_host)
+  parser_host.set_defaults(func=cmd_host)
+
+  parser_export = subparsers.add_parser("export", help="write runs from the history as JSON Lines, CSV or Parquet")
+  parser_export.add_argument("output", help="output file, the format is chosen by its extension")
+  parser_export.add_argument("--format", choices=export.EXPORT_FORMATS,
+    help="output format, if not given by the file extension")
+  parser_export.add_argument("--history", help="result history database")
+  parser_export.add_argument("--resolution", metavar="WxH", help="only export runs at this resolution")
+  parser_export.add_argument("--where", action="append", default=[], metavar="KEY=VALUE",
+    help="only export runs with the given graphics option")
+  parser_export.add_argument("-n", "--limit", type=int, help="only export the most recent runs")
+  parser_export.add_argument("--aggregate", action="store_true",
+    help="write one row per combination of settings, resolution, wine setup and host, with summary statistics")
+  parser_export.set_defaults(func=cmd_export)
+
+  parser_self = subparsers.add_parser("self-benchmark",
+    help="measure the overhead of the launcher itself using a fake wine")
+  parser_self.add_argument("--config", help="launcher configuration file")
+  parser_self.add_argument("--runs", type=int, default=20, help="number of runs (default: 20)")
+  parser_self.add_argument("--delay", type=float, default=0.0, metavar="SECONDS",
+    help="simulated benchmark duration (default: 0)")
+  parser_self.add_argument("--frametimes", action="store_true",
+    help="include frame time capture and analysis")
+  parser_self.add_argument("--shader-cache", choices=shadercache.SHADER_CACHE_MODES,
+    help="shader cache mode to run with")
+  parser_self.add_argument("--telemetry-interval", type=float, metavar="SECONDS",
+    help="how often to sample telemetry, 0 to disable")
+  parser_self.set_defaults(func=cmd_self_benchmark)
+
+  return parser
+
+def main(argv):
+  # --headless is kept as a shorthand for 'run'
+  if len(argv) > 0 and argv[0] == "--headless":
+    argv = [ "run" ] + argv[1:]
+
+  args = build_parser().parse_args(argv)
+  return args.func(args)
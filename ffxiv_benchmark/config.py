@@ -0,0 +1,134 @@
+from configparser import ConfigParser, Error
+
+from .settings import get_defaults
+
+import tempfile
+import io
+import os
+
+def get_backup_path(file_path):
+  return file_path + ".bak"
+
+# Replaces the file with the given contents such that it is either fully
+# written or not at all, even if the process dies or the machine hangs
+# midway. The previous version of the file is kept as a backup. Returns
+# False if the contents were unchanged and nothing needed to be written.
+def write_file_atomic(file_path, data):
+  try:
+    with open(file_path, "r") as f:
+      if f.read() == data:
+        return False
+  except (OSError, UnicodeDecodeError):
+    pass
+
+  file_dir = os.path.dirname(os.path.abspath(file_path))
+  (fd, tmp_path) = tempfile.mkstemp(dir=file_dir, prefix="." + os.path.basename(file_path) + ".")
+
+  try:
+    with os.fdopen(fd, "w") as f:
+      f.write(data)
+      f.flush()
+      os.fsync(f.fileno())
+
+    # Hard-link the current file as the backup, so that the
+    # backup is replaced atomically as well
+    if os.path.isfile(file_path):
+      backup_tmp_path = tmp_path + ".bak"
+      os.link(file_path, backup_tmp_path)
+      os.replace(backup_tmp_path, get_backup_path(file_path))
+
+    os.replace(tmp_path, file_path)
+  except:
+    if os.path.exists(tmp_path):
+      os.unlink(tmp_path)
+    raise
+
+  dir_fd = os.open(file_dir, os.O_RDONLY)
+
+  try:
+    os.fsync(dir_fd)
+  finally:
+    os.close(dir_fd)
+
+  return True
+
+def write_config(config, file_path):
+  data = io.StringIO()
+  config.write(data)
+  return write_file_atomic(file_path, data.getvalue())
+
+# Reads a config file, falling back to its backup if the file is
+# missing required sections or can't be parsed at all.
+def read_config(config, file_path, required_sections=[ ]):
+  for path in [ file_path, get_backup_path(file_path) ]:
+    candidate = ConfigParser()
+    candidate.optionxform = config.optionxform
+
+    try:
+      if len(candidate.read(path)) == 0:
+        continue
+    except Error:
+      continue
+
+    if len(candidate.sections()) == 0:
+      continue
+
+    if len([ s for s in required_sections if not candidate.has_section(s) ]) > 0:
+      continue
+
+    config.read_dict(candidate)
+    return True
+
+  return False
+
+class FFXIVBenchmarkConfig:
+  def __init__(self, cfg_path=None):
+    self.cfg_path = cfg_path
+
+    if self.cfg_path is None:
+      self.cfg_path = os.getenv("XDG_CONFIG_HOME", os.getenv("HOME") + "/.config") + "/ffxiv_benchmark"
+
+    self.cfg = ConfigParser()
+
+    self.cfg["benchmark"] = {
+      "path"                  : '',
+      "capture_frametimes"    : "False",
+      "runs"                  : "1",
+      "warmup_runs"           : "0",
+      "ci_target"             : "0",
+      "shader_cache"          : "default",
+      "telemetry_interval"    : "1.0",
+      "view_mode"             : "auto" }
+
+    wine_path = ""
+    path_env = os.getenv("PATH")
+
+    if (not path_env is None):
+      for p in path_env.split(":"):
+        probe_path = p + "/wine"
+
+        if os.path.isfile(probe_path):
+          wine_path = probe_path
+          break
+
+    self.cfg['wine'] = {
+      "path"                  : wine_path,
+      "prefix"                : os.getenv("HOME") + "/.wine",
+      "environment"           : "WINEESYNC=1 WINEFSYNC=1 DXVK_LOG_LEVEL=none DXVK_HUD=fps,gpuload",
+      "prefix_mode"           : "direct",
+      "prefix_snapshot"       : "auto",
+      "native_dlls"           : "",
+      "dll_versions"          : "" }
+
+    self.cfg['graphics'] = get_defaults()
+
+    read_config(self.cfg, self.cfg_path)
+    self.save()
+
+  def save(self):
+    write_config(self.cfg, self.cfg_path)
+
+def clone_config(cfg):
+  result = ConfigParser()
+  result.read_dict(cfg)
+  return result
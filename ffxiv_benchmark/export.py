@@ -0,0 +1,340 @@
+from .hostinfo import HOST_INFO_KEYS
+from .presets import get_current
+from .stats import FFXIVSummary
+from . import benchmark
+from . import frametimes
+from . import shadercache
+from . import settings
+from . import telemetry
+
+import json
+import time
+import csv
+
+# Structured run reports for dashboards and other tools. Every run is a
+# flat row made of the run itself, its graphics settings, its metrics
+# such as frame time statistics, and the host it ran on:
+#
+#   id, time, benchmark_path, wine_path, wine_prefix, environment,
+#   res_x, res_y, score, fps, setting.<key>, metric.<name>, host.<key>
+#
+# Rows are written as they come in, so that exporting a large history
+# or a long sweep never needs to hold all of it in memory.
+#
+# Aggregated exports have one row per combination of settings,
+# resolution, wine setup and host instead, with summary statistics of
+# its runs:
+#
+#   runs, first_time, last_time, benchmark_path, wine_path, wine_prefix,
+#   environment, res_x, res_y, score_<stat>, fps_<stat>, setting.<key>,
+#   metric.<name>, host.<key>
+#
+# where metrics are the mean over all runs that have them.
+EXPORT_FORMAT_JSONL = "jsonl"
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMAT_PARQUET = "parquet"
+
+EXPORT_FORMATS = [ EXPORT_FORMAT_JSONL, EXPORT_FORMAT_CSV, EXPORT_FORMAT_PARQUET ]
+
+RUN_COLUMNS = [ "id", "time", "benchmark_path", "wine_path", "wine_prefix", "environment",
+  "res_x", "res_y", "score", "fps" ]
+
+GROUP_COLUMNS = [ "benchmark_path", "wine_path", "wine_prefix", "environment", "res_x", "res_y" ]
+
+SUMMARY_STATS = [ "mean", "stdev", "ci", "min", "max" ]
+
+AGGREGATE_COLUMNS = [ "runs", "first_time", "last_time" ] + GROUP_COLUMNS + \
+  [ m + "_" + s for m in [ "score", "fps" ] for s in SUMMARY_STATS ]
+
+# Parquet files are written in row groups of this many runs
+PARQUET_ROW_GROUP_SIZE = 4096
+
+def is_parquet_available():
+  try:
+    import pyarrow
+    return True
+  except ImportError:
+    return False
+
+def get_format(file_path):
+  for f in EXPORT_FORMATS:
+    if file_path.endswith("." + f):
+      return f
+
+  return None
+
+def get_columns(setting_keys, metric_names, host_keys, run_columns=RUN_COLUMNS):
+  return run_columns + [ "setting." + k for k in setting_keys ] + \
+    [ "metric." + n for n in metric_names ] + [ "host." + k for k in host_keys ]
+
+# Every metric a run of the launcher can have. A warm shader cache run
+# also reports the metrics of its cold run, prefixed with cold_.
+def get_metric_names():
+  names = benchmark.RESULT_METRICS + frametimes.FRAMETIME_STATS + telemetry.get_summary_names()
+  return names + shadercache.get_metric_names() + [ "cold_score", "cold_fps" ] + [ "cold_" + n for n in names ]
+
+# Columns of rows built by build_result_row
+def get_result_columns():
+  return get_columns([ s.key for s in settings.GRAPHICS_SETTINGS ], get_metric_names(), HOST_INFO_KEYS)
+
+def format_time(timestamp):
+  return time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(timestamp))
+
+def build_row(run, settings, metrics, host):
+  row = dict([ (c, run.get(c)) for c in RUN_COLUMNS ])
+  row["time"] = format_time(run["timestamp"])
+
+  row.update([ ("setting." + k, v) for (k, v) in settings.items() ])
+  row.update([ ("metric." + k, float(v)) for (k, v) in metrics.items() ])
+  row.update([ ("host." + k, v) for (k, v) in host.items() ])
+  return row
+
+# Builds a row for a run that is not in the history, such as a run of a
+# sweep with history recording turned off
+def build_result_row(cfg, result, host, run_id=None):
+  if not result.cfg is None:
+    cfg = result.cfg
+
+  run = {
+    "id"              : run_id,
+    "timestamp"       : time.time(),
+    "benchmark_path"  : cfg.get("benchmark", "path"),
+    "wine_path"       : cfg.get("wine", "path"),
+    "wine_prefix"     : cfg.get("wine", "prefix"),
+    "environment"     : cfg.get("wine", "environment"),
+    "res_x"           : cfg.getint("graphics", "display_res_x"),
+    "res_y"           : cfg.getint("graphics", "display_res_y"),
+    "score"           : int(result.score),
+    "fps"             : float(result.fps) }
+
+  return build_row(run, get_current(cfg), result.get_metrics(), host)
+
+# Rows of formats with fixed columns must not carry anything else, so
+# that no metric gets lost silently
+def check_row(columns, row):
+  unknown = [ k for k in row.keys() if not k in columns ]
+
+  if len(unknown) > 0:
+    raise ValueError("Not a column of the export: " + ", ".join(unknown) +
+      ", use JSON Lines to export every metric")
+
+# Removes what a fixed set of columns has no place for, such as result
+# metrics of a newer benchmark version. Returns the removed names.
+def drop_unknown(columns, row):
+  if columns is None:
+    return [ ]
+
+  unknown = [ k for k in row.keys() if not k in columns ]
+
+  for k in unknown:
+    del row[k]
+
+  return unknown
+
+class FFXIVJsonExport:
+  def __init__(self, file_path, columns=None):
+    self.file = open(file_path, "w")
+
+  # Any row can be written
+  def get_columns(self):
+    return None
+
+  def write(self, row):
+    self.file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+  def close(self):
+    self.file.close()
+
+# CSV needs its columns up front. If they are not given, the columns of
+# the first row are used, and later rows must not add any.
+class FFXIVCsvExport:
+  def __init__(self, file_path, columns=None):
+    self.file = open(file_path, "w", newline="")
+    self.columns = None
+    self.writer = None
+
+    if not columns is None:
+      self.start(columns)
+
+  def start(self, columns):
+    self.columns = set(columns)
+    self.writer = csv.DictWriter(self.file, columns)
+    self.writer.writeheader()
+
+  def get_columns(self):
+    return self.columns
+
+  def write(self, row):
+    if self.writer is None:
+      self.start(list(row.keys()))
+
+    check_row(self.columns, row)
+    self.writer.writerow(row)
+
+  def close(self):
+    self.file.close()
+
+# Columnar output through pyarrow, which is optional. Like CSV, the
+# schema is fixed by the given columns or the first row.
+class FFXIVParquetExport:
+  def __init__(self, file_path, columns=None):
+    self.file_path = file_path
+    self.schema = None
+    self.writer = None
+    self.rows = [ ]
+
+    if not columns is None:
+      self.start(columns)
+
+  def start(self, columns):
+    import pyarrow
+    import pyarrow.parquet
+
+    def column_type(c):
+      if c in [ "id", "res_x", "res_y", "score", "runs" ]:
+        return pyarrow.int64()
+      elif c == "fps" or c.startswith("metric.") or c.startswith("score_") or c.startswith("fps_"):
+        return pyarrow.float64()
+      return pyarrow.string()
+
+    self.schema = pyarrow.schema([ (c, column_type(c)) for c in columns ])
+    self.writer = pyarrow.parquet.ParquetWriter(self.file_path, self.schema)
+
+  def get_columns(self):
+    return self.schema.names if not self.schema is None else None
+
+  def write(self, row):
+    if self.writer is None:
+      self.start(list(row.keys()))
+
+    check_row(self.schema.names, row)
+    self.rows.append(row)
+
+    if len(self.rows) >= PARQUET_ROW_GROUP_SIZE:
+      self.flush()
+
+  def flush(self):
+    import pyarrow
+
+    if len(self.rows) == 0:
+      return
+
+    columns = dict([ (c, [ r.get(c) for r in self.rows ]) for c in self.schema.names ])
+    self.writer.write_table(pyarrow.Table.from_pydict(columns, schema=self.schema))
+    self.rows = [ ]
+
+  def close(self):
+    if self.writer is None:
+      return
+
+    self.flush()
+    self.writer.close()
+
+def open_export(file_path, export_format=None, columns=None):
+  if export_format is None:
+    export_format = get_format(file_path)
+
+  if export_format == EXPORT_FORMAT_JSONL:
+    return FFXIVJsonExport(file_path, columns)
+  elif export_format == EXPORT_FORMAT_CSV:
+    return FFXIVCsvExport(file_path, columns)
+  elif export_format == EXPORT_FORMAT_PARQUET:
+    if not is_parquet_available():
+      raise ValueError("Parquet export requires pyarrow.")
+    return FFXIVParquetExport(file_path, columns)
+
+  raise ValueError("Unknown export format for " + file_path + ", use one of: " + ", ".join(EXPORT_FORMATS))
+
+# Writes runs from the history to a file, as selected by the same
+# filters as FFXIVResultHistory.query. Returns the number of runs.
+def export_history(history, file_path, export_format=None, settings={ }, resolution=None, limit=None):
+  (setting_keys, metric_names, host_keys) = history.get_keys()
+  columns = get_columns(setting_keys, metric_names, sorted(set(host_keys + HOST_INFO_KEYS)))
+
+  output = open_export(file_path, export_format, columns)
+  count = 0
+
+  try:
+    for run in history.iterate(settings, resolution, False, limit):
+      output.write(build_row(dict(run), history.get_settings(run["id"]),
+        history.get_metrics(run["id"]), history.get_host(run["id"])))
+      count += 1
+  finally:
+    output.close()
+
+  return count
+
+# Summary of the runs of one combination
+class FFXIVRunGroup:
+  def __init__(self, run, settings, host):
+    self.run = dict([ (c, run[c]) for c in GROUP_COLUMNS ])
+    self.settings = settings
+    self.host = host
+    self.first = run["timestamp"]
+    self.last = run["timestamp"]
+    self.scores = [ ]
+    self.fps = [ ]
+    self.metrics = { }
+
+  def add(self, run, metrics):
+    self.first = min(self.first, run["timestamp"])
+    self.last = max(self.last, run["timestamp"])
+    self.scores.append(float(run["score"]))
+    self.fps.append(float(run["fps"]))
+
+    for (k, v) in metrics.items():
+      self.metrics.setdefault(k, [ ]).append(float(v))
+
+  def build_row(self):
+    row = {
+      "runs"        : len(self.scores),
+      "first_time"  : format_time(self.first),
+      "last_time"   : format_time(self.last) }
+
+    row.update(self.run)
+
+    for (name, values) in [ ("score", self.scores), ("fps", self.fps) ]:
+      summary = FFXIVSummary(values)
+      row[name + "_mean"] = summary.mean
+      row[name + "_stdev"] = summary.stdev
+      row[name + "_ci"] = summary.ci
+      row[name + "_min"] = min(values)
+      row[name + "_max"] = max(values)
+
+    row.update([ ("setting." + k, v) for (k, v) in self.settings.items() ])
+    row.update([ ("metric." + k, sum(v) / len(v)) for (k, v) in self.metrics.items() ])
+    row.update([ ("host." + k, v) for (k, v) in self.host.items() ])
+    return row
+
+# Writes one row per combination of settings, resolution, wine setup and
+# host found in the history, such as every combination of a sweep that
+# was run several times. Takes the same filters as export_history, and
+# returns the number of combinations and of runs.
+def export_aggregate(history, file_path, export_format=None, settings={ }, resolution=None, limit=None):
+  (setting_keys, metric_names, host_keys) = history.get_keys()
+  columns = get_columns(setting_keys, metric_names, sorted(set(host_keys + HOST_INFO_KEYS)), AGGREGATE_COLUMNS)
+
+  groups = { }
+  count = 0
+
+  for run in history.iterate(settings, resolution, False, limit):
+    run_settings = history.get_settings(run["id"])
+    host = history.get_host(run["id"])
+    key = (tuple([ run[c] for c in GROUP_COLUMNS ]),
+      tuple(sorted(run_settings.items())), tuple(sorted(host.items())))
+
+    if not key in groups:
+      groups[key] = FFXIVRunGroup(run, run_settings, host)
+
+    groups[key].add(run, history.get_metrics(run["id"]))
+    count += 1
+
+  output = open_export(file_path, export_format, columns)
+
+  try:
+    for group in groups.values():
+      output.write(group.build_row())
+  finally:
+    output.close()
+
+  return (len(groups), count)
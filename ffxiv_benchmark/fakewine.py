@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+from configparser import ConfigParser
+
+import random
+import time
+import sys
+import os
+
+# Stands in for wine when no GPU or game install is available, e.g. on
+# CI machines or to measure the overhead of the launcher itself. It is
+# invoked exactly like wine, i.e. with the benchmark executable followed
+# by the SYS.* arguments, and writes a made-up score into the benchmark
+# config file in the working directory.
+#
+# The behaviour can be tuned through the environment:
+#
+#   FAKE_WINE_DELAY   seconds to wait before writing results (default: 0)
+#   FAKE_WINE_FPS     average frame rate at 1080p and lowest settings (default: 100)
+#   FAKE_WINE_NOISE   relative run-to-run noise of the score (default: 0.01)
+#   FAKE_WINE_FAIL    exit with this code without writing results
+#   FAKE_WINE_FRAMES  number of frames written to a MangoHud log (default: 1000)
+#   FAKE_WINE_BOOT    seconds the first boot of a new prefix takes (default: 0)
+#
+# 'wineboot' sets up the prefix given by WINEPREFIX, which also happens
+# before the first run in a prefix that was never booted.
+#
+# A matching fake benchmark directory can be created with:
+#
+#   python3 -m ffxiv_benchmark.fakewine --create-benchmark DIR
+
+# The benchmark reports a score of roughly this many points per average fps
+SCORE_PER_FPS = 140.0
+
+# Frame rate the simulated CPU can't go beyond, regardless of settings
+CPU_FPS_LIMIT = 240.0
+
+# Frames rendered on a cold shader cache take this much longer
+SHADER_COMPILE_FACTOR = 1.3
+
+def parse_args(args):
+  result = { }
+
+  for a in args:
+    v = a.split("=", 1)
+
+    if len(v) == 2 and v[0].startswith("SYS."):
+      result[v[0][4:]] = v[1]
+
+  return result
+
+def get_int(options, key, default):
+  try:
+    return int(options.get(key, default))
+  except ValueError:
+    return default
+
+# A crude cost model, just good enough to let sweeps and comparisons
+# produce results that depend on the settings in a plausible way.
+def compute_fps(options):
+  width = get_int(options, "ScreenWidth", 1920)
+  height = get_int(options, "ScreenHeight", 1080)
+  scale = get_int(options, "GraphicsRezoScale", 100)
+
+  pixels = width * height * (scale / 100.0) ** 2
+  gpu_fps = float(os.getenv("FAKE_WINE_FPS", "100")) * (1920 * 1080) / max(1.0, pixels)
+
+  # Most options count down towards lower quality, so the sum of all
+  # option values shrinks as quality goes up.
+  quality = sum([ get_int(options, k, 0) for k in options.keys() if k.endswith("_DX11") ])
+  gpu_fps /= 1.0 + 1.5 / (1.0 + quality)
+
+  return min(gpu_fps, CPU_FPS_LIMIT)
+
+def write_frametimes(fps, frame_count):
+  config = os.getenv("MANGOHUD_CONFIG", "")
+  output_dir = None
+
+  for option in config.split(","):
+    v = option.split("=", 1)
+
+    if len(v) == 2 and v[0] == "output_folder":
+      output_dir = v[1]
+
+  if output_dir is None:
+    return
+
+  with open(os.path.join(output_dir, "ffxiv_dx11_" + time.strftime("%Y-%m-%d_%H-%M-%S") + ".csv"), "w") as f:
+    f.write("os,cpu,gpu,ram,kernel,driver,cpuscheduler\n")
+    f.write("Linux,Fake CPU,Fake GPU,16GB,,,\n")
+    f.write("fps,frametime,cpu_load,gpu_load,cpu_temp,gpu_temp,gpu_core_clock,gpu_mem_clock,gpu_vram_used,gpu_power,ram_used,swap_used,process_rss,elapsed\n")
+
+    frametime = 1000.0 / fps
+    elapsed = 0.0
+
+    for i in range(frame_count):
+      t = frametime * random.gauss(1.0, 0.05)
+
+      # Every now and then, a frame takes much longer
+      if random.random() < 0.002:
+        t *= 4.0
+
+      t = max(0.1, t)
+      elapsed += t
+      f.write("%.1f,%.3f,0,0,0,0,0,0,0,0,0,0,0,%d\n" % (1000.0 / t, t, int(elapsed * 1000000)))
+
+# Pretends to compile shaders into the DXVK state cache. Returns whether
+# the cache already existed.
+def update_shader_cache():
+  cache_dir = os.getenv("DXVK_STATE_CACHE_PATH")
+
+  if cache_dir is None:
+    return True
+
+  cache_file = os.path.join(cache_dir, "ffxiv_dx11.dxvk-cache")
+
+  if os.path.isfile(cache_file):
+    return True
+
+  with open(cache_file, "wb") as f:
+    f.write(bytes(65536))
+
+  return False
+
+def write_results(file_path, score, fps):
+  config = ConfigParser()
+  config.optionxform=str
+  config.read(file_path)
+
+  if not config.has_section("SCORE"):
+    config.add_section("SCORE")
+
+  config.set("SCORE", "SCORE", str(score))
+  config.set("SCORE", "SCORE_FPSAVERAGE", "%.6f" % fps)
+  config.set("SCORE", "SCORE_FPSMINIMUM", "%.6f" % (fps * 0.4))
+  config.set("SCORE", "SCORE_LOADTIME", "%.3f" % random.uniform(8.0, 12.0))
+
+  with open(file_path, "w") as f:
+    config.write(f)
+
+# Creates the registry and Wine's own graphics DLLs, keeping any DLLs
+# that were installed into the prefix before
+def boot_prefix(wine_prefix):
+  if wine_prefix is None:
+    return 1
+
+  system_dir = os.path.join(wine_prefix, "drive_c", "windows", "system32")
+
+  if os.path.isfile(os.path.join(wine_prefix, "system.reg")):
+    return 0
+
+  time.sleep(float(os.getenv("FAKE_WINE_BOOT", "0")))
+  os.makedirs(system_dir, exist_ok=True)
+
+  for dll in [ "d3d9", "d3d11", "d3d12", "dxgi" ]:
+    path = os.path.join(system_dir, dll + ".dll")
+
+    if not os.path.exists(path):
+      with open(path, "wb") as f:
+        f.write(b"MZ\0Wine builtin DLL\0")
+
+  for reg in [ "system.reg", "user.reg", "userdef.reg" ]:
+    with open(os.path.join(wine_prefix, reg), "a") as f:
+      f.write("WINE REGISTRY Version 2\n")
+
+  return 0
+
+def create_benchmark(benchmark_dir):
+  os.makedirs(os.path.join(benchmark_dir, "game", "sqpack", "ex5"), exist_ok=True)
+
+  with open(os.path.join(benchmark_dir, "game", "ffxiv_dx11.exe"), "wb") as f:
+    f.write(b"MZ")
+
+  config = ConfigParser()
+  config.optionxform=str
+  config.add_section("EVN")
+  config.set("EVN", "LAUNGUAGE", "1")
+  config.set("EVN", "SPEC_DX11", "8")
+  config.set("EVN", "SCREENWIDTH_DX11", "1920")
+  config.set("EVN", "SCREENHEIGHT_DX11", "1080")
+
+  with open(os.path.join(benchmark_dir, "ffxivbenchmarklauncher.ini"), "w") as f:
+    config.write(f)
+
+def main(argv):
+  if len(argv) == 2 and argv[0] == "--create-benchmark":
+    create_benchmark(argv[1])
+    return 0
+
+  if len(argv) == 1 and argv[0] == "--version":
+    print("wine-fake")
+    return 0
+
+  # Sets up a prefix the way a first boot would, slowly
+  if len(argv) >= 1 and argv[0] == "wineboot":
+    return boot_prefix(os.getenv("WINEPREFIX"))
+
+  if len(argv) < 1:
+    print("usage: fakewine.py EXE [SYS.Option=value ...]", file=sys.stderr)
+    print("       fakewine.py --create-benchmark DIR", file=sys.stderr)
+    return 1
+
+  options = parse_args(argv[1:])
+  delay = float(os.getenv("FAKE_WINE_DELAY", "0"))
+
+  if not os.getenv("WINEPREFIX") is None:
+    boot_prefix(os.getenv("WINEPREFIX"))
+
+  if delay > 0.0:
+    time.sleep(delay)
+
+  fail = os.getenv("FAKE_WINE_FAIL")
+
+  if not fail is None:
+    return int(fail)
+
+  # Character creation never writes a score
+  if "Bench.CharacterCreation=1" in argv:
+    return 0
+
+  fps = compute_fps(options)
+
+  if not update_shader_cache():
+    fps /= SHADER_COMPILE_FACTOR
+
+  fps *= random.gauss(1.0, float(os.getenv("FAKE_WINE_NOISE", "0.01")))
+  fps = max(1.0, fps)
+
+  if os.getenv("MANGOHUD") == "1":
+    write_frametimes(fps, int(os.getenv("FAKE_WINE_FRAMES", "1000")))
+
+  write_results("ffxivbenchmarklauncher.ini", int(fps * SCORE_PER_FPS), fps)
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main(sys.argv[1:]))
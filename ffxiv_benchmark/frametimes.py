@@ -0,0 +1,139 @@
+import io
+import tempfile
+import shutil
+import os
+
+# Number of preceding frames a frame time is compared against when
+# looking for stutter, and how much slower a frame has to be to count.
+STUTTER_WINDOW = 30
+STUTTER_FACTOR = 2.0
+
+# Figures compute_stats returns
+FRAMETIME_STATS = [ "frames", "fps_avg", "fps_low_1", "fps_low_01",
+  "frametime_p50", "frametime_p95", "frametime_p99", "stutters" ]
+
+def is_available():
+  try:
+    import numpy
+    return True
+  except ImportError:
+    return False
+
+# Captures per-frame timings through MangoHud's CSV logging. MangoHud
+# is a Vulkan layer, so this works for anything running on DXVK.
+class FFXIVFrametimeCapture:
+  def __init__(self):
+    self.output_dir = tempfile.mkdtemp(prefix="ffxiv_benchmark_frametimes_")
+
+  def update_environment(self, environment):
+    mangohud_config = "output_folder=" + self.output_dir + ",autostart_log=1,log_interval=0,no_display"
+
+    existing = environment.get("MANGOHUD_CONFIG", os.getenv("MANGOHUD_CONFIG", ""))
+
+    if existing != "":
+      mangohud_config = existing + "," + mangohud_config
+
+    environment["MANGOHUD"] = "1"
+    environment["MANGOHUD_CONFIG"] = mangohud_config
+
+  def get_log_file(self):
+    result = None
+
+    for f in os.listdir(self.output_dir):
+      if not f.endswith(".csv") or f.endswith("_summary.csv"):
+        continue
+
+      path = os.path.join(self.output_dir, f)
+
+      # The benchmark may spawn more than one Vulkan device over its
+      # lifetime, the largest log is the one that ran the benchmark.
+      if result is None or os.path.getsize(path) > os.path.getsize(result):
+        result = path
+
+    return result
+
+  def collect(self):
+    log_file = self.get_log_file()
+
+    if log_file is None:
+      return None
+
+    return compute_stats(load_frametimes(log_file))
+
+  def cleanup(self):
+    shutil.rmtree(self.output_dir, ignore_errors=True)
+
+# Returns the frame time column of a MangoHud log as a float array in
+# milliseconds. Logs start with a few lines of system information, the
+# actual samples follow a header line naming the columns.
+def load_frametimes(file_path):
+  import numpy as np
+
+  with open(file_path, "r") as f:
+    column = None
+
+    while column is None:
+      line = f.readline()
+
+      if line == "":
+        return np.empty(0)
+
+      names = line.strip().split(",")
+
+      if "frametime" in names:
+        column = names.index("frametime")
+
+    data = f.read()
+
+  # MangoHud may be stopped in the middle of writing a line, so a
+  # last line without a newline is incomplete and gets dropped
+  if not data.endswith("\n"):
+    data = data[:data.rfind("\n") + 1]
+
+  if data.strip() == "":
+    return np.empty(0)
+
+  # loadtxt parses the samples in C without building per-sample
+  # Python objects
+  return np.loadtxt(io.StringIO(data), delimiter=",", usecols=(column,), dtype=np.float64, ndmin=1)
+
+def compute_stats(frametimes):
+  import numpy as np
+
+  count = len(frametimes)
+
+  if count == 0:
+    return None
+
+  # The x% low figures are the average frame rate of the slowest x%
+  # of frames, which only needs a partial sort of the samples.
+  def low_fps(fraction):
+    n = max(1, int(count * fraction))
+    slowest = np.partition(frametimes, count - n)[count - n:]
+    return 1000.0 / slowest.mean()
+
+  (p50, p95, p99) = np.percentile(frametimes, [ 50, 95, 99 ])
+
+  stutters = 0
+
+  if count > STUTTER_WINDOW:
+    sums = np.cumsum(frametimes)
+    window_avg = (sums[STUTTER_WINDOW - 1:-1] - np.concatenate(([ 0.0 ], sums[:-STUTTER_WINDOW - 1]))) / STUTTER_WINDOW
+    stutters = int(np.count_nonzero(frametimes[STUTTER_WINDOW:] > window_avg * STUTTER_FACTOR))
+
+  return {
+    "frames"                : count,
+    "fps_avg"               : 1000.0 / frametimes.mean(),
+    "fps_low_1"             : low_fps(0.01),
+    "fps_low_01"            : low_fps(0.001),
+    "frametime_p50"         : p50,
+    "frametime_p95"         : p95,
+    "frametime_p99"         : p99,
+    "stutters"              : stutters }
+
+def format_stats(stats):
+  return ("1%% low: %.1f fps, 0.1%% low: %.1f fps\n"
+    "Frame time p50/p95/p99: %.2f / %.2f / %.2f ms, %d stutters" % (
+    stats["fps_low_1"], stats["fps_low_01"],
+    stats["frametime_p50"], stats["frametime_p95"], stats["frametime_p99"],
+    stats["stutters"]))
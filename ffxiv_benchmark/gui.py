@@ -0,0 +1,913 @@
+from PyQt6.QtWidgets import (QApplication, QButtonGroup, QCheckBox, QComboBox, QDialog,
+  QDoubleSpinBox, QFileDialog, QGridLayout, QGroupBox, QHBoxLayout, QLabel, QLayout, QLineEdit,
+  QMessageBox, QPushButton, QRadioButton, QSlider, QSpinBox, QTabWidget, QVBoxLayout, QWidget)
+from PyQt6.QtCore import QEvent, QObject, QPointF, QRectF, QTimer, Qt, pyqtSignal
+from PyQt6.QtGui import QPainter, QPainterPath, QPalette, QPen
+
+from .config import FFXIVBenchmarkConfig, clone_config
+from .frametimes import format_stats
+from .stats import FFXIVRunSeries
+from .telemetry import TELEMETRY_CHANNELS, TELEMETRY_UNITS
+from . import shadercache
+from . import settings
+from . import presets
+from . import benchmark
+
+import subprocess
+import threading
+import time
+import copy
+import sys
+import os
+
+# Runs the benchmark through FFXIVBenchmarkRunner on a worker thread, so
+# that the window stays responsive during long runs. All signals are
+# delivered on the GUI thread.
+class FFXIVBenchmarkProcess(QObject):
+  stateChanged = pyqtSignal(str)
+  finished = pyqtSignal(object)
+  failed = pyqtSignal(str)
+  message = pyqtSignal(str)
+
+  # Emitted from the worker thread
+  runStarted = pyqtSignal()
+  runDone = pyqtSignal(object, object, object)
+
+  def __init__(self, parent=None):
+    super(FFXIVBenchmarkProcess, self).__init__(parent)
+    self.thread = None
+    self.lock = threading.Lock()
+    self.process = None
+    self.wine_binary_path = None
+    self.environment = None
+    self.cancelled = False
+
+    self.runStarted.connect(self.on_started)
+    self.runDone.connect(self.on_done)
+
+  def is_running(self):
+    return not self.thread is None
+
+  def start(self, cfg, cmdline):
+    if self.is_running():
+      return
+
+    self.cancelled = False
+
+    runner = benchmark.FFXIVBenchmarkRunner(cfg, self.execute, self.message.emit)
+
+    self.thread = threading.Thread(target=self.run, args=(runner, cmdline), daemon=True)
+    self.stateChanged.emit("starting")
+    self.thread.start()
+
+  def run(self, runner, cmdline):
+    try:
+      (returncode, result) = runner.run(cmdline)
+      self.runDone.emit(returncode, result, None)
+    except Exception as e:
+      self.runDone.emit(None, None, str(e))
+
+  # Same as benchmark.run_benchmark, but keeps track of the process
+  # so that it can be cancelled
+  def execute(self, wine_binary_path, benchmark_dir, environment, args, telemetry_interval=0.0):
+    def on_start(process):
+      with self.lock:
+        self.process = process
+        self.wine_binary_path = wine_binary_path
+        self.environment = environment
+        cancelled = self.cancelled
+
+      if cancelled:
+        self.kill()
+
+      self.runStarted.emit()
+
+    try:
+      return benchmark.run_benchmark(wine_binary_path, benchmark_dir,
+        environment, args, telemetry_interval, on_start=on_start)
+    finally:
+      with self.lock:
+        self.process = None
+
+  def cancel(self):
+    if not self.is_running():
+      return
+
+    with self.lock:
+      self.cancelled = True
+
+    self.kill()
+
+  # Killing the wine process alone leaves the actual benchmark
+  # running, so take down everything inside the prefix as well.
+  def kill(self):
+    with self.lock:
+      process = self.process
+      wine_binary_path = self.wine_binary_path
+      environment = self.environment
+
+    if process is None:
+      return
+
+    wineserver_path = os.path.join(os.path.dirname(wine_binary_path), "wineserver")
+
+    if not os.path.isfile(wineserver_path):
+      wineserver_path = "wineserver"
+
+    process_env = copy.deepcopy(os.environ)
+    process_env.update(environment)
+
+    try:
+      subprocess.run([ wineserver_path, "-k" ], env=process_env, timeout=5)
+    except:
+      pass
+
+    process.kill()
+
+  # Waits for the current run to clean up after itself
+  def wait(self):
+    if not self.thread is None:
+      self.thread.join()
+
+  def on_started(self):
+    self.stateChanged.emit("running")
+
+  def on_done(self, returncode, result, error):
+    self.wait()
+    self.thread = None
+
+    if self.cancelled:
+      self.stateChanged.emit("cancelled")
+    elif not error is None:
+      self.stateChanged.emit("failed")
+      self.failed.emit(error)
+    elif returncode < 0:
+      self.stateChanged.emit("failed")
+      self.failed.emit("Benchmark process crashed.")
+    elif returncode != 0:
+      self.stateChanged.emit("failed")
+      self.failed.emit("Command execution failed with return code " + str(returncode) + ".")
+    else:
+      self.stateChanged.emit("finished")
+      self.finished.emit(result)
+
+# Draws each telemetry channel in its own strip, scaled to the
+# channel's own range.
+class FFXIVTelemetryPlot(QWidget):
+  def __init__(self, channels, parent=None):
+    super(FFXIVTelemetryPlot, self).__init__(parent)
+    self.channels = [ (c, channels[c]) for c in TELEMETRY_CHANNELS[1:]
+      if c in channels and len(channels[c]) > 1 and max(channels[c]) > 0.0 ]
+    self.setMinimumSize(600, 80 * max(1, len(self.channels)))
+
+  def paintEvent(self, event):
+    painter = QPainter(self)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+    if len(self.channels) == 0:
+      painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "No telemetry recorded.")
+      return
+
+    strip_height = self.height() / len(self.channels)
+    label_width = 160
+
+    for (i, (name, values)) in enumerate(self.channels):
+      top = i * strip_height
+      lo = min(values)
+      hi = max(values)
+      span = hi - lo if hi > lo else 1.0
+
+      painter.setPen(self.palette().color(QPalette.ColorRole.WindowText))
+      painter.drawText(QRectF(4, top + 4, label_width - 8, strip_height - 8),
+        Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+        "%s\n%.1f - %.1f %s" % (name, lo, hi, TELEMETRY_UNITS[name]))
+
+      plot_width = self.width() - label_width - 4
+      plot_height = strip_height - 8
+      step = plot_width / (len(values) - 1)
+
+      path = QPainterPath()
+
+      for (j, v) in enumerate(values):
+        point = QPointF(label_width + j * step, top + 4 + plot_height * (1.0 - (v - lo) / span))
+
+        if j == 0:
+          path.moveTo(point)
+        else:
+          path.lineTo(point)
+
+      painter.setPen(QPen(self.palette().color(QPalette.ColorRole.Highlight), 1.5))
+      painter.drawPath(path)
+
+# Reports how long startup took up to the first time the window is
+# painted, split into imports, construction of the launcher and the
+# first paint. Enabled with --startup-timing.
+class FFXIVStartupTimer(QObject):
+  def __init__(self, start_time):
+    super(FFXIVStartupTimer, self).__init__()
+    self.start_time = start_time
+    self.last_time = start_time
+    self.phases = [ ]
+
+  def elapsed(self, since):
+    return 1000.0 * (time.perf_counter() - since)
+
+  def mark(self, name):
+    now = time.perf_counter()
+    self.phases.append((name, 1000.0 * (now - self.last_time)))
+    self.last_time = now
+
+  def watch(self, widget):
+    widget.installEventFilter(self)
+
+  def eventFilter(self, obj, event):
+    if event.type() == QEvent.Type.Paint and len(self.phases) > 0 and self.phases[-1][0] != "first paint":
+      self.mark("first paint")
+      obj.removeEventFilter(self)
+
+      self.report("Startup", self.elapsed(self.start_time), ", ".join([ "%s %.1f ms" % p for p in self.phases ]))
+
+    return False
+
+  def report(self, what, total, details=None):
+    print("%s: %.1f ms" % (what, total) + (" (" + details + ")" if not details is None else ""), file=sys.stderr)
+
+class FFXIVBenchmarkLauncher(QApplication):
+  def __init__(self, args, startup_timer=None):
+    super(FFXIVBenchmarkLauncher, self).__init__(args)
+    self.startup_timer = startup_timer
+    self.config = FFXIVBenchmarkConfig()
+
+    self.text_benchmark_directory = QLineEdit()
+
+    self.btn_benchmark_directory = QPushButton("Find")
+    self.btn_benchmark_directory.clicked.connect(self.find_benchmark)
+
+    layout_grid_launch_benchmark = QGridLayout()
+    layout_grid_launch_benchmark.addWidget(QLabel("Directory:"), 0, 0)
+    layout_grid_launch_benchmark.addWidget(self.text_benchmark_directory, 0, 1)
+    layout_grid_launch_benchmark.addWidget(self.btn_benchmark_directory, 0, 2)
+
+    self.chk_capture_frametimes = QCheckBox("Capture frame times (requires MangoHud)")
+    layout_grid_launch_benchmark.addWidget(self.chk_capture_frametimes, 1, 0, 1, 3)
+
+    self.cb_shader_cache = QComboBox()
+    self.cb_shader_cache.addItem("System default")
+    self.cb_shader_cache.addItem("Cold (empty cache)")
+    self.cb_shader_cache.addItem("Warm (pre-run once)")
+
+    layout_grid_launch_benchmark.addWidget(QLabel("Shader cache:"), 2, 0)
+    layout_grid_launch_benchmark.addWidget(self.cb_shader_cache, 2, 1, 1, 2)
+
+    group_launch_benchmark = QGroupBox("Benchmark")
+    group_launch_benchmark.setLayout(layout_grid_launch_benchmark)
+
+    self.text_wine_executable_path = QLineEdit()
+    self.text_wine_prefix_path = QLineEdit()
+    self.text_wine_environment = QLineEdit()
+
+    self.btn_wine_executable_path = QPushButton("Find")
+    self.btn_wine_executable_path.clicked.connect(self.find_wine)
+
+    self.btn_wine_prefix_path = QPushButton("Find")
+    self.btn_wine_prefix_path.clicked.connect(self.find_wine_prefix)
+
+    layout_grid_launch_wine = QGridLayout()
+    layout_grid_launch_wine.addWidget(QLabel("Executable:"), 0, 0)
+    layout_grid_launch_wine.addWidget(self.text_wine_executable_path, 0, 1)
+    layout_grid_launch_wine.addWidget(self.btn_wine_executable_path, 0, 2)
+    layout_grid_launch_wine.addWidget(QLabel("Prefix:"), 1, 0)
+    layout_grid_launch_wine.addWidget(self.text_wine_prefix_path, 1, 1)
+    layout_grid_launch_wine.addWidget(self.btn_wine_prefix_path, 1, 2)
+    layout_grid_launch_wine.addWidget(QLabel("Environment:"), 2, 0)
+    layout_grid_launch_wine.addWidget(self.text_wine_environment, 2, 1, 1, 2)
+
+    group_launch_wine = QGroupBox("Wine")
+    group_launch_wine.setLayout(layout_grid_launch_wine)
+
+    self.spin_runs = QSpinBox()
+    self.spin_runs.setRange(1, 100)
+
+    self.spin_warmup_runs = QSpinBox()
+    self.spin_warmup_runs.setRange(0, 10)
+
+    self.spin_ci_target = QDoubleSpinBox()
+    self.spin_ci_target.setRange(0.0, 50.0)
+    self.spin_ci_target.setSingleStep(0.5)
+    self.spin_ci_target.setSuffix("%")
+    self.spin_ci_target.setSpecialValueText("Disabled")
+
+    layout_grid_launch_runs = QGridLayout()
+    layout_grid_launch_runs.addWidget(QLabel("Runs:"), 0, 0)
+    layout_grid_launch_runs.addWidget(self.spin_runs, 0, 1)
+    layout_grid_launch_runs.addWidget(QLabel("Warm-up runs:"), 1, 0)
+    layout_grid_launch_runs.addWidget(self.spin_warmup_runs, 1, 1)
+    layout_grid_launch_runs.addWidget(QLabel("Stop early at 95% CI within:"), 2, 0)
+    layout_grid_launch_runs.addWidget(self.spin_ci_target, 2, 1)
+    layout_grid_launch_runs.setColumnStretch(0, 1)
+
+    group_launch_runs = QGroupBox("Repetitions")
+    group_launch_runs.setLayout(layout_grid_launch_runs)
+
+    self.lbl_score = QLabel()
+    self.lbl_score.setStyleSheet("font-size: 40pt; font-weight: bold")
+    self.lbl_score.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+    self.lbl_fps = QLabel()
+    self.lbl_fps.setStyleSheet("font-weight: bold")
+    self.lbl_fps.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+    self.lbl_frametimes = QLabel()
+    self.lbl_frametimes.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+    self.lbl_statistics = QLabel()
+    self.lbl_statistics.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+    layout_vb_launch_score = QVBoxLayout()
+    layout_vb_launch_score.addWidget(self.lbl_score)
+    layout_vb_launch_score.addWidget(self.lbl_fps)
+    layout_vb_launch_score.addWidget(self.lbl_frametimes)
+    layout_vb_launch_score.addWidget(self.lbl_statistics)
+
+    self.btn_telemetry = QPushButton("Telemetry")
+    self.btn_telemetry.clicked.connect(self.show_telemetry)
+
+    layout_hb_launch_score_buttons = QHBoxLayout()
+    layout_hb_launch_score_buttons.addStretch()
+    layout_hb_launch_score_buttons.addWidget(self.btn_telemetry)
+    layout_vb_launch_score.addLayout(layout_hb_launch_score_buttons)
+
+    self.group_launch_score = QGroupBox("Score")
+    self.group_launch_score.setLayout(layout_vb_launch_score)
+
+    self.layout_vb_launch = QVBoxLayout()
+    self.layout_vb_launch.addWidget(group_launch_benchmark)
+    self.layout_vb_launch.addWidget(group_launch_wine)
+    self.layout_vb_launch.addWidget(group_launch_runs)
+    self.layout_vb_launch.addStretch()
+
+    self.page_launch = QWidget()
+    self.page_launch.setLayout(self.layout_vb_launch)
+
+    # The graphics page has by far the most widgets, and is only
+    # built once it is first shown
+    self.page_graphics = QWidget()
+    self.graphics_widgets = None
+
+    self.tab_widget = QTabWidget()
+    self.tab_widget.addTab(self.page_launch, "Launch")
+    self.tab_widget.addTab(self.page_graphics, "Graphics")
+    self.tab_widget.currentChanged.connect(self.on_tab_changed)
+
+    self.btn_launch_char_creation = QPushButton("Character creation")
+    self.btn_launch_char_creation.clicked.connect(self.launch_character_creation)
+
+    self.btn_launch_benchmark = QPushButton("Start benchmark")
+    self.btn_launch_benchmark.clicked.connect(self.launch_benchmark)
+
+    self.btn_cancel = QPushButton("Cancel")
+    self.btn_cancel.setEnabled(False)
+    self.btn_cancel.clicked.connect(self.cancel)
+
+    self.lbl_status = QLabel()
+    self.lbl_run = QLabel()
+
+    layout_hb_buttons = QHBoxLayout()
+    layout_hb_buttons.addWidget(self.lbl_status)
+    layout_hb_buttons.addWidget(self.lbl_run)
+    layout_hb_buttons.addStretch()
+    layout_hb_buttons.addWidget(self.btn_launch_char_creation)
+    layout_hb_buttons.addWidget(self.btn_launch_benchmark)
+    layout_hb_buttons.addWidget(self.btn_cancel)
+
+    layout_vb_window = QVBoxLayout()
+    layout_vb_window.addWidget(self.tab_widget)
+    layout_vb_window.addLayout(layout_hb_buttons)
+
+    self.window = QWidget()
+    self.window.setWindowTitle("FFXIV Benchmark Launcher")
+    self.window.setLayout(layout_vb_window)
+
+    self.run_cfg = None
+    self.run_cmdline = None
+    self.run_record = False
+    self.last_telemetry = None
+    self.series = None
+
+    self.process = FFXIVBenchmarkProcess(self)
+    self.process.stateChanged.connect(self.update_state)
+    self.process.finished.connect(self.update_score)
+    self.process.failed.connect(self.on_launch_failed)
+    self.process.message.connect(self.lbl_status.setText)
+
+    self.applyConfig(self.config.cfg)
+    self.aboutToQuit.connect(self.on_quit)
+
+    if not self.startup_timer is None:
+      self.startup_timer.mark("construction")
+      self.startup_timer.watch(self.window)
+
+    self.window.show()
+
+  def build_graphics_page(self):
+    start_time = time.perf_counter()
+
+    # A broken user preset file should not take the built-in presets down
+    # with it, so fall back to those
+    try:
+      self.preset_library = presets.get_library()
+    except ValueError as e:
+      self.preset_library = presets.FFXIVPresetLibrary()
+      self.lbl_status.setText(str(e))
+
+    layout_hb_graphics_preset = QHBoxLayout()
+    self.preset_buttons = [ ]
+
+    for label in presets.BUILTIN_PRESET_LABELS:
+      btn = QPushButton(label)
+      btn.clicked.connect(self.apply_preset)
+      layout_hb_graphics_preset.addWidget(btn)
+      self.preset_buttons.append(btn)
+
+    # User presets are listed in a combo box, since there may be many
+    user_presets = self.preset_library.get_user_names()
+
+    if len(user_presets) > 0:
+      self.cb_user_preset = QComboBox()
+      self.cb_user_preset.addItems(user_presets)
+
+      btn_user_preset = QPushButton("Apply")
+      btn_user_preset.clicked.connect(self.apply_user_preset)
+
+      layout_hb_graphics_preset.addWidget(self.cb_user_preset)
+      layout_hb_graphics_preset.addWidget(btn_user_preset)
+
+    group_graphics_preset = QGroupBox("Apply preset")
+    group_graphics_preset.setLayout(layout_hb_graphics_preset)
+
+    # Graphics options are generated from the settings table, each
+    # group of options ends up in a box of its own.
+    self.graphics_widgets = { }
+    graphics_groups = { }
+
+    for (group, title) in settings.SETTING_GROUPS:
+      layout_grid = QGridLayout()
+      row = 0
+      column = 0
+
+      for s in settings.GRAPHICS_SETTINGS:
+        if s.group != group:
+          continue
+
+        (control, item) = self.create_setting_widget(s)
+        self.graphics_widgets[s.key] = control
+
+        # Check boxes go side by side, two per row
+        if s.kind == settings.SETTING_BOOL:
+          layout_grid.addWidget(item, row, column)
+          column += 1
+
+          if column == 2:
+            row += 1
+            column = 0
+
+          continue
+
+        if column != 0:
+          row += 1
+          column = 0
+
+        layout_grid.addWidget(QLabel(s.label + ":"), row, 0)
+
+        if isinstance(item, QLayout):
+          layout_grid.addLayout(item, row, 1)
+        else:
+          layout_grid.addWidget(item, row, 1)
+
+        row += 1
+
+      layout_grid.setColumnStretch(1, 1)
+
+      graphics_groups[group] = QGroupBox(title)
+      graphics_groups[group].setLayout(layout_grid)
+
+    self.graphics_widgets["display_mode"].currentIndexChanged.connect(self.update_resolution)
+
+    layout_vb_graphics_1 = QVBoxLayout()
+    layout_vb_graphics_1.addWidget(graphics_groups["display"])
+    layout_vb_graphics_1.addWidget(graphics_groups["general"])
+    layout_vb_graphics_1.addStretch()
+
+    layout_vb_graphics_2 = QVBoxLayout()
+    layout_vb_graphics_2.addWidget(graphics_groups["shadows"])
+    layout_vb_graphics_2.addWidget(graphics_groups["effects"])
+    layout_vb_graphics_2.addWidget(graphics_groups["movement"])
+    layout_vb_graphics_2.addStretch()
+
+    layout_hb_graphics = QHBoxLayout()
+    layout_hb_graphics.addLayout(layout_vb_graphics_1)
+    layout_hb_graphics.addLayout(layout_vb_graphics_2)
+    layout_hb_graphics.setStretch(0, 1)
+    layout_hb_graphics.setStretch(1, 1)
+
+    layout_vb_graphics = QVBoxLayout()
+    layout_vb_graphics.addWidget(group_graphics_preset)
+    layout_vb_graphics.addLayout(layout_hb_graphics)
+
+    self.page_graphics.setLayout(layout_vb_graphics)
+
+    for s in settings.GRAPHICS_SETTINGS:
+      self.set_setting_value(s, s.get(self.config.cfg))
+
+    if not self.startup_timer is None:
+      self.startup_timer.report("Graphics page built", self.startup_timer.elapsed(start_time))
+
+  def on_tab_changed(self, index):
+    if self.tab_widget.widget(index) is self.page_graphics and self.graphics_widgets is None:
+      self.build_graphics_page()
+
+  def applyConfig(self, cfg):
+    self.text_benchmark_directory.setText(cfg.get("benchmark", "path"))
+    self.chk_capture_frametimes.setChecked(cfg.getboolean("benchmark", "capture_frametimes"))
+    self.spin_runs.setValue(cfg.getint("benchmark", "runs"))
+
+    shader_cache = cfg.get("benchmark", "shader_cache")
+
+    if shader_cache in shadercache.SHADER_CACHE_MODES:
+      self.cb_shader_cache.setCurrentIndex(shadercache.SHADER_CACHE_MODES.index(shader_cache))
+
+    self.spin_warmup_runs.setValue(cfg.getint("benchmark", "warmup_runs"))
+    self.spin_ci_target.setValue(cfg.getfloat("benchmark", "ci_target"))
+    self.text_wine_executable_path.setText(cfg.get("wine", "path"))
+    self.text_wine_prefix_path.setText(cfg.get("wine", "prefix"))
+    self.text_wine_environment.setText(cfg.get("wine", "environment"))
+
+    if not self.graphics_widgets is None:
+      for s in settings.GRAPHICS_SETTINGS:
+        self.set_setting_value(s, s.get(cfg))
+
+  def saveConfig(self, cfg):
+    cfg.set("benchmark", "path", self.text_benchmark_directory.text())
+    cfg.set("benchmark", "capture_frametimes", str(self.chk_capture_frametimes.isChecked()))
+    cfg.set("benchmark", "runs", str(self.spin_runs.value()))
+    cfg.set("benchmark", "shader_cache", shadercache.SHADER_CACHE_MODES[self.cb_shader_cache.currentIndex()])
+    cfg.set("benchmark", "warmup_runs", str(self.spin_warmup_runs.value()))
+    cfg.set("benchmark", "ci_target", str(self.spin_ci_target.value()))
+    cfg.set("wine", "path", self.text_wine_executable_path.text())
+    cfg.set("wine", "prefix", self.text_wine_prefix_path.text())
+    cfg.set("wine", "environment", str(self.text_wine_environment.text()))
+
+    # Graphics options stay as they are until their page was opened
+    if not self.graphics_widgets is None:
+      for s in settings.GRAPHICS_SETTINGS:
+        cfg.set("graphics", s.key, str(self.get_setting_value(s)))
+
+  def create_setting_widget(self, s):
+    if s.kind == settings.SETTING_BOOL:
+      widget = QCheckBox(s.label)
+      return (widget, widget)
+
+    if s.widget == "radio":
+      group = QButtonGroup()
+      layout = QHBoxLayout()
+
+      for (i, c) in enumerate(s.choices):
+        button = QRadioButton(c)
+        group.addButton(button, i)
+        layout.addWidget(button)
+
+      return (group, layout)
+
+    if s.widget == "slider":
+      slider = QSlider()
+      slider.setMinimum(s.minimum)
+      slider.setMaximum(s.maximum)
+      slider.setValue(s.maximum)
+      slider.setOrientation(Qt.Orientation.Horizontal)
+      slider.setTracking(True)
+
+      label = QLabel(str(s.maximum) + "%")
+      slider.valueChanged.connect(lambda value: label.setText(str(value) + "%"))
+
+      layout = QHBoxLayout()
+      layout.addWidget(slider)
+      layout.addWidget(label)
+      return (slider, layout)
+
+    if s.kind == settings.SETTING_CHOICE:
+      widget = QComboBox()
+
+      for c in s.choices:
+        widget.addItem(c)
+
+      return (widget, widget)
+
+    widget = QLineEdit()
+    widget.setFixedWidth(60)
+    return (widget, widget)
+
+  def set_setting_value(self, s, value):
+    widget = self.graphics_widgets[s.key]
+
+    if s.kind == settings.SETTING_BOOL:
+      widget.setChecked(value)
+    elif s.widget == "radio":
+      button = widget.button(value)
+
+      if not button is None:
+        button.setChecked(True)
+    elif s.widget == "slider":
+      widget.setValue(value)
+    elif s.kind == settings.SETTING_CHOICE:
+      widget.setCurrentIndex(value)
+    else:
+      widget.setText(str(value))
+
+  def get_setting_value(self, s):
+    widget = self.graphics_widgets[s.key]
+
+    if s.kind == settings.SETTING_BOOL:
+      return widget.isChecked()
+    elif s.widget == "radio":
+      return widget.checkedId()
+    elif s.widget == "slider":
+      return widget.value()
+    elif s.kind == settings.SETTING_CHOICE:
+      return widget.currentIndex()
+    else:
+      return widget.text()
+
+  def set_preset(self, name):
+    for (k, v) in self.preset_library.get(name).items():
+      s = settings.get_setting(k)
+      self.set_setting_value(s, s.parse(v))
+
+  def apply_preset(self):
+    self.set_preset(presets.BUILTIN_PRESET_NAMES[self.preset_buttons.index(self.window.sender())])
+
+  def apply_user_preset(self):
+    try:
+      self.set_preset(self.cb_user_preset.currentText())
+    except ValueError as e:
+      self.lbl_status.setText(str(e))
+
+  def update_resolution(self, index):
+    self.graphics_widgets["display_res_x"].setEnabled(index != 2)
+    self.graphics_widgets["display_res_y"].setEnabled(index != 2)
+
+  def find_benchmark(self):
+    path = QFileDialog.getExistingDirectory(self.window, "Select benchmark directory",
+      self.text_benchmark_directory.text())
+
+    if path == "":
+      return
+
+    benchmark_exe_path = benchmark.get_benchmark_exe_path(path)
+
+    if not os.path.isfile(benchmark_exe_path):
+      self.show_error(QMessageBox.Icon.Critical, "Benchmark executable (" + benchmark_exe_path + ") not found.")
+      return
+
+    if not benchmark.is_supported_benchmark(path):
+      self.show_error(QMessageBox.Icon.Warning, "Unsupported version of the FFXIV benchmark detected. Graphics options will not work as expected.")
+
+    self.text_benchmark_directory.setText(path)
+
+  def find_wine(self):
+    (path, _) = QFileDialog.getOpenFileName(self.window, "Select Wine executable",
+      self.text_wine_executable_path.text())
+
+    if path != "":
+      self.text_wine_executable_path.setText(path)
+
+  def find_wine_prefix(self):
+    path = QFileDialog.getExistingDirectory(self.window, "Select Wine prefix",
+      self.text_wine_prefix_path.text())
+
+    if path != "":
+      self.text_wine_prefix_path.setText(path)
+
+  def launch_benchmark(self):
+    self.series = FFXIVRunSeries(self.spin_runs.value(),
+      self.spin_warmup_runs.value(), self.spin_ci_target.value() / 100.0)
+    cmdline = self.build_cmdline(False)
+
+    if not cmdline is None:
+      self.launch(cmdline, True)
+
+  def launch_character_creation(self):
+    cmdline = self.build_cmdline(True)
+
+    if cmdline is None:
+      return
+
+    cmdline.append("Bench.CharacterCreation=1")
+    self.series = None
+    self.launch(cmdline, False)
+
+  def launch(self, cmdline, record):
+    if self.process.is_running():
+      return
+
+    # Snapshot the settings now, they may change while the benchmark
+    # runs. The benchmark has to be told the actual window size.
+    cfg = clone_config(self.config.cfg)
+    (width, height) = self.get_resolution()
+
+    cfg.set("graphics", "display_res_x", width)
+    cfg.set("graphics", "display_res_y", height)
+
+    # Only benchmark runs are measured
+    if not record:
+      cfg.set("benchmark", "capture_frametimes", "False")
+      cfg.set("benchmark", "shader_cache", shadercache.SHADER_CACHE_DEFAULT)
+      cfg.set("benchmark", "telemetry_interval", "0")
+
+    error = benchmark.check_config(cfg)
+
+    if not error is None:
+      self.show_error(QMessageBox.Icon.Critical, error)
+      return
+
+    if not os.path.isdir(cfg.get("wine", "prefix")):
+      msg = QMessageBox()
+      msg.setIcon(QMessageBox.Icon.Question)
+      msg.setText("The given wine prefix does not exist. Continue anyway?")
+      msg.setWindowTitle("Warning")
+      msg.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+
+      if msg.exec() == QMessageBox.StandardButton.No:
+        return
+
+    self.run_cfg = cfg
+    self.run_cmdline = cmdline
+    self.run_record = record
+
+    self.start_run()
+
+  def start_run(self):
+    if not self.series is None:
+      self.lbl_run.setText(self.series.describe_next())
+
+    self.process.start(self.run_cfg, self.run_cmdline)
+
+  def cancel(self):
+    self.process.cancel()
+
+  def set_running(self, running):
+    self.btn_launch_benchmark.setEnabled(not running)
+    self.btn_launch_char_creation.setEnabled(not running)
+    self.btn_cancel.setEnabled(running)
+
+    if not running:
+      self.lbl_run.setText("")
+
+  def update_state(self, state):
+    # Once a run has finished, update_score decides whether
+    # to start the next run of the series or to stop.
+    if state == "starting" or state == "running":
+      self.set_running(True)
+    elif state != "finished":
+      self.series = None
+      self.set_running(False)
+
+    if state == "starting":
+      self.lbl_status.setText("Starting benchmark...")
+    elif state == "running":
+      self.lbl_status.setText("Benchmark running")
+    elif state == "finished":
+      self.lbl_status.setText("Benchmark finished")
+    elif state == "cancelled":
+      self.lbl_status.setText("Benchmark cancelled")
+    else:
+      self.lbl_status.setText("Benchmark failed")
+
+  def on_launch_failed(self, message):
+    self.show_error(QMessageBox.Icon.Warning, message)
+
+  def update_score(self, result):
+    if not self.run_record:
+      self.set_running(False)
+      return
+
+    # Missing results are common, e.g. when the benchmark window is
+    # closed early, so they are reported in the status line only
+    if result is None:
+      self.lbl_status.setText("Benchmark finished, no results found")
+      self.series = None
+      self.set_running(False)
+      return
+
+    warmup = self.series.is_warmup()
+    self.series.add(result.score, result.fps)
+
+    if not warmup:
+      self.last_telemetry = result.telemetry
+      self.record_run(result)
+      self.show_score(result)
+
+    if self.series.is_done():
+      self.series = None
+      self.set_running(False)
+    else:
+      QTimer.singleShot(0, self.start_run)
+
+  def show_score(self, result):
+    self.layout_vb_launch.removeWidget(self.group_launch_score)
+
+    metrics = result.get_metrics()
+    details = [ ]
+
+    if not result.frametimes is None:
+      details.append(format_stats(result.frametimes))
+
+    if not self.run_cfg.get("benchmark", "shader_cache") == shadercache.SHADER_CACHE_DEFAULT:
+      details.append(shadercache.format_metrics(metrics))
+
+    text = benchmark.format_result_metrics(metrics)
+
+    if text != "":
+      details.append(text)
+
+    self.btn_telemetry.setVisible(not self.last_telemetry is None)
+    self.lbl_frametimes.setVisible(len(details) > 0)
+    self.lbl_frametimes.setText("\n".join(details))
+    self.lbl_statistics.setVisible(len(self.series.scores) > 1)
+
+    if len(self.series.scores) > 1:
+      score_summary = self.series.score_summary()
+      fps_summary = self.series.fps_summary()
+
+      self.lbl_score.setText("%.0f" % score_summary.mean)
+      self.lbl_fps.setText("%.1f fps avg." % fps_summary.mean)
+      self.lbl_statistics.setText("Score: " + score_summary.format(0) + "\nFPS: " + fps_summary.format(1))
+    else:
+      self.lbl_score.setText(str(result.score))
+      self.lbl_fps.setText(str(result.fps) + " fps avg.")
+
+    self.layout_vb_launch.insertWidget(3, self.group_launch_score)
+
+  def record_run(self, result):
+    from .history import FFXIVResultHistory
+
+    try:
+      history = FFXIVResultHistory()
+      history.add_result(self.run_cfg, result)
+      history.close()
+    except Exception as e:
+      self.show_error(QMessageBox.Icon.Warning, "Failed to record results: " + str(e))
+
+  def show_telemetry(self):
+    if self.last_telemetry is None:
+      return
+
+    channels = dict([ (c, self.last_telemetry.get(c)) for c in TELEMETRY_CHANNELS ])
+
+    layout_vb_dialog = QVBoxLayout()
+    layout_vb_dialog.addWidget(FFXIVTelemetryPlot(channels))
+
+    dialog = QDialog(self.window)
+    dialog.setWindowTitle("Telemetry")
+    dialog.setLayout(layout_vb_dialog)
+    dialog.exec()
+
+  # Reads the saved config rather than the widgets, which may not exist
+  # if the graphics page was never opened
+  def get_resolution(self):
+    cfg = self.config.cfg
+    width = cfg.get("graphics", "display_res_x")
+    height = cfg.get("graphics", "display_res_y")
+
+    if cfg.getint("graphics", "display_mode") == 2:
+      screen = self.window.screen()
+
+      if not screen is None:
+        width = str(screen.geometry().width())
+        height = str(screen.geometry().height())
+
+    return (width, height)
+
+  # Returns None if a setting is invalid, e.g. an empty resolution
+  def build_cmdline(self, vsync):
+    self.saveConfig(self.config.cfg)
+    error = settings.validate_config(self.config.cfg)
+
+    if not error is None:
+      self.show_error(QMessageBox.Icon.Critical, error)
+      return None
+
+    return benchmark.build_cmdline(self.config.cfg, vsync)
+
+  def show_error(self, button, message):
+    msg = QMessageBox()
+    msg.setIcon(button)
+    msg.setText(message)
+    msg.setWindowTitle("Error")
+    msg.setStandardButtons(QMessageBox.StandardButton.Ok)
+    msg.exec()
+
+  def on_quit(self):
+    self.process.cancel()
+    self.process.wait()
+    self.saveConfig(self.config.cfg)
+    self.config.save()
@@ -0,0 +1,267 @@
+from array import array
+
+from .telemetry import TELEMETRY_CHANNELS
+from .hostinfo import get_host_info
+
+import sqlite3
+import time
+import os
+
+def get_default_history_path():
+  return os.getenv("XDG_DATA_HOME", os.getenv("HOME") + "/.local/share") + "/ffxiv_benchmark/results.db"
+
+# Graphics settings are stored as key/value rows rather than columns
+# so that adding an option to the launcher needs no schema migration.
+# The (key, value, run_id) index keeps lookups like "all runs with
+# ssao=0" cheap even with many thousands of runs.
+class FFXIVResultHistory:
+  def __init__(self, db_path=None):
+    self.db_path = db_path
+
+    if self.db_path is None:
+      self.db_path = get_default_history_path()
+
+    db_dir = os.path.dirname(self.db_path)
+
+    if db_dir != "":
+      os.makedirs(db_dir, exist_ok=True)
+
+    self.conn = sqlite3.connect(self.db_path)
+    self.conn.row_factory = sqlite3.Row
+    self.conn.execute("PRAGMA foreign_keys = ON")
+    self.create_tables()
+
+  def create_tables(self):
+    with self.conn:
+      self.conn.executescript("""
+        CREATE TABLE IF NOT EXISTS runs (
+          id              INTEGER PRIMARY KEY,
+          timestamp       REAL NOT NULL,
+          benchmark_path  TEXT NOT NULL,
+          wine_path       TEXT NOT NULL,
+          wine_prefix     TEXT NOT NULL,
+          environment     TEXT NOT NULL,
+          res_x           INTEGER NOT NULL,
+          res_y           INTEGER NOT NULL,
+          score           INTEGER NOT NULL,
+          fps             REAL NOT NULL);
+
+        CREATE TABLE IF NOT EXISTS settings (
+          run_id          INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+          key             TEXT NOT NULL,
+          value           TEXT NOT NULL,
+          PRIMARY KEY (run_id, key)) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS metrics (
+          run_id          INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+          name            TEXT NOT NULL,
+          value           REAL NOT NULL,
+          PRIMARY KEY (run_id, name)) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS telemetry (
+          run_id          INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+          channel         TEXT NOT NULL,
+          interval        REAL NOT NULL,
+          data            BLOB NOT NULL,
+          PRIMARY KEY (run_id, channel)) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS host (
+          run_id          INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+          key             TEXT NOT NULL,
+          value           TEXT NOT NULL,
+          PRIMARY KEY (run_id, key)) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS files (
+          run_id          INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+          name            TEXT NOT NULL,
+          data            BLOB NOT NULL,
+          PRIMARY KEY (run_id, name)) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS baselines (
+          name            TEXT NOT NULL,
+          run_id          INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+          timestamp       REAL NOT NULL,
+          PRIMARY KEY (name, run_id)) WITHOUT ROWID;
+
+        CREATE INDEX IF NOT EXISTS runs_timestamp ON runs(timestamp);
+        CREATE INDEX IF NOT EXISTS runs_resolution ON runs(res_x, res_y, score);
+        CREATE INDEX IF NOT EXISTS runs_score ON runs(score);
+        CREATE INDEX IF NOT EXISTS settings_value ON settings(key, value, run_id);
+      """)
+
+  # Metrics are any additional figures recorded for the run,
+  # such as frame time statistics.
+  def add_run(self, cfg, res_x, res_y, score, fps, metrics=None, timestamp=None):
+    with self.conn:
+      return self.insert_run(cfg, res_x, res_y, score, fps, metrics, timestamp)
+
+  # The insert_* methods leave committing to the caller, so that
+  # everything belonging to a run can be written in one transaction
+  def insert_run(self, cfg, res_x, res_y, score, fps, metrics=None, timestamp=None):
+    if timestamp is None:
+      timestamp = time.time()
+
+    cursor = self.conn.execute("""
+      INSERT INTO runs (timestamp, benchmark_path, wine_path, wine_prefix,
+        environment, res_x, res_y, score, fps)
+      VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""", (timestamp,
+      cfg.get("benchmark", "path"), cfg.get("wine", "path"),
+      cfg.get("wine", "prefix"), cfg.get("wine", "environment"),
+      int(res_x), int(res_y), int(score), float(fps)))
+
+    run_id = cursor.lastrowid
+
+    self.conn.executemany("INSERT INTO settings (run_id, key, value) VALUES (?, ?, ?)",
+      [ (run_id, k, v) for (k, v) in cfg.items("graphics") ])
+
+    if not metrics is None:
+      self.conn.executemany("INSERT INTO metrics (run_id, name, value) VALUES (?, ?, ?)",
+        [ (run_id, k, float(v)) for (k, v) in metrics.items() ])
+
+    return run_id
+
+  # Stores a run as returned by FFXIVBenchmarkRunner.run, either
+  # completely or not at all
+  def add_result(self, cfg, result):
+    if not result.cfg is None:
+      cfg = result.cfg
+
+    host = result.host if not result.host is None else get_host_info(cfg)
+
+    with self.conn:
+      run_id = self.insert_run(cfg, cfg.get("graphics", "display_res_x"),
+        cfg.get("graphics", "display_res_y"), result.score, result.fps, result.get_metrics())
+
+      if not result.telemetry is None:
+        self.insert_telemetry(run_id, result.telemetry)
+
+      if len(result.files) > 0:
+        self.insert_files(run_id, result.files)
+
+      self.insert_host(run_id, host)
+
+    return run_id
+
+  def add_host(self, run_id, host):
+    with self.conn:
+      self.insert_host(run_id, host)
+
+  def insert_host(self, run_id, host):
+    self.conn.executemany("INSERT INTO host (run_id, key, value) VALUES (?, ?, ?)",
+      [ (run_id, k, v) for (k, v) in host.items() ])
+
+  def get_host(self, run_id):
+    rows = self.conn.execute("SELECT key, value FROM host WHERE run_id = ?", (run_id,))
+    return dict([ (row["key"], row["value"]) for row in rows ])
+
+  # Files the benchmark wrote during the run, such as its config
+  # file with the results, are kept as they were.
+  def add_files(self, run_id, files):
+    with self.conn:
+      self.insert_files(run_id, files)
+
+  def insert_files(self, run_id, files):
+    self.conn.executemany("INSERT INTO files (run_id, name, data) VALUES (?, ?, ?)",
+      [ (run_id, k, v) for (k, v) in files.items() ])
+
+  def get_files(self, run_id):
+    rows = self.conn.execute("SELECT name, data FROM files WHERE run_id = ?", (run_id,))
+    return dict([ (row["name"], row["data"]) for row in rows ])
+
+  # Telemetry channels are stored as raw arrays of 32-bit floats
+  def add_telemetry(self, run_id, buffer):
+    with self.conn:
+      self.insert_telemetry(run_id, buffer)
+
+  def insert_telemetry(self, run_id, buffer):
+    self.conn.executemany("INSERT INTO telemetry (run_id, channel, interval, data) VALUES (?, ?, ?, ?)",
+      [ (run_id, c, buffer.interval, buffer.get(c).tobytes()) for c in TELEMETRY_CHANNELS ])
+
+  def get_telemetry(self, run_id):
+    result = { }
+
+    for row in self.conn.execute("SELECT channel, data FROM telemetry WHERE run_id = ?", (run_id,)):
+      values = array("f")
+      values.frombytes(row["data"])
+      result[row["channel"]] = values
+
+    return result
+
+  # Returns runs matching the given resolution and graphics settings,
+  # either the most recent ones or the ones with the highest score.
+  def query(self, settings={ }, resolution=None, best=False, limit=None):
+    return self.iterate(settings, resolution, best, limit).fetchall()
+
+  # Same as query, but returns a cursor so that rows can be
+  # processed one at a time
+  def iterate(self, settings={ }, resolution=None, best=False, limit=None):
+    sql = "SELECT * FROM runs"
+    conditions = [ ]
+    params = [ ]
+
+    if not resolution is None:
+      conditions.append("res_x = ? AND res_y = ?")
+      params += [ int(resolution[0]), int(resolution[1]) ]
+
+    for (k, v) in settings.items():
+      conditions.append("id IN (SELECT run_id FROM settings WHERE key = ? AND value = ?)")
+      params += [ k, str(v) ]
+
+    if len(conditions) > 0:
+      sql += " WHERE " + " AND ".join(conditions)
+
+    if best:
+      sql += " ORDER BY score DESC, timestamp DESC"
+    else:
+      sql += " ORDER BY timestamp DESC"
+
+    if not limit is None:
+      sql += " LIMIT ?"
+      params.append(int(limit))
+
+    return self.conn.execute(sql, params)
+
+  def get_settings(self, run_id):
+    rows = self.conn.execute("SELECT key, value FROM settings WHERE run_id = ?", (run_id,))
+    return dict([ (row["key"], row["value"]) for row in rows ])
+
+  def get_metrics(self, run_id):
+    rows = self.conn.execute("SELECT name, value FROM metrics WHERE run_id = ?", (run_id,))
+    return dict([ (row["name"], row["value"]) for row in rows ])
+
+  def get_run(self, run_id):
+    return self.conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+
+  # Baselines are named sets of runs that later runs are compared
+  # against. Saving a baseline replaces any previous one of that name.
+  def set_baseline(self, name, run_ids, timestamp=None):
+    if timestamp is None:
+      timestamp = time.time()
+
+    with self.conn:
+      self.conn.execute("DELETE FROM baselines WHERE name = ?", (name,))
+      self.conn.executemany("INSERT INTO baselines (name, run_id, timestamp) VALUES (?, ?, ?)",
+        [ (name, int(r), timestamp) for r in run_ids ])
+
+  def get_baseline(self, name):
+    rows = self.conn.execute("SELECT run_id FROM baselines WHERE name = ? ORDER BY run_id", (name,))
+    return [ row["run_id"] for row in rows ]
+
+  def get_baselines(self):
+    return self.conn.execute("""
+      SELECT name, COUNT(*) AS runs, MAX(timestamp) AS timestamp
+      FROM baselines GROUP BY name ORDER BY name""").fetchall()
+
+  def delete_baseline(self, name):
+    with self.conn:
+      return self.conn.execute("DELETE FROM baselines WHERE name = ?", (name,)).rowcount > 0
+
+  # Returns all setting, metric and host keys in use, sorted
+  def get_keys(self):
+    return [ [ row[0] for row in self.conn.execute(sql) ] for sql in [
+      "SELECT DISTINCT key FROM settings ORDER BY key",
+      "SELECT DISTINCT name FROM metrics ORDER BY name",
+      "SELECT DISTINCT key FROM host ORDER BY key" ] ]
+
+  def close(self):
+    self.conn.close()
@@ -0,0 +1,215 @@
+from .config import write_file_atomic
+from .benchmark import parse_environment, get_benchmark_version, get_benchmark_version_file, get_mtime
+from .prefixes import get_system_dll_path, get_dll_version
+
+import subprocess
+import threading
+import shutil
+import glob
+import json
+import os
+
+# Host and software fingerprint recorded with every run, so that results
+# from different machines, drivers or wine builds can be told apart:
+#
+#   os                  distribution, from /etc/os-release
+#   kernel              kernel release
+#   cpu                 CPU model name
+#   cpu_governor        cpufreq governor of the first CPU
+#   memory              installed memory, in MiB
+#   gpu                 GPU name as reported by Vulkan, or OpenGL as a fallback
+#   driver              GPU driver name and version, e.g. the Mesa version
+#   vulkan_icd          Vulkan driver manifests that are installed or selected
+#   wine                output of 'wine --version'
+#   dxvk                version of d3d11.dll in the prefix
+#   vkd3d               version of d3d12.dll in the prefix
+#   benchmark_version   game version of the benchmark
+HOST_INFO_KEYS = [ "os", "kernel", "cpu", "cpu_governor", "memory", "gpu", "driver",
+  "vulkan_icd", "wine", "dxvk", "vkd3d", "benchmark_version" ]
+
+# External tools get this long to answer, in seconds
+COMMAND_TIMEOUT = 10
+
+# Where Vulkan loaders look for driver manifests
+VULKAN_ICD_DIRS = [ "/usr/share/vulkan/icd.d", "/usr/local/share/vulkan/icd.d", "/etc/vulkan/icd.d" ]
+
+def get_default_cache_path():
+  return os.getenv("XDG_CACHE_HOME", os.getenv("HOME") + "/.cache") + "/ffxiv_benchmark/hostinfo.json"
+
+def run_command(args, environment=None):
+  try:
+    return subprocess.run(args, capture_output=True, text=True, env=environment,
+      timeout=COMMAND_TIMEOUT).stdout
+  except (OSError, subprocess.SubprocessError):
+    return ""
+
+def read_file(file_path):
+  try:
+    with open(file_path) as f:
+      return f.read()
+  except (OSError, UnicodeDecodeError):
+    return ""
+
+# Returns the value of the first 'key = value' or 'key: value' line
+# whose key matches, or None
+def find_value(text, key, separator):
+  for line in text.splitlines():
+    v = line.split(separator, 1)
+
+    if len(v) == 2 and v[0].strip() == key:
+      return v[1].strip()
+
+  return None
+
+def get_os_name():
+  return (find_value(read_file("/etc/os-release"), "PRETTY_NAME", "=") or "").strip("\"")
+
+def get_cpu_name():
+  return find_value(read_file("/proc/cpuinfo"), "model name", ":") or ""
+
+def get_cpu_governor():
+  return read_file("/sys/devices/system/cpu/cpu0/cpufreq/scaling_governor").strip()
+
+def get_memory_size():
+  v = (find_value(read_file("/proc/meminfo"), "MemTotal", ":") or "").split()
+
+  if len(v) == 0 or not v[0].isdigit():
+    return ""
+
+  return str(int(v[0]) // 1024)
+
+# Driver manifests selected through the environment take precedence
+# over the installed ones
+def get_vulkan_icd_files(environment):
+  for var in [ "VK_DRIVER_FILES", "VK_ICD_FILENAMES" ]:
+    if environment.get(var, "") != "":
+      return environment[var].split(":")
+
+  result = [ ]
+
+  for d in VULKAN_ICD_DIRS:
+    result += sorted(glob.glob(os.path.join(d, "*.json")))
+
+  return result
+
+# Returns the name and driver version of the GPU, preferring Vulkan since
+# that is what DXVK runs on. Only the first device is reported, so the
+# environment is passed along in order to honour device selection.
+def get_gpu_info(environment):
+  text = run_command([ "vulkaninfo", "--summary" ], environment)
+  name = find_value(text, "deviceName", "=")
+
+  if not name is None:
+    driver = " ".join([ v for v in [ find_value(text, "driverName", "="),
+      find_value(text, "driverInfo", "=") ] if not v is None ])
+    return (name, driver)
+
+  text = run_command([ "glxinfo", "-B" ], environment)
+  name = find_value(text, "OpenGL renderer string", ":")
+
+  if not name is None:
+    return (name, find_value(text, "OpenGL version string", ":") or "")
+
+  return ("", "")
+
+def get_wine_version(wine_path):
+  return run_command([ wine_path, "--version" ]).strip()
+
+# Remembers the results of probes that run external tools or read large
+# files. Every result is stored with the mtimes of the files it depends
+# on, and probed again once any of them changes. The cache is kept on
+# disk so that repeated invocations of the launcher benefit as well.
+class FFXIVProbeCache:
+  def __init__(self, file_path=None):
+    self.file_path = file_path
+    self.entries = { }
+    self.lock = threading.Lock()
+
+    if self.file_path is None:
+      self.file_path = get_default_cache_path()
+
+    try:
+      self.entries = json.loads(read_file(self.file_path))
+    except ValueError:
+      pass
+
+  def get(self, name, key, files, probe):
+    stamp = [ get_mtime(f) for f in files ]
+    entry_key = name + ":" + json.dumps(key)
+
+    with self.lock:
+      entry = self.entries.get(entry_key)
+
+      if not entry is None and entry["stamp"] == stamp:
+        return entry["value"]
+
+    value = probe()
+
+    with self.lock:
+      self.entries[entry_key] = { "stamp" : stamp, "value" : value }
+      self.save()
+
+    return value
+
+  def save(self):
+    try:
+      os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+      write_file_atomic(self.file_path, json.dumps(self.entries, indent=1, sort_keys=True))
+    except OSError:
+      pass
+
+probe_cache = None
+probe_cache_lock = threading.Lock()
+
+def get_probe_cache():
+  global probe_cache
+
+  with probe_cache_lock:
+    if probe_cache is None:
+      probe_cache = FFXIVProbeCache()
+
+    return probe_cache
+
+# Collects the fingerprint for runs with the given config. Cheap values
+# are read every time, since e.g. the governor may change between runs,
+# while the GPU, wine, DLL and benchmark probes are cached.
+def get_host_info(cfg):
+  cache = get_probe_cache()
+
+  # The wine binary may be given by name only
+  wine_path = shutil.which(cfg.get("wine", "path")) or cfg.get("wine", "path")
+  wine_prefix = cfg.get("wine", "prefix")
+  wine_environment = cfg.get("wine", "environment")
+  benchmark_dir = cfg.get("benchmark", "path")
+
+  environment = dict(os.environ)
+  environment.update(parse_environment(wine_environment))
+
+  icd_files = get_vulkan_icd_files(environment)
+
+  # The environment may select a different GPU or driver
+  (gpu, driver) = cache.get("gpu", wine_environment, icd_files,
+    lambda: list(get_gpu_info(environment)))
+
+  dlls = dict([ (n, get_system_dll_path(wine_prefix, n + ".dll")) for n in [ "d3d11", "d3d12" ] ])
+
+  return {
+    "os"                : get_os_name(),
+    "kernel"            : os.uname().release,
+    "cpu"               : get_cpu_name(),
+    "cpu_governor"      : get_cpu_governor(),
+    "memory"            : get_memory_size(),
+    "gpu"               : gpu,
+    "driver"            : driver,
+    "vulkan_icd"        : " ".join([ os.path.basename(f) for f in icd_files ]),
+    "wine"              : cache.get("wine", wine_path, [ wine_path ],
+                            lambda: get_wine_version(wine_path)),
+    "dxvk"              : cache.get("dll", dlls["d3d11"], [ dlls["d3d11"] ],
+                            lambda: get_dll_version(dlls["d3d11"])),
+    "vkd3d"             : cache.get("dll", dlls["d3d12"], [ dlls["d3d12"] ],
+                            lambda: get_dll_version(dlls["d3d12"])),
+    "benchmark_version" : cache.get("benchmark", benchmark_dir, [ get_benchmark_version_file(benchmark_dir),
+                            benchmark_dir + "/game/sqpack" ], lambda: get_benchmark_version(benchmark_dir)) }
+
+def format_host_info(host):
+  return "\n".join([ "%-18s %s" % (k + ":", host.get(k, "")) for k in HOST_INFO_KEYS ])
@@ -0,0 +1,84 @@
+from .optimizer import FIXED_OPTIONS, FFXIVQualityModel
+from .stats import FFXIVSummary, welch_t_test
+from .config import clone_config
+from .scheduler import run_configs
+from . import settings
+
+# Attributes the cost of a preset to its individual options. Starting
+# from the preset, every option is changed on its own and benchmarked
+# against the unchanged preset:
+#
+#  - options above their lowest level are turned all the way down, which
+#    answers "what do I gain by turning this off"
+#  - options already at their lowest level are turned all the way up,
+#    which answers "what would it cost to turn this on"
+#
+# Either way, the cost of an option is the frame rate of its low quality
+# setting minus that of its high quality setting.
+class FFXIVImpact:
+  def __init__(self, key, base_value, value, upgrade, base, variant):
+    self.key = key
+    self.base_value = base_value
+    self.value = value
+    self.upgrade = upgrade
+
+    base_mean = FFXIVSummary(base).mean
+
+    # Positive if the higher quality setting is slower
+    self.cost = (FFXIVSummary(variant).mean - base_mean) * (-1.0 if upgrade else 1.0)
+    self.relative_cost = self.cost / base_mean if base_mean != 0.0 else 0.0
+    (self.t, self.p) = welch_t_test(variant, base)
+
+# The preset is given by the values of every graphics option, so that
+# presets which only set some of them are filled in by the caller.
+class FFXIVImpactAnalysis:
+  def __init__(self, preset, keys=None):
+    self.model = FFXIVQualityModel()
+    self.base_values = dict([ (k, v) for (k, v) in preset.items() if not k in FIXED_OPTIONS ])
+    self.variants = [ ]
+
+    for (k, levels) in self.model.options:
+      if not keys is None and not k in keys:
+        continue
+
+      if self.model.get_level(self.base_values, k) < len(levels) - 1:
+        self.variants.append((k, levels[-1], False))
+      else:
+        self.variants.append((k, levels[0], True))
+
+  def make_config(self, cfg, key=None, value=None):
+    result = clone_config(cfg)
+
+    for (k, v) in self.base_values.items():
+      result.set("graphics", k, v)
+
+    if not key is None:
+      result.set("graphics", key, value)
+
+    return result
+
+  # Runs the preset and every variant 'repeats' times, interleaved, and
+  # returns the impact of every option sorted by cost, highest first.
+  def run(self, cfg, repeats, log, history=None, slots=None, metric="fps"):
+    configs = [ self.make_config(cfg) ] + [ self.make_config(cfg, k, v) for (k, v, u) in self.variants ]
+    names = [ "base" ] + [ k + "=" + v for (k, v, u) in self.variants ]
+
+    results = run_configs(configs, names, repeats, log, history, slots)
+    values = [ [ float(r.fps if metric == "fps" else r.score) for r in rs ] for rs in results ]
+
+    impacts = [ FFXIVImpact(k, self.base_values[k], v, u, values[0], values[i + 1])
+      for (i, (k, v, u)) in enumerate(self.variants) ]
+
+    return sorted(impacts, key=lambda i: -i.cost)
+
+def format_impacts(impacts, metric="fps"):
+  lines = [ "%-20s %-36s %10s %8s %8s" % ("Option", "Change", metric, "%", "p") ]
+
+  for i in impacts:
+    s = settings.get_setting(i.key)
+    change = s.describe(i.base_value) + " -> " + s.describe(i.value)
+    p = "%.4f" % i.p if not i.p is None else "-"
+
+    lines.append("%-20s %-36s %+10.1f %+7.1f%% %8s" % (i.key, change, i.cost, 100.0 * i.relative_cost, p))
+
+  return "\n".join(lines)
@@ -0,0 +1,297 @@
+from configparser import ConfigParser
+
+from .config import clone_config
+from .scheduler import run_configs
+from . import settings
+from . import presets
+
+import statistics
+
+# Levels of the resolution scale the optimizer may pick from
+RES_SCALE_LEVELS = [ "100", "85", "70", "50" ]
+
+# Options the optimizer leaves alone. Dynamic resolution would change
+# the workload while measuring it.
+FIXED_OPTIONS = [ "res_dynamic" ]
+
+# Describes every option as a list of config values ordered from best
+# to worst quality. The order is taken from the game's presets: the
+# value the Maximum preset uses is the best one, and for choices the
+# presets only ever move towards higher indices as they go down.
+class FFXIVQualityModel:
+  def __init__(self, weights={ }):
+    best = presets.get_builtin_preset("maximum")
+
+    self.options = [ ]
+    self.weights = { }
+
+    for (k, v) in best.items():
+      if k in FIXED_OPTIONS:
+        continue
+
+      s = settings.get_setting(k)
+
+      if k == "res_scale":
+        levels = RES_SCALE_LEVELS
+      elif s.kind == settings.SETTING_BOOL:
+        levels = [ str(s.parse(v)), str(not s.parse(v)) ]
+      else:
+        levels = [ str(i) for i in range(int(v), len(s.choices)) ]
+
+      if len(levels) < 2:
+        continue
+
+      self.options.append((k, levels))
+      self.weights[k] = float(weights.get(k, 1.0))
+
+    self.total_weight = sum(self.weights.values())
+
+  def get_best(self):
+    return dict([ (k, levels[0]) for (k, levels) in self.options ])
+
+  # Values are compared as parsed, since the same value can be written
+  # in different ways, e.g. "0" and "False". Values that are not one of
+  # the levels count as the lowest one.
+  def get_level(self, values, key):
+    s = settings.get_setting(key)
+    levels = [ s.parse(l) for l in dict(self.options)[key] ]
+    value = s.parse(values[key])
+    return levels.index(value) if value in levels else len(levels) - 1
+
+  # Weighted quality between 0 (everything at its lowest) and 1
+  def get_quality(self, values):
+    if self.total_weight == 0.0:
+      return 1.0
+
+    result = 0.0
+
+    for (k, levels) in self.options:
+      result += self.weights[k] * (1.0 - self.get_level(values, k) / (len(levels) - 1))
+
+    return result / self.total_weight
+
+def read_weights(file_path):
+  config = ConfigParser()
+
+  if len(config.read(file_path)) == 0 or not config.has_section("weights"):
+    raise ValueError("Failed to read quality weights from " + file_path)
+
+  result = { }
+
+  for (k, v) in config.items("weights"):
+    if settings.get_setting(k) is None:
+      raise ValueError("Invalid graphics option: " + k)
+
+    result[k] = float(v)
+
+  return result
+
+class FFXIVMeasurement:
+  def __init__(self, name, values, quality, results, metric):
+    self.name = name
+    self.values = values
+    self.quality = quality
+    self.score = statistics.fmean([ float(r.score) for r in results ])
+    self.fps = statistics.fmean([ float(r.fps) for r in results ])
+    self.performance = self.fps if metric == "fps" else self.score
+
+# Returns the measurements no other measurement beats in both quality
+# and performance, ordered from highest to lowest quality.
+def get_pareto_front(measurements):
+  result = [ ]
+
+  for m in sorted(measurements, key=lambda m: (-m.quality, -m.performance)):
+    if len(result) == 0 or m.performance > result[-1].performance:
+      result.append(m)
+
+  return result
+
+# Searches for the settings with the best quality at a given performance
+# target in three steps:
+#
+#  1. Screening: run the best settings once, and once more for every
+#     option turned all the way down, to estimate what each option
+#     costs in frame time.
+#  2. Greedy descent: starting from the best settings, repeatedly lower
+#     the option that saves the most frame time per quality lost, as
+#     predicted by the screening runs. This yields a path of settings
+#     from best to worst quality.
+#  3. Verification: bisect the path for the highest quality settings
+#     that actually meet the target, and measure a few points spread
+#     out along the path to fill in the Pareto front.
+#
+# The game's own presets are measured too, so the results can be put
+# in relation to them. All in all this takes a few dozen runs.
+class FFXIVOptimizer:
+  def __init__(self, cfg, model, target=None, metric="fps", repeats=1, log=print, history=None, slots=None):
+    self.cfg = cfg
+    self.model = model
+    self.target = target
+    self.metric = metric
+    self.repeats = repeats
+    self.log = log
+    self.history = history
+    self.slots = slots
+    self.measurements = [ ]
+    self.base = None
+
+  def make_config(self, values):
+    result = clone_config(self.cfg)
+
+    for (k, v) in values.items():
+      result.set("graphics", k, v)
+
+    return result
+
+  def measure(self, candidates):
+    results = run_configs([ self.make_config(v) for (n, v) in candidates ],
+      [ n for (n, v) in candidates ], self.repeats, self.log, self.history, self.slots)
+
+    measurements = [ FFXIVMeasurement(n, v, self.model.get_quality(v), r, self.metric)
+      for ((n, v), r) in zip(candidates, results) ]
+
+    self.measurements += measurements
+    return measurements
+
+  def get_frame_time(self, m):
+    # Scores are roughly proportional to the frame rate
+    return 1000.0 / max(m.fps, 0.001)
+
+  def screen(self):
+    best = self.model.get_best()
+    candidates = [ ("best", best) ]
+
+    for (k, levels) in self.model.options:
+      values = dict(best)
+      values[k] = levels[-1]
+      candidates.append((k + "=" + levels[-1], values))
+
+    measurements = self.measure(candidates)
+    base = self.get_frame_time(measurements[0])
+    self.base = measurements[0]
+
+    # Frame time saved by moving an option one level down
+    savings = { }
+
+    for ((k, levels), m) in zip(self.model.options, measurements[1:]):
+      savings[k] = max(0.0, base - self.get_frame_time(m)) / (len(levels) - 1)
+
+    return (base, savings)
+
+  def get_path(self, base, savings):
+    values = self.model.get_best()
+    frame_time = base
+    path = [ (dict(values), frame_time) ]
+
+    while True:
+      best_key = None
+      best_ratio = None
+
+      for (k, levels) in self.model.options:
+        level = levels.index(values[k])
+
+        if level + 1 >= len(levels):
+          continue
+
+        loss = self.model.weights[k] / (len(levels) - 1)
+        ratio = savings[k] / loss if loss > 0.0 else float("inf")
+
+        if best_ratio is None or ratio > best_ratio:
+          best_key = k
+          best_ratio = ratio
+
+      if best_key is None:
+        return path
+
+      levels = dict(self.model.options)[best_key]
+      values[best_key] = levels[levels.index(values[best_key]) + 1]
+      frame_time -= savings[best_key]
+      path.append((dict(values), frame_time))
+
+  # Finds the first point on the path that meets the target, assuming
+  # that performance increases along the path. Returns its index.
+  def bisect(self, path, base):
+    if base.performance >= self.target:
+      return 0
+
+    lo = 1
+    hi = len(path) - 1
+
+    while lo < hi:
+      mid = (lo + hi) // 2
+      m = self.measure([ ("step " + str(mid), path[mid][0]) ])[0]
+
+      if m.performance >= self.target:
+        hi = mid
+      else:
+        lo = mid + 1
+
+    return lo
+
+  # Returns the measurement of a point on the path, measuring it if
+  # that has not happened yet
+  def get_step(self, path, index):
+    if index == 0:
+      return self.base
+
+    name = "step " + str(index)
+    measured = [ m for m in self.measurements if m.name == name ]
+
+    if len(measured) > 0:
+      return measured[0]
+
+    return self.measure([ (name, path[index][0]) ])[0]
+
+  def run(self, candidates=4):
+    self.log("Screening " + str(len(self.model.options)) + " options")
+    (base, savings) = self.screen()
+
+    path = self.get_path(base, savings)
+
+    if not self.target is None:
+      self.log("Searching for settings that reach " + str(self.target) + " " + self.metric)
+      m = self.get_step(path, self.bisect(path, self.base))
+
+      if m.performance >= self.target:
+        self.log(m.name + " is the highest quality point on the path that reaches the target")
+      else:
+        self.log("No point on the path reaches the target")
+
+    points = [ i * (len(path) - 1) // (candidates + 1) for i in range(1, candidates + 1) ]
+    measured = [ m.name for m in self.measurements ]
+    points = [ i for i in points if not ("step " + str(i)) in measured ]
+
+    self.log("Measuring presets and " + str(len(points)) + " more points along the way")
+
+    builtin = [ ("preset " + n, dict([ (k, v) for (k, v) in presets.get_builtin_preset(n).items()
+      if not k in FIXED_OPTIONS ])) for n in presets.BUILTIN_PRESET_NAMES ]
+    self.measure(builtin + [ ("step " + str(i), path[i][0]) for i in points ])
+
+    return get_pareto_front(self.measurements)
+
+  # Picks up to 'count' settings from the Pareto front. With a target,
+  # these are the highest quality settings that meet it, otherwise they
+  # are spread out over the front.
+  def recommend(self, front, count=3):
+    if not self.target is None:
+      return [ m for m in front if m.performance >= self.target ][:count]
+
+    if len(front) <= count:
+      return front
+
+    return [ front[i * (len(front) - 1) // (count - 1)] for i in range(count) ] if count > 1 else front[:1]
+
+def format_front(front, recommended):
+  lines = [ "%-3s %-28s %8s %8s %10s" % ("", "", "quality", "score", "fps") ]
+
+  for m in front:
+    lines.append("%-3s %-28s %7.1f%% %8.0f %10.1f" % ("*" if m in recommended else "",
+      m.name, 100.0 * m.quality, m.score, m.fps))
+
+  return "\n".join(lines)
+
+# Writes recommended settings as presets, which can be loaded with
+# --preset-file or put into the user preset directory
+def write_presets(file_path, recommended, metric):
+  presets.write_presets(file_path, [ ("optimized-%d-%.0f%s" % (i + 1, m.performance, metric), m.values)
+    for (i, m) in enumerate(recommended) ])
@@ -0,0 +1,393 @@
+from .config import write_file_atomic
+from .benchdir import find_executable
+
+import subprocess
+import threading
+import tempfile
+import hashlib
+import shutil
+import json
+import time
+import re
+import os
+
+# How runs use the configured wine prefix:
+#
+#   direct    run in the configured prefix itself, in whatever state it is
+#   template  build a template from the configured prefix once, with the
+#             first boot work of wine already done, and give every run a
+#             fresh snapshot of it
+#
+# Templates are kept in the cache directory and rebuilt when wine or the
+# registry and graphics DLLs of the configured prefix change. Snapshots
+# are taken with one of these methods:
+#
+#   btrfs     btrfs subvolume snapshots, the template is a subvolume
+#   reflink   cp with reflinks, needs a file system that supports them
+#   copy      cp with reflinks where supported, a full copy otherwise
+#   tar       unpack a tarball of the template
+#   auto      btrfs on btrfs file systems, copy otherwise
+PREFIX_MODE_DIRECT = "direct"
+PREFIX_MODE_TEMPLATE = "template"
+
+PREFIX_MODES = [ PREFIX_MODE_DIRECT, PREFIX_MODE_TEMPLATE ]
+
+SNAPSHOT_BTRFS = "btrfs"
+SNAPSHOT_REFLINK = "reflink"
+SNAPSHOT_COPY = "copy"
+SNAPSHOT_TAR = "tar"
+SNAPSHOT_AUTO = "auto"
+
+SNAPSHOT_METHODS = [ SNAPSHOT_AUTO, SNAPSHOT_BTRFS, SNAPSHOT_REFLINK, SNAPSHOT_COPY, SNAPSHOT_TAR ]
+
+# Graphics DLLs whose replacement invalidates a template
+TRACKED_DLLS = [ "d3d9", "d3d10core", "d3d11", "d3d12", "d3d12core", "dxgi" ]
+
+# Registry files whose changes invalidate a template
+TRACKED_REGISTRY_FILES = [ "system.reg", "user.reg", "userdef.reg" ]
+
+def get_default_prefix_dir():
+  return os.getenv("XDG_CACHE_HOME", os.getenv("HOME") + "/.cache") + "/ffxiv_benchmark/prefixes"
+
+def get_system_dll_path(wine_prefix, name):
+  return os.path.join(wine_prefix, "drive_c", "windows", "system32", name)
+
+# Identifies a DLL in the prefix. Wine's own DLLs are marked as such,
+# DXVK and VKD3D-Proton embed their version as a plain string, and the
+# version resource is used for anything else.
+def get_dll_version(file_path):
+  try:
+    with open(file_path, "rb") as f:
+      data = f.read()
+  except OSError:
+    return "missing"
+
+  if b"Wine builtin DLL" in data or b"Wine placeholder DLL" in data:
+    return "wine builtin"
+
+  for (marker, name) in [ (b"DXVK", "dxvk"), (b"vkd3d-proton", "vkd3d-proton"), (b"VKD3D", "vkd3d") ]:
+    if not marker in data:
+      continue
+
+    m = re.search(rb"\x00(v\d+\.\d+(?:\.\d+)?(?:-\d+-g[0-9a-f]+)?)\x00", data)
+    return name + " " + m.group(1).decode() if not m is None else name
+
+  m = re.search("FileVersion\x00+([0-9., ]+)\x00".encode("utf-16-le"), data)
+
+  if not m is None:
+    return "native " + m.group(1).decode("utf-16-le").strip()
+
+  return "native"
+
+# Parses DLL overrides as WINEDLLOVERRIDES gives them, e.g.
+# "d3d11,dxgi=n,b;d3d9=b", into a dict of DLL names and load orders
+def parse_dll_overrides(value):
+  names = { "n" : "native", "b" : "builtin" }
+  result = { }
+
+  for entry in value.split(";"):
+    (dlls, sep, order) = entry.partition("=")
+    order = ",".join([ names.get(o.strip(), o.strip()) for o in order.split(",") if o.strip() != "" ])
+
+    for d in dlls.split(","):
+      if d.strip() != "":
+        result[d.strip().lower()] = order
+
+  return result
+
+# Returns the DLL overrides in effect for the prefix, from its registry
+# and the environment, which takes precedence
+def get_dll_overrides(wine_prefix, environment):
+  result = { }
+  section = False
+
+  try:
+    with open(os.path.join(wine_prefix, "user.reg"), errors="replace") as f:
+      for line in f:
+        line = line.strip()
+
+        if line.startswith("["):
+          section = line.lower().startswith("[software\\\\wine\\\\dlloverrides]")
+          continue
+
+        m = re.match(r'^"\*?([^"]+)"="([^"]*)"$', line)
+
+        if section and not m is None:
+          result[m.group(1).lower()] = m.group(2).replace(" ", "")
+  except OSError:
+    pass
+
+  result.update(parse_dll_overrides(environment.get("WINEDLLOVERRIDES", "")))
+  return result
+
+def parse_dll_list(value):
+  return [ d.strip().lower() for d in re.split("[, ]", value) if d.strip() != "" ]
+
+# Parses required DLL versions, e.g. "d3d11=dxvk v2.4, dxgi=dxvk v2.4"
+def parse_dll_versions(value):
+  result = { }
+
+  if value.strip() == "":
+    return result
+
+  for entry in value.split(","):
+    (dll, sep, version) = entry.partition("=")
+
+    if sep == "" or dll.strip() == "":
+      raise ValueError("Invalid DLL version requirement: " + entry.strip())
+
+    result[dll.strip().lower()] = version.strip()
+
+  return result
+
+# Checks that DLLs that have to be native are overridden as such and
+# are not Wine's own, and that DLLs have the required versions. Returns
+# a list of problems, empty if there are none.
+def verify_prefix(wine_prefix, environment, native_dlls, dll_versions):
+  errors = [ ]
+  overrides = get_dll_overrides(wine_prefix, environment)
+
+  for d in native_dlls:
+    order = overrides.get(d, "")
+    version = get_dll_version(get_system_dll_path(wine_prefix, d + ".dll"))
+
+    if not order.startswith("native"):
+      errors.append(d + " is not overridden to load the native DLL first (" + (order or "builtin") + ")")
+
+    if version in [ "wine builtin", "missing" ]:
+      errors.append(d + ".dll in " + wine_prefix + " is " + version)
+
+  for (d, expected) in dll_versions.items():
+    version = get_dll_version(get_system_dll_path(wine_prefix, d + ".dll"))
+
+    if not version.startswith(expected):
+      errors.append(d + ".dll in " + wine_prefix + " is " + version + ", expected " + expected)
+
+  return errors
+
+def get_file_system_type(path):
+  try:
+    return subprocess.run([ "stat", "-f", "-c", "%T", path ], capture_output=True,
+      text=True, check=True).stdout.strip()
+  except (OSError, subprocess.SubprocessError):
+    return ""
+
+def resolve_snapshot_method(method, path):
+  if method != SNAPSHOT_AUTO:
+    return method
+
+  if not find_executable("btrfs") is None and get_file_system_type(path) == "btrfs":
+    return SNAPSHOT_BTRFS
+
+  return SNAPSHOT_COPY
+
+def get_stamp(files):
+  result = [ ]
+
+  for f in files:
+    try:
+      result.append(os.stat(f).st_mtime_ns)
+    except OSError:
+      result.append(None)
+
+  return result
+
+# Removes a directory that may be a btrfs subvolume
+def remove_tree(path, method):
+  if not os.path.lexists(path):
+    return
+
+  if method == SNAPSHOT_BTRFS:
+    subprocess.run([ "btrfs", "subvolume", "delete", path ],
+      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+  shutil.rmtree(path, ignore_errors=True)
+
+def run_checked(args, environment=None):
+  process = subprocess.run(args, env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+  if process.returncode != 0:
+    lines = process.stderr.strip().splitlines()
+    raise RuntimeError(" ".join(args) + " failed" + (": " + lines[0] if len(lines) > 0 else ""))
+
+# A template prefix for a given prefix, wine build and environment
+class FFXIVPrefixTemplate:
+  def __init__(self, source, wine_path, environment, method=SNAPSHOT_AUTO, prefix_dir=None):
+    if prefix_dir is None:
+      prefix_dir = get_default_prefix_dir()
+
+    key = "\0".join([ os.path.abspath(source), wine_path, json.dumps(environment, sort_keys=True), method ])
+
+    self.source = source
+    self.wine_path = shutil.which(wine_path) or wine_path
+    self.environment = environment
+    self.base_dir = os.path.join(prefix_dir, hashlib.sha1(key.encode()).hexdigest()[:16])
+    self.method = resolve_snapshot_method(method, prefix_dir if os.path.isdir(prefix_dir) else os.path.dirname(prefix_dir))
+    self.path = os.path.join(self.base_dir, "template")
+    self.archive_path = os.path.join(self.base_dir, "template.tar")
+    self.manifest_path = os.path.join(self.base_dir, "manifest.json")
+    self.lock = threading.Lock()
+
+  def get_tracked_files(self):
+    return [ os.path.realpath(self.wine_path) ] + \
+      [ os.path.join(self.source, f) for f in TRACKED_REGISTRY_FILES ] + \
+      [ get_system_dll_path(self.source, d + ".dll") for d in TRACKED_DLLS ]
+
+  def get_manifest(self):
+    try:
+      with open(self.manifest_path) as f:
+        return json.load(f)
+    except (OSError, ValueError):
+      return None
+
+  def exists(self):
+    return os.path.exists(self.archive_path if self.method == SNAPSHOT_TAR else self.path)
+
+  def is_current(self):
+    manifest = self.get_manifest()
+    return self.exists() and not manifest is None and manifest["stamp"] == get_stamp(self.get_tracked_files())
+
+  def get_environment(self, wine_prefix):
+    result = dict(os.environ)
+    result.update(self.environment)
+    result["WINEPREFIX"] = wine_prefix
+    return result
+
+  # Copies the source prefix and lets wine do its first boot work in the
+  # copy, i.e. create or update the prefix and the font cache, then waits
+  # for wine to shut down so that the template is consistent
+  def build(self, log=None):
+    stamp = get_stamp(self.get_tracked_files())
+    build_path = self.path + ".tmp"
+
+    os.makedirs(self.base_dir, exist_ok=True)
+    remove_tree(build_path, self.method)
+
+    if not log is None:
+      log("Building wine prefix template in " + self.base_dir)
+
+    try:
+      if self.method == SNAPSHOT_BTRFS:
+        run_checked([ "btrfs", "subvolume", "create", build_path ])
+      else:
+        os.mkdir(build_path)
+
+      if os.path.isdir(self.source):
+        run_checked([ "cp", "-a", "--reflink=auto", self.source + "/.", build_path ])
+
+      environment = self.get_environment(build_path)
+      run_checked([ self.wine_path, "wineboot", "-u" ], environment)
+
+      wineserver = os.path.join(os.path.dirname(self.wine_path), "wineserver")
+
+      if not os.path.isfile(wineserver):
+        wineserver = find_executable("wineserver")
+
+      if not wineserver is None:
+        run_checked([ wineserver, "-w" ], environment)
+
+      dlls = dict([ (d, get_dll_version(get_system_dll_path(build_path, d + ".dll"))) for d in TRACKED_DLLS ])
+
+      if self.method == SNAPSHOT_TAR:
+        run_checked([ "tar", "-cf", self.archive_path + ".tmp", "-C", build_path, "." ])
+        os.replace(self.archive_path + ".tmp", self.archive_path)
+        remove_tree(build_path, self.method)
+      else:
+        remove_tree(self.path, self.method)
+        os.rename(build_path, self.path)
+    except:
+      remove_tree(build_path, self.method)
+      raise
+
+    write_file_atomic(self.manifest_path, json.dumps({
+      "source"    : os.path.abspath(self.source),
+      "wine"      : self.wine_path,
+      "method"    : self.method,
+      "created"   : time.time(),
+      "dlls"      : dlls,
+      "stamp"     : stamp }, indent=1))
+
+  # Builds the template unless an up to date one exists
+  def ensure(self, log=None, force=False):
+    with self.lock:
+      if force or not self.is_current():
+        self.build(log)
+
+  def clean(self):
+    with self.lock:
+      remove_tree(self.path, self.method)
+      shutil.rmtree(self.base_dir, ignore_errors=True)
+
+# A snapshot of a template for a single run, placed next to the template
+# since snapshots only work within a file system
+class FFXIVPrefixClone:
+  def __init__(self, template):
+    self.method = template.method
+    runs_dir = os.path.join(template.base_dir, "runs")
+
+    os.makedirs(runs_dir, exist_ok=True)
+    self.base_dir = tempfile.mkdtemp(dir=runs_dir)
+    self.path = os.path.join(self.base_dir, "prefix")
+
+    try:
+      if self.method == SNAPSHOT_BTRFS:
+        run_checked([ "btrfs", "subvolume", "snapshot", template.path, self.path ])
+      elif self.method == SNAPSHOT_TAR:
+        os.mkdir(self.path)
+        run_checked([ "tar", "-xf", template.archive_path, "-C", self.path ])
+      else:
+        reflink = "--reflink=always" if self.method == SNAPSHOT_REFLINK else "--reflink=auto"
+        run_checked([ "cp", "-a", reflink, template.path, self.path ])
+    except:
+      self.cleanup()
+      raise
+
+  def cleanup(self):
+    if self.base_dir is None:
+      return
+
+    remove_tree(self.path, self.method)
+    shutil.rmtree(self.base_dir, ignore_errors=True)
+    self.base_dir = None
+
+templates = { }
+templates_lock = threading.Lock()
+
+# Returns the template for a launcher config, shared between all runs
+# in the process so that concurrent runs only build it once
+def get_template(cfg, environment):
+  key = (cfg.get("wine", "prefix"), cfg.get("wine", "path"),
+    json.dumps(environment, sort_keys=True), cfg.get("wine", "prefix_snapshot"))
+
+  with templates_lock:
+    if not key in templates:
+      templates[key] = FFXIVPrefixTemplate(cfg.get("wine", "prefix"), cfg.get("wine", "path"),
+        environment, cfg.get("wine", "prefix_snapshot"))
+
+    return templates[key]
+
+def verify_prefix_config(cfg, wine_prefix, environment):
+  return verify_prefix(wine_prefix, environment,
+    parse_dll_list(cfg.get("wine", "native_dlls")), parse_dll_versions(cfg.get("wine", "dll_versions")))
+
+# Returns an error message if the prefix options are invalid or the
+# prefix does not meet the DLL requirements
+def check_prefix_config(cfg, environment):
+  if not cfg.get("wine", "prefix_mode") in PREFIX_MODES:
+    return "Invalid prefix mode: " + cfg.get("wine", "prefix_mode")
+
+  if not cfg.get("wine", "prefix_snapshot") in SNAPSHOT_METHODS:
+    return "Invalid prefix snapshot method: " + cfg.get("wine", "prefix_snapshot")
+
+  if cfg.get("wine", "prefix_snapshot") == SNAPSHOT_BTRFS and find_executable("btrfs") is None:
+    return "btrfs snapshots require btrfs-progs."
+
+  try:
+    errors = verify_prefix_config(cfg, cfg.get("wine", "prefix"), environment)
+  except ValueError as e:
+    return str(e)
+
+  if len(errors) > 0:
+    return "Wine prefix check failed: " + "; ".join(errors)
+
+  return None
@@ -0,0 +1,219 @@
+from configparser import ConfigParser, Error
+
+from .config import clone_config, write_config
+from . import settings
+
+import glob
+import os
+
+# Presets are named sets of graphics options. The game's own presets are
+# built in, and more can be defined in INI files with one section per
+# preset, using the same values as the launcher config:
+#
+#   [steam-deck]
+#   base = standard-laptop
+#   res_scale = 70
+#   ssao = 6
+#
+# A preset only sets the options it lists. If it names a base preset,
+# the options of that one are used for everything else. Files in the
+# user preset directory are loaded automatically, and the presets the
+# optimizer writes can be used as they are.
+PRESET_BASE_KEY = "base"
+
+BUILTIN_PRESET_NAMES = [ "maximum", "high-desktop", "high-laptop", "standard-desktop", "standard-laptop" ]
+
+BUILTIN_PRESET_LABELS = [ "Maximum", "High (Desktop)", "High (Laptop)", "Standard (Desktop)", "Standard (Laptop)" ]
+
+# Options the game's presets set, with either a single value for all of
+# them or one value per preset in the order above. Display options other
+# than scaling are left alone.
+BUILTIN_PRESET_VALUES = [
+  ("res_scale",             "100"),
+  ("res_dynamic",           [ "0", "3", "3", "3", "3" ]),
+  ("lod",                   [ "False", "False", "True", "True", "True" ]),
+  ("anti_aliasing_type",    [ "0", "0", "2", "2", "3" ]),
+  ("reflection",            [ "0", "0", "3", "3", "3" ]),
+  ("translucent",           [ "0", "0", "1", "1", "1" ]),
+  ("grass_quality",         [ "0", "0", "1", "2", "2" ]),
+  ("dynamic_grass",         [ "True", "True", "True", "False", "False" ]),
+  ("parallax_occlusion",    [ "0", "0", "0", "1", "1" ]),
+  ("tessellation",          [ "0", "0", "0", "1", "1" ]),
+  ("glare",                 [ "0", "0", "1", "1", "1" ]),
+  ("texture_res",           [ "0", "0", "0", "1", "1" ]),
+  ("texture_filter",        [ "0", "1", "2", "3", "3" ]),
+  ("shadow_lod",            [ "False", "True", "True", "True", "True" ]),
+  ("shadow_lod_scene",      [ "False", "False", "False", "True", "True" ]),
+  ("shadow_self",           "True"),
+  ("shadow_other",          [ "True", "True", "True", "False", "False" ]),
+  ("shadow_resolution",     [ "0", "0", "1", "1", "1" ]),
+  ("shadow_cascading",      [ "0", "0", "0", "1", "1" ]),
+  ("shadow_soft",           [ "0", "1", "1", "2", "2" ]),
+  ("shadow_casters",        [ "0", "1", "1", "2", "2" ]),
+  ("vignette",              [ "True", "True", "True", "False", "False" ]),
+  ("radial_blur",           "True"),
+  ("depth_of_field",        "True"),
+  ("ssao",                  [ "0", "1", "1", "3", "3" ]),
+  ("glare_effect",          "0"),
+  ("water_refraction",      "0"),
+  ("movement_self",         "0"),
+  ("movement_other",        [ "0", "0", "0", "1", "2" ]) ]
+
+BUILTIN_SOURCE = "built-in"
+
+def get_default_preset_dir():
+  return os.getenv("XDG_DATA_HOME", os.getenv("HOME") + "/.local/share") + "/ffxiv_benchmark/presets"
+
+def get_builtin_preset(name):
+  i = BUILTIN_PRESET_NAMES.index(name)
+  return dict([ (k, v if isinstance(v, str) else v[i]) for (k, v) in BUILTIN_PRESET_VALUES ])
+
+# Returns the graphics options set in a launcher config
+def get_current(cfg):
+  return dict([ (s.key, cfg.get("graphics", s.key)) for s in settings.GRAPHICS_SETTINGS ])
+
+# Returns a copy of the launcher config with the preset applied
+def apply_preset(cfg, values):
+  result = clone_config(cfg)
+
+  for (k, v) in values.items():
+    result.set("graphics", k, v)
+
+  return result
+
+# Returns (key, a, b) for every option the two sets of values disagree
+# on, in the order the GUI shows them. Options that only one of them
+# sets are included with None on the other side.
+def diff_presets(a, b):
+  result = [ ]
+
+  for s in settings.GRAPHICS_SETTINGS:
+    va = a.get(s.key)
+    vb = b.get(s.key)
+
+    if va is None and vb is None:
+      continue
+
+    if va is None or vb is None or s.parse(va) != s.parse(vb):
+      result.append((s.key, va, vb))
+
+  return result
+
+def format_diff(diff, name_a, name_b):
+  if len(diff) == 0:
+    return name_a + " and " + name_b + " are identical"
+
+  def describe(key, value):
+    return settings.get_setting(key).describe(value) if not value is None else "-"
+
+  lines = [ "%-20s %-22s %s" % ("Option", name_a, name_b) ]
+
+  for (k, va, vb) in diff:
+    lines.append("%-20s %-22s %s" % (k, describe(k, va), describe(k, vb)))
+
+  return "\n".join(lines)
+
+def format_preset(values):
+  return "\n".join([ "%-20s %s" % (s.key, s.describe(values[s.key]))
+    for s in settings.GRAPHICS_SETTINGS if s.key in values ])
+
+# Writes presets to a file, one section each, from (name, values) pairs
+def write_presets(file_path, presets):
+  config = ConfigParser(interpolation=None)
+
+  for (name, values) in presets:
+    config[name] = values
+
+  write_config(config, file_path)
+
+# All presets known to the launcher. Presets loaded later replace earlier
+# ones of the same name, so a user preset may redefine a built-in one.
+class FFXIVPresetLibrary:
+  def __init__(self):
+    self.presets = { }
+    self.sources = { }
+
+    for n in BUILTIN_PRESET_NAMES:
+      self.presets[n] = (None, get_builtin_preset(n))
+      self.sources[n] = BUILTIN_SOURCE
+
+  def load_file(self, file_path):
+    config = ConfigParser(interpolation=None)
+
+    try:
+      if len(config.read(file_path)) == 0:
+        raise ValueError("Failed to read presets from " + file_path)
+    except (Error, UnicodeDecodeError) as e:
+      raise ValueError("Failed to parse presets in " + file_path + ": " + str(e))
+
+    for name in config.sections():
+      base = None
+      values = { }
+
+      for (k, v) in config.items(name):
+        if k == PRESET_BASE_KEY:
+          base = v
+          continue
+
+        s = settings.get_setting(k)
+
+        if s is None:
+          raise ValueError("Invalid graphics option in preset " + name + " (" + file_path + "): " + k)
+
+        error = s.validate(v)
+
+        if not error is None:
+          raise ValueError(error + " in preset " + name + " (" + file_path + ")")
+
+        values[k] = v
+
+      self.presets[name] = (base, values)
+      self.sources[name] = file_path
+
+  def load_dir(self, dir_path):
+    for f in sorted(glob.glob(os.path.join(dir_path, "*.ini"))):
+      self.load_file(f)
+
+  def get_names(self):
+    return BUILTIN_PRESET_NAMES + sorted([ n for n in self.presets if not n in BUILTIN_PRESET_NAMES ])
+
+  def get_user_names(self):
+    return [ n for n in self.get_names() if self.sources[n] != BUILTIN_SOURCE ]
+
+  def has(self, name):
+    return name in self.presets
+
+  def get_source(self, name):
+    return self.sources[name]
+
+  # Returns the values of a preset with those of its base presets filled in
+  def get(self, name):
+    chain = [ ]
+
+    while not name is None:
+      if not name in self.presets:
+        raise ValueError("Unknown preset: " + name)
+
+      if name in chain:
+        raise ValueError("Preset " + chain[0] + " is based on itself")
+
+      chain.append(name)
+      name = self.presets[name][0]
+
+    result = { }
+
+    for n in reversed(chain):
+      result.update(self.presets[n][1])
+
+    return result
+
+# Returns the built-in presets along with those in the user preset
+# directory and the given files
+def get_library(files=[ ]):
+  library = FFXIVPresetLibrary()
+  library.load_dir(get_default_preset_dir())
+
+  for f in files:
+    library.load_file(f)
+
+  return library
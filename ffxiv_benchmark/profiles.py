@@ -0,0 +1,109 @@
+from .config import clone_config
+from .stats import FFXIVSummary, welch_t_test, mann_whitney_u_test
+from . import benchmark
+
+# Wine profiles are named alternatives to the [wine] section of the
+# launcher config, e.g.:
+#
+#   [profile:proton-9]
+#   path = /opt/proton-9/files/bin/wine
+#   environment = WINEFSYNC=1 DXVK_HUD=0
+#
+# Options that a profile does not set are taken from [wine], and the
+# name 'default' refers to the [wine] section itself.
+PROFILE_PREFIX = "profile:"
+DEFAULT_PROFILE = "default"
+
+def get_profiles(cfg):
+  return [ s[len(PROFILE_PREFIX):] for s in cfg.sections() if s.startswith(PROFILE_PREFIX) ]
+
+def apply_profile(cfg, name):
+  section = PROFILE_PREFIX + name
+
+  if name == DEFAULT_PROFILE and not cfg.has_section(section):
+    return clone_config(cfg)
+
+  if not cfg.has_section(section):
+    raise ValueError("Unknown wine profile: " + name)
+
+  result = clone_config(cfg)
+
+  for (k, v) in cfg.items(section):
+    if cfg.has_option("wine", k):
+      result.set("wine", k, v)
+
+  return result
+
+class FFXIVProfileComparison:
+  def __init__(self, names):
+    self.names = names
+    self.scores = dict([ (n, [ ]) for n in names ])
+    self.fps = dict([ (n, [ ]) for n in names ])
+
+  def add(self, name, score, fps):
+    self.scores[name].append(float(score))
+    self.fps[name].append(float(fps))
+
+  def format(self):
+    lines = [ ]
+
+    for n in self.names:
+      lines.append(n + ":")
+      lines.append("  Score: " + FFXIVSummary(self.scores[n]).format(0))
+      lines.append("  FPS:   " + FFXIVSummary(self.fps[n]).format(1))
+
+    # Every profile is compared against the first one
+    base = self.names[0]
+
+    for n in self.names[1:]:
+      base_mean = FFXIVSummary(self.scores[base]).mean
+      delta = FFXIVSummary(self.scores[n]).mean - base_mean
+
+      lines.append(n + " vs. " + base + ":")
+
+      if base_mean != 0.0:
+        lines.append("  Score delta: %+.0f (%+.2f%%)" % (delta, 100.0 * delta / base_mean))
+
+      (t, p_welch) = welch_t_test(self.scores[n], self.scores[base])
+      (u, p_mwu) = mann_whitney_u_test(self.scores[n], self.scores[base])
+
+      if not p_welch is None:
+        lines.append("  Welch's t-test: t = %.3f, p = %.4f" % (t, p_welch))
+
+      if not p_mwu is None:
+        lines.append("  Mann-Whitney U: U = %.1f, p = %.4f" % (u, p_mwu))
+
+    return "\n".join(lines)
+
+# Runs the given profiles interleaved (A, B, A, B, ...) so that slow
+# drift such as thermals or background load affects all of them alike.
+def run_interleaved(cfg, names, rounds, warmup, log, history=None):
+  runners = [ (n, benchmark.FFXIVBenchmarkRunner(apply_profile(cfg, n))) for n in names ]
+  comparison = FFXIVProfileComparison(names)
+
+  for r in range(warmup + rounds):
+    is_warmup = r < warmup
+
+    if is_warmup:
+      desc = "Warm-up round " + str(r + 1) + "/" + str(warmup)
+    else:
+      desc = "Round " + str(r - warmup + 1) + "/" + str(rounds)
+
+    for (name, runner) in runners:
+      (returncode, result) = runner.run()
+
+      if returncode != 0 or result is None:
+        raise RuntimeError(desc + ", " + name + ": benchmark failed")
+
+      log(desc + ", " + name + ": score " + str(result.score) + ", " + str(result.fps) + " fps" +
+        (" (discarded)" if is_warmup else ""))
+
+      if is_warmup:
+        continue
+
+      comparison.add(name, result.score, result.fps)
+
+      if not history is None:
+        history.add_result(runner.cfg, result)
+
+  return comparison
@@ -0,0 +1,92 @@
+from .stats import FFXIVSummary, welch_t_test
+
+# Metrics a run set is compared on, and whether higher values are
+# better. Frame time figures are only there if frame times were
+# captured, and are skipped otherwise.
+COMPARE_METRICS = [
+  ("score",           True),
+  ("fps",             True),
+  ("fps_low_1",       True),
+  ("fps_low_01",      True),
+  ("frametime_p50",   False),
+  ("frametime_p95",   False),
+  ("frametime_p99",   False) ]
+
+# Slowdowns up to this many percent are tolerated by default
+DEFAULT_TOLERANCE = 3.0
+
+# Significance level a slowdown has to reach to count, if there are
+# enough runs on both sides to test
+DEFAULT_ALPHA = 0.05
+
+VERDICT_OK = "ok"
+VERDICT_REGRESSION = "REGRESSION"
+VERDICT_IMPROVEMENT = "improvement"
+VERDICT_NOISE = "not significant"
+
+# Returns the values of every metric for a run in the history
+def get_run_values(history, run_id):
+  row = history.get_run(run_id)
+
+  if row is None:
+    raise ValueError("No run with ID " + str(run_id))
+
+  result = history.get_metrics(run_id)
+  result["score"] = float(row["score"])
+  result["fps"] = float(row["fps"])
+  return result
+
+class FFXIVMetricComparison:
+  def __init__(self, name, higher_is_better, baseline, current, tolerance, alpha):
+    self.name = name
+    self.baseline = FFXIVSummary(baseline)
+    self.current = FFXIVSummary(current)
+    self.tolerance = tolerance
+
+    self.delta = 0.0
+
+    if self.baseline.mean != 0.0:
+      self.delta = 100.0 * (self.current.mean - self.baseline.mean) / self.baseline.mean
+
+    # How much slower things got, in percent, negative if faster
+    self.slowdown = -self.delta if higher_is_better else self.delta
+
+    (t, self.p) = welch_t_test(current, baseline)
+    significant = self.p is None or self.p < alpha
+
+    if self.slowdown > tolerance:
+      self.verdict = VERDICT_REGRESSION if significant else VERDICT_NOISE
+    elif self.slowdown < -tolerance and significant:
+      self.verdict = VERDICT_IMPROVEMENT
+    else:
+      self.verdict = VERDICT_OK
+
+# Compares two run sets, each a list of dicts mapping metric names to
+# values. Tolerances can be given per metric, in percent.
+class FFXIVRegressionCheck:
+  def __init__(self, baseline, current, tolerance=DEFAULT_TOLERANCE, metric_tolerances={ }, alpha=DEFAULT_ALPHA):
+    self.metrics = [ ]
+
+    for (name, higher_is_better) in COMPARE_METRICS:
+      a = [ r[name] for r in baseline if name in r ]
+      b = [ r[name] for r in current if name in r ]
+
+      if len(a) == 0 or len(b) == 0:
+        continue
+
+      self.metrics.append(FFXIVMetricComparison(name, higher_is_better, a, b,
+        metric_tolerances.get(name, tolerance), alpha))
+
+  def get_regressions(self):
+    return [ m for m in self.metrics if m.verdict == VERDICT_REGRESSION ]
+
+  def format(self):
+    lines = [ "%-15s %12s %12s %9s %9s %8s  %s" % ("Metric", "Baseline", "Current", "Delta", "Tolerance", "p", "Verdict") ]
+
+    for m in self.metrics:
+      p = "%.4f" % m.p if not m.p is None else "-"
+
+      lines.append("%-15s %12.2f %12.2f %+8.2f%% %8.1f%% %8s  %s" % (m.name,
+        m.baseline.mean, m.current.mean, m.delta, m.tolerance, p, m.verdict))
+
+    return "\n".join(lines)
@@ -0,0 +1,310 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from configparser import ConfigParser
+
+from .config import clone_config
+from .hostinfo import get_host_info
+from .presets import get_current
+from .telemetry import FFXIVTelemetryBuffer, TELEMETRY_CHANNELS
+from . import benchmark
+from . import settings
+
+import urllib.request
+import urllib.error
+import ipaddress
+import threading
+import base64
+import hmac
+import json
+
+# Agents run benchmark jobs on behalf of a launcher on another machine.
+# They are plain HTTP servers:
+#
+#   GET  /info    host fingerprint and state of the agent
+#   POST /run     runs one job and returns its results
+#
+# A job only carries the graphics options and the benchmark options that
+# change how a run is measured. The benchmark directory, wine and prefix
+# are the agent's own, from its launcher config.
+#
+# A launcher drives agents through slots that name one instead of local
+# options, so that sweeps and every other command taking --slots spread
+# their runs over them:
+#
+#   [slot:deck]
+#   agent = http://192.168.1.20:8765
+#   token = secret
+AGENT_DEFAULT_PORT = 8765
+
+# Benchmark options that are sent along with the graphics options
+REMOTE_BENCHMARK_OPTIONS = [ "capture_frametimes", "shader_cache", "telemetry_interval", "view_mode" ]
+
+# Sections of the agent's config that are sent back with results, so that
+# runs are recorded with the wine and benchmark they actually used. The
+# others, such as slots, may hold tokens.
+REMOTE_CONFIG_SECTIONS = [ "benchmark", "wine", "graphics" ]
+
+# Runs can take a while, but an agent that vanished should not stall
+# the launcher forever, in seconds
+REMOTE_TIMEOUT = 3600
+
+def encode_job(cfg):
+  return {
+    "graphics"  : get_current(cfg),
+    "benchmark" : dict([ (k, cfg.get("benchmark", k)) for k in REMOTE_BENCHMARK_OPTIONS ]) }
+
+# Returns the agent's config with the job applied, and raises ValueError
+# if the job contains anything the agent should not accept
+def apply_job(cfg, job):
+  result = clone_config(cfg)
+
+  for (k, v) in job.get("graphics", { }).items():
+    s = settings.get_setting(k)
+
+    if s is None:
+      raise ValueError("Invalid graphics option: " + k)
+
+    error = s.validate(str(v))
+
+    if not error is None:
+      raise ValueError(error)
+
+    result.set("graphics", k, str(v))
+
+  for (k, v) in job.get("benchmark", { }).items():
+    if not k in REMOTE_BENCHMARK_OPTIONS:
+      raise ValueError("Invalid benchmark option: " + k)
+
+    result.set("benchmark", k, str(v))
+
+  error = benchmark.check_config(result)
+
+  if not error is None:
+    raise ValueError(error)
+
+  return result
+
+def encode_result(returncode, result, host, cfg):
+  data = {
+    "returncode"  : returncode,
+    "result"      : None,
+    "host"        : host,
+    "config"      : dict([ (s, dict(cfg.items(s))) for s in REMOTE_CONFIG_SECTIONS ]) }
+
+  if result is None:
+    return data
+
+  telemetry = None
+
+  if not result.telemetry is None:
+    telemetry = {
+      "interval"  : result.telemetry.interval,
+      "channels"  : dict([ (c, list(result.telemetry.get(c))) for c in TELEMETRY_CHANNELS ]) }
+
+  data["result"] = {
+    "score"       : result.score,
+    "fps"         : result.fps,
+    "frametimes"  : dict([ (k, float(v)) for (k, v) in result.frametimes.items() ])
+                      if not result.frametimes is None else None,
+    "telemetry"   : telemetry,
+    "metrics"     : dict([ (k, float(v)) for (k, v) in result.metrics.items() ]),
+    "files"       : dict([ (k, base64.b64encode(v).decode()) for (k, v) in result.files.items() ]) }
+
+  return data
+
+def decode_result(data):
+  values = data.get("result")
+
+  if values is None:
+    return (data.get("returncode"), None)
+
+  result = benchmark.FFXIVBenchmarkResult(values["score"], values["fps"], values["frametimes"])
+  result.metrics = values["metrics"]
+  result.files = dict([ (k, base64.b64decode(v)) for (k, v) in values["files"].items() ])
+  result.host = data.get("host")
+
+  if not data.get("config") is None:
+    result.cfg = ConfigParser()
+    result.cfg.read_dict(data["config"])
+
+  if not values["telemetry"] is None:
+    channels = values["telemetry"]["channels"]
+    count = len(channels[TELEMETRY_CHANNELS[0]])
+
+    result.telemetry = FFXIVTelemetryBuffer(values["telemetry"]["interval"], max(count, 1))
+
+    for i in range(count):
+      result.telemetry.add([ channels[c][i] for c in TELEMETRY_CHANNELS ])
+
+  return (data.get("returncode"), result)
+
+# Runs jobs from controllers one at a time, since concurrent runs on the
+# same machine would skew each other
+class FFXIVAgent:
+  def __init__(self, cfg, token=None, log=print):
+    self.cfg = cfg
+    self.token = token
+    self.log = log
+    self.lock = threading.Lock()
+    self.current = None
+    self.completed = 0
+
+  def get_info(self):
+    return {
+      "host"      : get_host_info(self.cfg),
+      "busy"      : not self.current is None,
+      "completed" : self.completed }
+
+  def run(self, job, client):
+    run_cfg = apply_job(self.cfg, job)
+
+    with self.lock:
+      self.current = client
+      self.log("Running job from " + client)
+
+      try:
+        (returncode, result) = benchmark.FFXIVBenchmarkRunner(run_cfg).run()
+      finally:
+        self.current = None
+        self.completed += 1
+
+    if result is None:
+      self.log("Job from " + client + " failed with return code " + str(returncode))
+    else:
+      self.log("Job from " + client + ": score " + str(result.score) + ", " + str(result.fps) + " fps")
+
+    return encode_result(returncode, result, get_host_info(run_cfg), run_cfg)
+
+class FFXIVAgentHandler(BaseHTTPRequestHandler):
+  def send_json(self, status, data):
+    body = json.dumps(data).encode()
+
+    self.send_response(status)
+    self.send_header("Content-Type", "application/json")
+    self.send_header("Content-Length", str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def is_authorized(self):
+    token = self.server.agent.token
+
+    if token is None:
+      return True
+
+    # Constant time comparison, so the token cannot be guessed byte by byte
+    if hmac.compare_digest(self.headers.get("Authorization", "").encode(), ("Bearer " + token).encode()):
+      return True
+
+    self.send_json(401, { "error" : "Invalid token" })
+    return False
+
+  def do_GET(self):
+    if not self.is_authorized():
+      return
+
+    if self.path != "/info":
+      self.send_json(404, { "error" : "Not found: " + self.path })
+      return
+
+    self.send_json(200, self.server.agent.get_info())
+
+  def do_POST(self):
+    if not self.is_authorized():
+      return
+
+    if self.path != "/run":
+      self.send_json(404, { "error" : "Not found: " + self.path })
+      return
+
+    try:
+      job = json.loads(self.rfile.read(int(self.headers.get("Content-Length", "0"))))
+
+      if not isinstance(job, dict):
+        raise ValueError("Invalid job")
+
+      data = self.server.agent.run(job, self.address_string())
+    except ValueError as e:
+      self.send_json(400, { "error" : str(e) })
+      return
+    except Exception as e:
+      self.send_json(500, { "error" : "Run failed: " + str(e) })
+      return
+
+    self.send_json(200, data)
+
+  # Requests are logged by the agent itself
+  def log_message(self, format, *args):
+    pass
+
+def parse_address(address):
+  (host, sep, port) = address.rpartition(":")
+
+  if sep == "":
+    return (address, AGENT_DEFAULT_PORT)
+
+  if not port.isdigit():
+    raise ValueError("Invalid address: " + address)
+
+  return (host, int(port))
+
+def is_loopback(host):
+  if host == "localhost":
+    return True
+
+  try:
+    return ipaddress.ip_address(host.strip("[]")).is_loopback
+  except ValueError:
+    return False
+
+# Serves the agent until interrupted. Anyone who can reach the agent
+# can run benchmarks on it, so other machines need a token.
+def run_agent(cfg, address, token=None, log=print):
+  address = parse_address(address)
+
+  if token is None and not is_loopback(address[0]):
+    raise ValueError("Agents listening on " + (address[0] or "all addresses") + " require a token")
+
+  server = ThreadingHTTPServer(address, FFXIVAgentHandler)
+  server.agent = FFXIVAgent(cfg, token, log)
+
+  log("Agent listening on " + "%s:%d" % server.server_address[:2])
+
+  try:
+    server.serve_forever()
+  finally:
+    server.server_close()
+
+# A slot that runs its jobs on an agent
+class FFXIVRemoteSlot:
+  def __init__(self, name, url, token=None):
+    self.name = name
+    self.url = url.rstrip("/")
+    self.token = token
+
+  def request(self, path, data=None, timeout=REMOTE_TIMEOUT):
+    headers = { "Content-Type" : "application/json" }
+
+    if not self.token is None:
+      headers["Authorization"] = "Bearer " + self.token
+
+    request = urllib.request.Request(self.url + path, headers=headers,
+      data=json.dumps(data).encode() if not data is None else None)
+
+    try:
+      with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+      try:
+        message = json.loads(e.read())["error"]
+      except (ValueError, KeyError):
+        message = str(e)
+      raise RuntimeError(self.name + ": " + message)
+    except (urllib.error.URLError, OSError) as e:
+      raise RuntimeError(self.name + ": " + str(e))
+
+  def get_info(self):
+    return self.request("/info", timeout=30)
+
+  # Same as running the job locally, except that the results carry
+  # the fingerprint of the agent's host and the config it ran with
+  def run(self, cfg):
+    return decode_result(self.request("/run", encode_job(cfg)))
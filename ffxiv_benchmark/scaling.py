@@ -0,0 +1,143 @@
+from .config import clone_config
+from .scheduler import run_configs
+
+import statistics
+import math
+
+# Default ladder of render scales, in percent
+DEFAULT_SCALES = [ 50, 60, 70, 80, 90, 100 ]
+
+class FFXIVScalingPoint:
+  def __init__(self, width, height, scale, results):
+    self.width = width
+    self.height = height
+    self.scale = scale
+    self.fps = statistics.fmean([ float(r.fps) for r in results ])
+    self.score = statistics.fmean([ float(r.score) for r in results ])
+
+    # Render scale applies to both axes
+    self.megapixels = width * height * (scale / 100.0) ** 2 / 1000000.0
+    self.frame_time = 1000.0 / max(self.fps, 0.001)
+
+# Fits frame times to a simple bottleneck model, where a frame takes as
+# long as the slower of the CPU, which does the same work regardless of
+# resolution, and the GPU, whose work grows with the pixel count:
+#
+#   frame_time = max(cpu_time, gpu_time_per_megapixel * megapixels)
+#
+# Every split of the points, ordered by pixel count, into a CPU-bound
+# plateau and a GPU-bound part is tried, and the one with the smallest
+# squared error wins.
+class FFXIVScalingModel:
+  def __init__(self, points):
+    self.points = sorted(points, key=lambda p: p.megapixels)
+    self.cpu_time = None
+    self.gpu_time = None
+    self.error = None
+
+    for split in range(len(self.points) + 1):
+      cpu = self.points[:split]
+      gpu = self.points[split:]
+
+      cpu_time = statistics.fmean([ p.frame_time for p in cpu ]) if len(cpu) > 0 else None
+      gpu_time = None
+
+      if len(gpu) > 0:
+        gpu_time = sum([ p.megapixels * p.frame_time for p in gpu ]) / sum([ p.megapixels ** 2 for p in gpu ])
+
+      # The split has to agree with the model, i.e. the crossover has to
+      # lie between the two parts
+      if not cpu_time is None and not gpu_time is None and \
+          (gpu_time * gpu[0].megapixels < cpu_time or gpu_time * cpu[-1].megapixels > cpu_time):
+        continue
+
+      error = sum([ (p.frame_time - cpu_time) ** 2 for p in cpu ]) + \
+        sum([ (p.frame_time - gpu_time * p.megapixels) ** 2 for p in gpu ])
+
+      if self.error is None or error < self.error:
+        (self.cpu_time, self.gpu_time, self.error) = (cpu_time, gpu_time, error)
+
+  # Pixel count at which the CPU and GPU take equally long, or None if
+  # the measured range is entirely on one side of it
+  def get_crossover(self):
+    if self.cpu_time is None or self.gpu_time is None:
+      return None
+
+    return self.cpu_time / self.gpu_time
+
+  def is_cpu_bound(self, megapixels):
+    if self.gpu_time is None:
+      return True
+
+    if self.cpu_time is None:
+      return False
+
+    return megapixels < self.get_crossover()
+
+  def predict_fps(self, megapixels):
+    frame_time = max(self.cpu_time or 0.0, (self.gpu_time or 0.0) * megapixels)
+    return 1000.0 / frame_time if frame_time > 0.0 else 0.0
+
+  # Slope of log(fps) over log(pixels): about -1 if frame rates scale with
+  # the pixel count, about 0 if they don't change at all
+  def get_exponent(self):
+    if len(self.points) < 2 or self.points[0].megapixels == self.points[-1].megapixels:
+      return None
+
+    x = [ math.log(p.megapixels) for p in self.points ]
+    y = [ math.log(max(p.fps, 0.001)) for p in self.points ]
+    mx = statistics.fmean(x)
+    my = statistics.fmean(y)
+
+    return sum([ (a - mx) * (b - my) for (a, b) in zip(x, y) ]) / sum([ (a - mx) ** 2 for a in x ])
+
+  def format(self):
+    lines = [ "%-11s %6s %8s %10s %10s %10s  %s" % ("Resolution", "Scale", "MPixels", "fps", "ms", "model fps", "") ]
+
+    for p in self.points:
+      lines.append("%-11s %5d%% %8.2f %10.1f %10.2f %10.1f  %s" % (str(p.width) + "x" + str(p.height),
+        p.scale, p.megapixels, p.fps, p.frame_time, self.predict_fps(p.megapixels),
+        "CPU-bound" if self.is_cpu_bound(p.megapixels) else "GPU-bound"))
+
+    lines.append("")
+
+    if not self.cpu_time is None:
+      lines.append("CPU limit:    %.1f fps (%.2f ms per frame)" % (1000.0 / self.cpu_time, self.cpu_time))
+
+    if not self.gpu_time is None:
+      lines.append("GPU speed:    %.0f megapixels/s (%.2f ms per megapixel)" % (1000.0 / self.gpu_time, self.gpu_time))
+
+    crossover = self.get_crossover()
+
+    if not crossover is None:
+      lines.append("Crossover:    %.2f megapixels, CPU-bound below, GPU-bound above" % crossover)
+    elif self.gpu_time is None:
+      lines.append("Crossover:    above the measured range, CPU-bound throughout")
+    else:
+      lines.append("Crossover:    below the measured range, GPU-bound throughout")
+
+    exponent = self.get_exponent()
+
+    if not exponent is None:
+      lines.append("Scaling:      fps ~ pixels^%.2f (-1 is fully GPU-bound, 0 fully CPU-bound)" % exponent)
+
+    return "\n".join(lines)
+
+# Runs the configured settings at every step of the ladder, which is a
+# list of (width, height, scale) tuples. Dynamic resolution is turned
+# off since it would adjust the render scale on its own.
+def run_scaling(cfg, ladder, repeats, log, history=None, slots=None):
+  configs = [ ]
+
+  for (width, height, scale) in ladder:
+    c = clone_config(cfg)
+    c.set("graphics", "display_res_x", str(width))
+    c.set("graphics", "display_res_y", str(height))
+    c.set("graphics", "res_scale", str(scale))
+    c.set("graphics", "res_dynamic", "0")
+    configs.append(c)
+
+  names = [ "%dx%d at %d%%" % l for l in ladder ]
+  results = run_configs(configs, names, repeats, log, history, slots)
+
+  return FFXIVScalingModel([ FFXIVScalingPoint(*l, r) for (l, r) in zip(ladder, results) ])
@@ -0,0 +1,251 @@
+from .config import clone_config
+from .remote import FFXIVRemoteSlot
+from . import benchmark
+from . import benchdir
+from . import prefixes
+
+import subprocess
+import threading
+import shutil
+import queue
+import os
+
+# Slots are the places a benchmark job can run on, typically one per
+# GPU. They are defined in the launcher config much like wine profiles:
+#
+#   [slot:gpu0]
+#   dri_prime = 0
+#   cpus = 0-7
+#
+#   [slot:gpu1]
+#   dri_prime = 1
+#   dxvk_filter_device_name = RX 7900
+#   cpus = 8-15
+#
+# Every slot runs one job at a time in its own wine prefix, which is a
+# clone of the configured prefix unless the slot sets 'prefix' itself.
+# A slot may instead name an agent on another machine to run its jobs,
+# see the remote module.
+SLOT_PREFIX = "slot:"
+
+# Slot options and the environment variable each of them sets
+SLOT_ENVIRONMENT = {
+  "dri_prime"               : "DRI_PRIME",
+  "mesa_vk_device_select"   : "MESA_VK_DEVICE_SELECT",
+  "dxvk_filter_device_name" : "DXVK_FILTER_DEVICE_NAME" }
+
+def get_default_slot_dir():
+  return os.getenv("XDG_CACHE_HOME", os.getenv("HOME") + "/.cache") + "/ffxiv_benchmark/slots"
+
+def get_slots(cfg):
+  return [ s[len(SLOT_PREFIX):] for s in cfg.sections() if s.startswith(SLOT_PREFIX) ]
+
+def is_remote_slot(cfg, name):
+  return cfg.has_option(SLOT_PREFIX + name, "agent")
+
+# Returns a local slot or one that runs its jobs on an agent
+def open_slot(cfg, name, slot_dir=None):
+  if is_remote_slot(cfg, name):
+    section = SLOT_PREFIX + name
+    return FFXIVRemoteSlot(name, cfg.get(section, "agent"), cfg.get(section, "token", fallback=None))
+
+  return FFXIVSlot(cfg, name, slot_dir)
+
+# Clones a wine prefix, using reflinks where the file system supports
+# them so that cloning is cheap. An existing clone is reused as is.
+def clone_prefix(source, target):
+  if os.path.isdir(target):
+    return
+
+  os.makedirs(os.path.dirname(target), exist_ok=True)
+
+  if not os.path.isdir(source):
+    # Let wine create the prefix on first use
+    os.mkdir(target)
+    return
+
+  # A clone left behind by a crash would make cp copy the prefix
+  # into a subdirectory of it instead
+  shutil.rmtree(target + ".tmp", ignore_errors=True)
+
+  subprocess.run([ "cp", "-a", "--reflink=auto", source, target + ".tmp" ], check=True)
+  os.rename(target + ".tmp", target)
+
+class FFXIVSlot:
+  def __init__(self, cfg, name, slot_dir=None):
+    section = SLOT_PREFIX + name
+
+    if not cfg.has_section(section):
+      raise ValueError("Unknown slot: " + name)
+
+    if slot_dir is None:
+      slot_dir = get_default_slot_dir()
+
+    self.name = name
+    self.base_dir = os.path.join(slot_dir, name)
+    self.prefix = cfg.get(section, "prefix", fallback=None)
+    self.cpus = cfg.get(section, "cpus", fallback=None)
+    self.environment = [ cfg.get(section, "environment", fallback="") ]
+
+    for (k, var) in SLOT_ENVIRONMENT.items():
+      if cfg.has_option(section, k):
+        self.environment.append(var + "=" + cfg.get(section, k))
+
+  # Returns the config to run a job with on this slot
+  def prepare(self, cfg):
+    result = clone_config(cfg)
+
+    prefix = self.prefix
+
+    # Runs from a template get a fresh prefix each time anyway
+    if prefix is None and cfg.get("wine", "prefix_mode") == prefixes.PREFIX_MODE_TEMPLATE:
+      prefix = cfg.get("wine", "prefix")
+    elif prefix is None:
+      prefix = os.path.join(self.base_dir, "prefix")
+      clone_prefix(cfg.get("wine", "prefix"), prefix)
+
+    # Concurrent runs must not share the benchmark config file
+    if cfg.get("benchmark", "view_mode") == benchdir.VIEW_MODE_NONE:
+      result.set("benchmark", "view_mode", benchdir.VIEW_MODE_AUTO)
+
+    result.set("wine", "prefix", prefix)
+    result.set("wine", "environment", " ".join([ cfg.get("wine", "environment") ] + self.environment).strip())
+    return result
+
+  def execute(self, wine_binary_path, benchmark_dir, environment, args, telemetry_interval=0.0):
+    wrapper = None
+
+    if not self.cpus is None:
+      wrapper = [ "taskset", "-c", self.cpus ]
+
+    return benchmark.run_benchmark(wine_binary_path, benchmark_dir,
+      environment, args, telemetry_interval, wrapper)
+
+  # Returns the return code and results of a run with the given config,
+  # which the results refer to the slot's own prefix and environment
+  def run(self, cfg):
+    run_cfg = self.prepare(cfg)
+    (returncode, result) = benchmark.FFXIVBenchmarkRunner(run_cfg, self.execute).run()
+
+    if not result is None:
+      result.cfg = run_cfg
+
+    return (returncode, result)
+
+class FFXIVJob:
+  def __init__(self, cfg, data=None):
+    self.cfg = cfg
+    self.data = data
+
+# Runs jobs concurrently, one per slot at a time. Results are handed to
+# the callback on the calling thread, in the order they finish, so that
+# the callback can write to files or the history database without
+# locking. The callback receives the job, the slot name, the return
+# code, the results and the exception the run failed with, if any, and
+# may return False to stop dispatching.
+def run_jobs(slots, jobs, on_result):
+  pending = queue.Queue()
+  finished = queue.Queue()
+  stop = threading.Event()
+
+  for job in jobs:
+    pending.put(job)
+
+  def worker(slot):
+    while not stop.is_set():
+      try:
+        job = pending.get_nowait()
+      except queue.Empty:
+        break
+
+      try:
+        (returncode, result) = slot.run(job.cfg)
+        error = None
+      except Exception as e:
+        (returncode, result, error) = (None, None, e)
+
+      finished.put((job, slot.name, returncode, result, error))
+
+    finished.put(None)
+
+  threads = [ threading.Thread(target=worker, args=(s,), daemon=True) for s in slots ]
+
+  for t in threads:
+    t.start()
+
+  active = len(threads)
+
+  while active > 0:
+    item = finished.get()
+
+    if item is None:
+      active -= 1
+      continue
+
+    if on_result(*item) == False:
+      stop.set()
+
+  for t in threads:
+    t.join()
+
+# Runs jobs on the given slots, or one after another in the calling
+# thread if there are none. The callback is the same as for run_jobs.
+def run_all(jobs, on_result, slots=None):
+  if not slots is None:
+    run_jobs(slots, jobs, on_result)
+    return
+
+  for job in jobs:
+    try:
+      (returncode, result) = benchmark.FFXIVBenchmarkRunner(job.cfg).run()
+      error = None
+    except Exception as e:
+      (returncode, result, error) = (None, None, e)
+
+    if on_result(job, None, returncode, result, error) == False:
+      break
+
+# Returns why a run failed as passed to the callback, or None if it
+# did not
+def get_failure(returncode, result, error):
+  if not error is None:
+    return str(error)
+
+  if returncode != 0:
+    return "return code " + str(returncode)
+
+  if result is None:
+    return "no results found"
+
+  return None
+
+# Runs each config the given number of times and returns the results of
+# every config as a list, in the order of the configs. Repeats are
+# interleaved so that drift affects all configs alike.
+def run_configs(configs, names, repeats, log, history=None, slots=None):
+  results = [ [ ] for c in configs ]
+  failed = [ ]
+
+  jobs = [ FFXIVJob(cfg, i) for r in range(repeats) for (i, cfg) in enumerate(configs) ]
+
+  def on_result(job, slot, returncode, result, error):
+    desc = names[job.data] + (" on " + slot if not slot is None else "")
+    failure = get_failure(returncode, result, error)
+
+    if not failure is None:
+      log(desc + ": failed, " + failure)
+      failed.append(desc + ": " + failure)
+      return False
+
+    log(desc + ": score " + str(result.score) + ", " + str(result.fps) + " fps")
+    results[job.data].append(result)
+
+    if not history is None:
+      history.add_result(job.cfg, result)
+
+  run_all(jobs, on_result, slots)
+
+  if len(failed) > 0:
+    raise RuntimeError(failed[0])
+
+  return results
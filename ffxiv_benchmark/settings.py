@@ -0,0 +1,215 @@
+SETTING_BOOL = "bool"
+SETTING_CHOICE = "choice"
+SETTING_INT = "int"
+
+# Describes a graphics option once: how it is stored in the launcher
+# config, how it is presented in the GUI, and which SYS.* arguments it
+# turns into on the benchmark command line.
+#
+# Choices are listed in the order the GUI shows them, which is the index
+# stored in the config. The benchmark usually counts the other way round,
+# which is what 'reverse' is for. Options that don't map to a single
+# argument provide a function returning (name, value) pairs instead.
+class FFXIVSetting:
+  def __init__(self, key, kind, default, label, group, choices=None, sys_names=None,
+      reverse=False, transform=None, widget=None, minimum=None, maximum=None):
+    self.key = key
+    self.kind = kind
+    self.default = default
+    self.label = label
+    self.group = group
+    self.choices = choices
+    self.sys_names = [ sys_names ] if isinstance(sys_names, str) else sys_names
+    self.reverse = reverse
+    self.transform = transform
+    self.widget = widget
+    self.minimum = minimum
+    self.maximum = maximum
+
+    # Arguments for every possible value of bool and choice options,
+    # so that building a command line is just a series of lookups.
+    self.args = None
+
+    if kind == SETTING_BOOL:
+      self.args = [ self.compute_args(v) for v in [ False, True ] ]
+    elif kind == SETTING_CHOICE:
+      self.args = [ self.compute_args(v) for v in range(len(choices)) ]
+
+  def compute_args(self, value):
+    if not self.transform is None:
+      pairs = self.transform(value)
+    else:
+      if self.kind == SETTING_BOOL:
+        value = int(value)
+      elif self.reverse:
+        value = len(self.choices) - 1 - value
+
+      pairs = [ (n, value) for n in self.sys_names ]
+
+    return [ "SYS." + n + "=" + str(v) for (n, v) in pairs ]
+
+  # Converts a config value, using the same rules as ConfigParser
+  def parse(self, value):
+    if self.kind == SETTING_BOOL:
+      return value.lower() in [ "1", "yes", "true", "on" ]
+
+    return int(value)
+
+  def get(self, cfg):
+    return self.parse(cfg.get("graphics", self.key))
+
+  def get_args(self, value):
+    if self.args is None:
+      return self.compute_args(value)
+
+    return self.args[int(value)]
+
+  # Returns an error message if the config value is not valid
+  def validate(self, value):
+    try:
+      if self.kind == SETTING_BOOL:
+        if not value.lower() in [ "0", "1", "true", "false", "yes", "no", "on", "off" ]:
+          raise ValueError()
+        return None
+
+      v = int(value)
+    except ValueError:
+      return "Invalid value for " + self.key + ": " + value
+
+    if self.kind == SETTING_CHOICE and (v < 0 or v >= len(self.choices)):
+      return "Value for " + self.key + " must be between 0 and " + str(len(self.choices) - 1)
+
+    if not self.minimum is None and (v < self.minimum or v > self.maximum):
+      return "Value for " + self.key + " must be between " + str(self.minimum) + " and " + str(self.maximum)
+
+    return None
+
+  # Returns a config value the way the GUI shows it
+  def describe(self, value):
+    v = self.parse(value)
+
+    if self.kind == SETTING_BOOL:
+      return "On" if v else "Off"
+    elif self.kind == SETTING_CHOICE:
+      return self.choices[v]
+
+    return str(v)
+
+def res_dynamic_args(value):
+  if value > 0:
+    return [ ("DynamicRezoType", 1), ("DynamicRezoThreshold", value - 1) ]
+
+  return [ ("DynamicRezoType", 0), ("DynamicRezoThreshold", 0) ]
+
+def texture_filter_args(value):
+  # Anisotropic filtering is a separate filter type with its own level
+  if value >= 3:
+    return [ ("TextureFilterQuality_DX11", 1), ("TextureAnisotropicQuality_DX11", 2) ]
+
+  return [ ("TextureFilterQuality_DX11", 2), ("TextureAnisotropicQuality_DX11", 2 - value) ]
+
+SETTING_GROUPS = [
+  ("display",   "Display mode"),
+  ("general",   "General"),
+  ("shadows",   "Shadows"),
+  ("effects",   "Effects"),
+  ("movement",  "Movement physics") ]
+
+GRAPHICS_SETTINGS = [
+  FFXIVSetting("display_mode", SETTING_CHOICE, "0", "Mode", "display",
+    choices=[ "Windowed", "Fullscreen", "Borderless" ], sys_names="ScreenMode"),
+  FFXIVSetting("display_res_x", SETTING_INT, "1280", "Width", "display",
+    sys_names=[ "ScreenWidth", "FullScreenWidth" ]),
+  FFXIVSetting("display_res_y", SETTING_INT, "720", "Height", "display",
+    sys_names=[ "ScreenHeight", "FullScreenHeight" ]),
+  FFXIVSetting("res_scale", SETTING_INT, "100", "Resolution scale", "display",
+    sys_names="GraphicsRezoScale", widget="slider", minimum=50, maximum=100),
+  FFXIVSetting("res_dynamic", SETTING_CHOICE, "0", "Dynamic resolution", "display",
+    choices=[ "Disabled", "Always enabled", "Below 30 FPS", "Below 60 FPS" ], transform=res_dynamic_args),
+  FFXIVSetting("upscaler", SETTING_CHOICE, "0", "Upscaler", "display",
+    choices=[ "FSR 1.0", "DLSS (untested)" ], sys_names="GraphicsRezoUpscaleType"),
+
+  FFXIVSetting("lod", SETTING_BOOL, "False", "Use lower LOD for distant objects", "general",
+    sys_names="LodType_DX11"),
+  FFXIVSetting("anti_aliasing_type", SETTING_CHOICE, "0", "Anti-aliasing", "general",
+    choices=[ "TSCMAA", "TSCMAA + Camera jitter", "FXAA", "Off" ], sys_names="AntiAliasing_DX11", reverse=True),
+  FFXIVSetting("reflection", SETTING_CHOICE, "0", "Reflections", "general",
+    choices=[ "Maximum", "High", "Normal", "Off" ], sys_names="ReflectionType_DX11", reverse=True),
+  FFXIVSetting("translucent", SETTING_CHOICE, "0", "Transparent lighting", "general",
+    choices=[ "High", "Normal" ], sys_names="TranslucentQuality_DX11", reverse=True),
+  FFXIVSetting("grass_quality", SETTING_CHOICE, "0", "Grass quality", "general",
+    choices=[ "High", "Normal", "Low", "Off" ], sys_names="GrassQuality_DX11", reverse=True),
+  FFXIVSetting("dynamic_grass", SETTING_BOOL, "False", "Enable dynamic grass interaction", "general",
+    sys_names="GrassEnableDynamicInterference"),
+  FFXIVSetting("parallax_occlusion", SETTING_CHOICE, "0", "Parallax Occlusion", "general",
+    choices=[ "High", "Standard" ], sys_names="ParallaxOcclusion_DX11", reverse=True),
+  FFXIVSetting("tessellation", SETTING_CHOICE, "0", "Tessellation", "general",
+    choices=[ "High", "Standard" ], sys_names="Tessellation_DX11", reverse=True),
+  FFXIVSetting("glare", SETTING_CHOICE, "0", "Glare", "general",
+    choices=[ "Standard", "Off" ], sys_names="GlareRepresentation_DX11", reverse=True),
+  FFXIVSetting("texture_res", SETTING_CHOICE, "0", "Texture resolution", "general",
+    choices=[ "High", "Normal" ], sys_names="TextureRezoType", reverse=True),
+  FFXIVSetting("texture_filter", SETTING_CHOICE, "0", "Texture filter", "general",
+    choices=[ "16x Anisotropic", "8x Anisotropic", "4x Anisotropic", "Trilinear" ], transform=texture_filter_args),
+
+  FFXIVSetting("shadow_lod", SETTING_BOOL, "0", "Low character shadow LOD", "shadows",
+    sys_names="ShadowLOD_DX11"),
+  FFXIVSetting("shadow_lod_scene", SETTING_BOOL, "0", "Low scene shadow LOD", "shadows",
+    sys_names="ShadowBgLOD"),
+  FFXIVSetting("shadow_self", SETTING_BOOL, "True", "Player character shadows", "shadows",
+    sys_names="ShadowVisibilityTypeSelf_DX11"),
+  FFXIVSetting("shadow_other", SETTING_BOOL, "True", "Other character shadows", "shadows",
+    sys_names="ShadowVisibilityTypeOther_DX11"),
+  FFXIVSetting("shadow_resolution", SETTING_CHOICE, "0", "Shadow resolution", "shadows",
+    choices=[ "High (2048)", "Normal (1024)", "Low (512)" ], sys_names="ShadowTextureSizeType_DX11", reverse=True),
+  FFXIVSetting("shadow_cascading", SETTING_CHOICE, "0", "Shadow cascades", "shadows",
+    choices=[ "Best", "Normal", "Off" ], sys_names="ShadowCascadeCountType_DX11", reverse=True),
+  FFXIVSetting("shadow_soft", SETTING_CHOICE, "0", "Shadow softening", "shadows",
+    choices=[ "Strongest", "Strong", "Weak" ], sys_names="ShadowSoftShadowType_DX11", reverse=True),
+  FFXIVSetting("shadow_casters", SETTING_CHOICE, "0", "Shadow casters", "shadows",
+    choices=[ "Maximum", "Normal", "Minimum" ], sys_names="ShadowLightValidType", reverse=True),
+
+  FFXIVSetting("vignette", SETTING_BOOL, "True", "Vignette", "effects",
+    sys_names="Vignetting_DX11"),
+  FFXIVSetting("radial_blur", SETTING_BOOL, "True", "Radial blur", "effects",
+    sys_names="RadialBlur_DX11"),
+  FFXIVSetting("depth_of_field", SETTING_BOOL, "True", "Depth of field", "effects",
+    sys_names="DepthOfField_DX11"),
+  FFXIVSetting("ssao", SETTING_CHOICE, "0", "Ambient occlusion", "effects",
+    choices=[ "GTAO (Quality)", "GTAO (Standard)", "HBAO+ (Quality)", "HBAO+ (Standard)", "Strong", "Weak", "Off" ],
+    sys_names="SSAO_DX11", reverse=True),
+  FFXIVSetting("glare_effect", SETTING_CHOICE, "0", "Glare", "effects",
+    choices=[ "Normal", "Low", "Off" ], sys_names="Glare_DX11", reverse=True),
+  FFXIVSetting("water_refraction", SETTING_CHOICE, "0", "Water refraction", "effects",
+    choices=[ "Normal", "Low", "Off" ], sys_names="DistortionWater_DX11", reverse=True),
+
+  FFXIVSetting("movement_self", SETTING_CHOICE, "0", "Player character", "movement",
+    choices=[ "Full", "Simple", "Off" ], sys_names="PhysicsTypeSelf_DX11", reverse=True, widget="radio"),
+  FFXIVSetting("movement_other", SETTING_CHOICE, "0", "Other characters", "movement",
+    choices=[ "Full", "Simple", "Off" ], sys_names="PhysicsTypeOther_DX11", reverse=True, widget="radio") ]
+
+SETTINGS_BY_KEY = dict([ (s.key, s) for s in GRAPHICS_SETTINGS ])
+
+def get_setting(key):
+  return SETTINGS_BY_KEY.get(key)
+
+def get_defaults():
+  return dict([ (s.key, s.default) for s in GRAPHICS_SETTINGS ])
+
+# Returns an error message for the first invalid graphics setting
+def validate_config(cfg):
+  for s in GRAPHICS_SETTINGS:
+    error = s.validate(cfg.get("graphics", s.key))
+
+    if not error is None:
+      return error
+
+  return None
+
+def build_args(cfg):
+  result = [ ]
+
+  for s in GRAPHICS_SETTINGS:
+    result += s.get_args(s.get(cfg))
+
+  return result
@@ -0,0 +1,89 @@
+import tempfile
+import shutil
+import os
+
+SHADER_CACHE_DEFAULT = "default"
+SHADER_CACHE_COLD = "cold"
+SHADER_CACHE_WARM = "warm"
+
+SHADER_CACHE_MODES = [ SHADER_CACHE_DEFAULT, SHADER_CACHE_COLD, SHADER_CACHE_WARM ]
+
+# Environment variable pointing each cache to its own subdirectory, so
+# that the size of every cache can be reported separately.
+SHADER_CACHE_DIRS = {
+  "dxvk"  : "DXVK_STATE_CACHE_PATH",
+  "nvidia": "__GL_SHADER_DISK_CACHE_PATH",
+  "mesa"  : "MESA_SHADER_CACHE_DIR" }
+
+# A private set of shader caches in a temporary directory, which starts
+# out empty and is deleted afterwards.
+class FFXIVShaderCache:
+  def __init__(self):
+    self.cache_dir = tempfile.mkdtemp(prefix="ffxiv_benchmark_shadercache_")
+
+    for name in SHADER_CACHE_DIRS.keys():
+      os.mkdir(os.path.join(self.cache_dir, name))
+
+  def update_environment(self, environment):
+    for (name, var) in SHADER_CACHE_DIRS.items():
+      environment[var] = os.path.join(self.cache_dir, name)
+
+    # The NVIDIA driver would otherwise clean up the cache
+    # behind our back, or not use it at all
+    environment["__GL_SHADER_DISK_CACHE"] = "1"
+    environment["__GL_SHADER_DISK_CACHE_SKIP_CLEANUP"] = "1"
+
+  def get_sizes(self):
+    result = { }
+
+    for name in SHADER_CACHE_DIRS.keys():
+      size = 0
+
+      for (root, dirs, files) in os.walk(os.path.join(self.cache_dir, name)):
+        for f in files:
+          try:
+            size += os.path.getsize(os.path.join(root, f))
+          except OSError:
+            pass
+
+      result[name] = size
+
+    return result
+
+  def cleanup(self):
+    shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+# Returns cache sizes after a run along with how much each cache grew
+# during it. On a warm cache, growth means the run hit shaders that
+# were not compiled before.
+def get_cache_metrics(before, after):
+  result = { }
+
+  for name in after.keys():
+    result["shader_cache_" + name + "_bytes"] = after[name]
+    result["shader_cache_" + name + "_growth_bytes"] = after[name] - before.get(name, 0)
+
+  return result
+
+def get_metric_names():
+  return [ "shader_cache_" + name + suffix for name in SHADER_CACHE_DIRS.keys()
+    for suffix in [ "_bytes", "_growth_bytes" ] ]
+
+def format_metrics(metrics):
+  lines = [ ]
+
+  if "cold_score" in metrics:
+    line = "Cold cache: score %.0f, %.1f fps" % (metrics["cold_score"], metrics["cold_fps"])
+
+    if "cold_stutters" in metrics:
+      line += ", %d stutters" % metrics["cold_stutters"]
+
+    lines.append(line)
+
+  sizes = [ k + " " + str(int(metrics["shader_cache_" + k + "_bytes"]) // 1024) + " KiB"
+    for k in SHADER_CACHE_DIRS.keys() if metrics["shader_cache_" + k + "_bytes"] > 0 ]
+
+  if len(sizes) > 0:
+    lines.append("Shader caches: " + ", ".join(sizes))
+
+  return "\n".join(lines)
@@ -0,0 +1,232 @@
+import statistics
+import math
+
+# Regularized incomplete beta function, evaluated through its continued
+# fraction representation. This is all that is needed for Student's t
+# distribution, so there is no need to depend on SciPy for it.
+def betacf(a, b, x):
+  fpmin = 1.0e-300
+
+  qab = a + b
+  qap = a + 1.0
+  qam = a - 1.0
+
+  c = 1.0
+  d = 1.0 - qab * x / qap
+
+  if abs(d) < fpmin:
+    d = fpmin
+
+  d = 1.0 / d
+  h = d
+
+  for m in range(1, 300):
+    m2 = 2 * m
+
+    aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+    d = 1.0 + aa * d
+    c = 1.0 + aa / c
+
+    if abs(d) < fpmin:
+      d = fpmin
+
+    if abs(c) < fpmin:
+      c = fpmin
+
+    d = 1.0 / d
+    h *= d * c
+
+    aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+    d = 1.0 + aa * d
+    c = 1.0 + aa / c
+
+    if abs(d) < fpmin:
+      d = fpmin
+
+    if abs(c) < fpmin:
+      c = fpmin
+
+    d = 1.0 / d
+    delta = d * c
+    h *= delta
+
+    if abs(delta - 1.0) < 1.0e-14:
+      break
+
+  return h
+
+def betai(a, b, x):
+  if x <= 0.0:
+    return 0.0
+
+  if x >= 1.0:
+    return 1.0
+
+  bt = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) +
+    a * math.log(x) + b * math.log(1.0 - x))
+
+  if x < (a + 1.0) / (a + b + 2.0):
+    return bt * betacf(a, b, x) / a
+
+  return 1.0 - bt * betacf(b, a, 1.0 - x) / b
+
+def student_t_cdf(t, df):
+  tail = 0.5 * betai(0.5 * df, 0.5, df / (df + t * t))
+
+  if t >= 0:
+    return 1.0 - tail
+
+  return tail
+
+def student_t_ppf(p, df):
+  lo = -1.0e3
+  hi = 1.0e3
+
+  for i in range(200):
+    mid = 0.5 * (lo + hi)
+
+    if student_t_cdf(mid, df) < p:
+      lo = mid
+    else:
+      hi = mid
+
+  return 0.5 * (lo + hi)
+
+class FFXIVSummary:
+  def __init__(self, values, confidence=0.95):
+    self.n = len(values)
+    self.mean = statistics.fmean(values) if self.n > 0 else 0.0
+    self.stdev = statistics.stdev(values) if self.n > 1 else 0.0
+    self.confidence = confidence
+
+    self.cv = None
+    self.ci = None
+
+    if self.mean != 0.0:
+      self.cv = self.stdev / self.mean
+
+    if self.n > 1:
+      t = student_t_ppf(0.5 * (1.0 + confidence), self.n - 1)
+      self.ci = t * self.stdev / math.sqrt(self.n)
+
+  # Half-width of the confidence interval relative to the mean
+  def relative_ci(self):
+    if self.ci is None or self.mean == 0.0:
+      return None
+
+    return self.ci / abs(self.mean)
+
+  def format(self, precision=0):
+    result = "%.*f" % (precision, self.mean)
+
+    if not self.ci is None:
+      result += " ± %.*f (%d%% CI)" % (precision, self.ci, int(round(self.confidence * 100)))
+      result += ", σ %.*f, CV %.1f%%" % (precision + 1, self.stdev, 100.0 * (self.cv or 0.0))
+
+    return result + ", n=" + str(self.n)
+
+# Tracks the results of a benchmark that is run repeatedly with the
+# same settings. The first runs are considered warm-up and discarded,
+# and the series can end early once the score is known precisely enough.
+class FFXIVRunSeries:
+  # Don't trust a tight interval computed from just two samples
+  MIN_RUNS_FOR_EARLY_STOP = 3
+
+  def __init__(self, runs, warmup=0, ci_target=None):
+    self.runs = max(1, runs)
+    self.warmup = max(0, warmup)
+    self.ci_target = ci_target if ci_target else None
+    self.completed = 0
+    self.scores = [ ]
+    self.fps = [ ]
+
+  def is_warmup(self):
+    return self.completed < self.warmup
+
+  def add(self, score, fps):
+    if not self.is_warmup():
+      self.scores.append(float(score))
+      self.fps.append(float(fps))
+
+    self.completed += 1
+
+  def is_done(self):
+    if len(self.scores) >= self.runs:
+      return True
+
+    if self.ci_target is None or len(self.scores) < self.MIN_RUNS_FOR_EARLY_STOP:
+      return False
+
+    ci = FFXIVSummary(self.scores).relative_ci()
+    return not ci is None and ci <= self.ci_target
+
+  def describe_next(self):
+    if self.is_warmup():
+      return "Warm-up run " + str(self.completed + 1) + "/" + str(self.warmup)
+
+    return "Run " + str(len(self.scores) + 1) + "/" + str(self.runs)
+
+  def score_summary(self):
+    return FFXIVSummary(self.scores)
+
+  def fps_summary(self):
+    return FFXIVSummary(self.fps)
+
+def normal_cdf(x):
+  return 0.5 * math.erfc(-x / math.sqrt(2.0))
+
+# Welch's t-test for two samples with possibly different variances.
+# Returns the t statistic and the two-sided p-value.
+def welch_t_test(a, b):
+  if len(a) < 2 or len(b) < 2:
+    return (None, None)
+
+  va = statistics.variance(a) / len(a)
+  vb = statistics.variance(b) / len(b)
+
+  if va + vb == 0.0:
+    return (None, None)
+
+  t = (statistics.fmean(a) - statistics.fmean(b)) / math.sqrt(va + vb)
+  df = (va + vb) ** 2 / (va ** 2 / (len(a) - 1) + vb ** 2 / (len(b) - 1))
+  return (t, betai(0.5 * df, 0.5, df / (df + t * t)))
+
+# Mann-Whitney U test using the normal approximation with tie
+# correction. Returns U for the first sample and the two-sided p-value.
+def mann_whitney_u_test(a, b):
+  n1 = len(a)
+  n2 = len(b)
+
+  if n1 == 0 or n2 == 0:
+    return (None, None)
+
+  values = sorted([ (v, 0) for v in a ] + [ (v, 1) for v in b ])
+  rank_sum = 0.0
+  tie_sum = 0.0
+  i = 0
+
+  while i < len(values):
+    j = i
+
+    while j + 1 < len(values) and values[j + 1][0] == values[i][0]:
+      j += 1
+
+    rank = 0.5 * (i + j) + 1.0
+    ties = j - i + 1
+    tie_sum += ties ** 3 - ties
+
+    for k in range(i, j + 1):
+      if values[k][1] == 0:
+        rank_sum += rank
+
+    i = j + 1
+
+  u = rank_sum - n1 * (n1 + 1) / 2.0
+  n = n1 + n2
+  sigma = math.sqrt(n1 * n2 / 12.0 * ((n + 1) - tie_sum / (n * (n - 1)))) if n > 1 else 0.0
+
+  if sigma == 0.0:
+    return (u, None)
+
+  z = (abs(u - n1 * n2 / 2.0) - 0.5) / sigma
+  return (u, min(1.0, 2.0 * (1.0 - normal_cdf(z))))
@@ -0,0 +1,242 @@
+from configparser import ConfigParser
+
+from .config import clone_config
+from .hostinfo import get_host_info
+from .export import build_result_row, drop_unknown
+from .scheduler import FFXIVJob, get_failure, run_jobs
+from . import benchmark
+from . import settings
+
+import itertools
+import csv
+import os
+
+SWEEP_PRESET_KEY = "preset"
+
+# Sweep specs are plain INI files listing the values to try for each
+# graphics option, using the same indices as the launcher config:
+#
+#   [graphics]
+#   ssao = 0, 3, 6
+#   shadow_resolution = 0, 1, 2
+#   res_scale = 50, 75, 100
+#
+# The special 'preset' key lists presets to start from. A preset is
+# applied before the other options of a combination, which override it.
+class FFXIVSweepSpec:
+  def __init__(self, file_path, library=None):
+    self.library = library
+    spec = ConfigParser()
+
+    if len(spec.read(file_path)) == 0:
+      raise ValueError("Failed to read sweep spec " + file_path)
+
+    if not spec.has_section("graphics"):
+      raise ValueError("Sweep spec " + file_path + " has no [graphics] section")
+
+    self.keys = [ ]
+    self.values = [ ]
+
+    for (k, v) in spec.items("graphics"):
+      values = [ x.strip() for x in v.split(",") if x.strip() != "" ]
+
+      if len(values) == 0:
+        raise ValueError("No values given for " + k)
+
+      self.keys.append(k)
+      self.values.append(values)
+
+  def validate(self, cfg):
+    for (k, values) in zip(self.keys, self.values):
+      if k == SWEEP_PRESET_KEY:
+        for v in values:
+          if self.library is None or not self.library.has(v):
+            raise ValueError("Unknown preset: " + v)
+
+          # Catches broken base presets up front
+          self.library.get(v)
+        continue
+
+      setting = settings.get_setting(k)
+
+      if setting is None:
+        raise ValueError("Invalid graphics option: " + k)
+
+      for v in values:
+        error = setting.validate(v)
+
+        if not error is None:
+          raise ValueError(error)
+
+  def combinations(self):
+    return itertools.product(*self.values)
+
+  def count(self):
+    result = 1
+
+    for v in self.values:
+      result *= len(v)
+
+    return result
+
+  def apply(self, cfg, combination):
+    result = clone_config(cfg)
+    values = dict(zip(self.keys, combination))
+
+    if SWEEP_PRESET_KEY in values:
+      for (k, v) in self.library.get(values.pop(SWEEP_PRESET_KEY)).items():
+        result.set("graphics", k, v)
+
+    for (k, v) in values.items():
+      result.set("graphics", k, v)
+
+    return result
+
+class FFXIVSweepResults:
+  def __init__(self, file_path, keys):
+    self.file_path = file_path
+    self.header = keys + [ "score", "fps" ]
+    self.results = { }
+
+    if os.path.isfile(file_path):
+      self.truncate_partial_line()
+
+    if os.path.isfile(file_path) and os.path.getsize(file_path) > 0:
+      self.load()
+      self.file = open(file_path, "a", newline="")
+      self.writer = csv.writer(self.file)
+    else:
+      self.file = open(file_path, "w", newline="")
+      self.writer = csv.writer(self.file)
+      self.writer.writerow(self.header)
+      self.flush()
+
+  def load(self):
+    with open(self.file_path, newline="") as f:
+      reader = csv.reader(f)
+      header = next(reader, None)
+
+      if header != self.header:
+        raise ValueError("Existing results in " + self.file_path + " do not match the sweep spec")
+
+      for row in reader:
+        if len(row) != len(self.header):
+          continue
+
+        self.results[tuple(row[:-2])] = (row[-2], row[-1])
+
+  # A partially written last line means we crashed mid-write. It is cut
+  # off, so that it neither stays in the file nor swallows the first
+  # new result.
+  def truncate_partial_line(self):
+    with open(self.file_path, "rb+") as f:
+      data = f.read()
+      end = data.rfind(b"\n") + 1
+
+      if end < len(data):
+        f.truncate(end)
+
+  def has(self, combination):
+    return tuple(combination) in self.results
+
+  def add(self, combination, score, fps):
+    self.results[tuple(combination)] = (score, fps)
+    self.writer.writerow(list(combination) + [ score, fps ])
+    self.flush()
+
+  def flush(self):
+    self.file.flush()
+    os.fsync(self.file.fileno())
+
+  def close(self):
+    self.file.close()
+
+# Runs all combinations that have no results yet. Given a list of
+# slots, combinations are run concurrently, one per slot at a time.
+# Full reports of every run go to the given export, if any.
+def run_sweep(cfg, spec, output_path, dry_run, log, history=None, slots=None, export=None):
+  spec.validate(cfg)
+
+  total = spec.count()
+  results = None
+  failed = 0
+  jobs = [ ]
+  dropped = set()
+
+  if not dry_run:
+    results = FFXIVSweepResults(output_path, spec.keys)
+
+  def on_result(job, slot, returncode, result, error):
+    nonlocal failed
+    (prefix, desc, combination) = job.data
+
+    if not slot is None:
+      desc += " on " + slot
+
+    failure = get_failure(returncode, result, error)
+
+    if not failure is None:
+      log(prefix + desc + ": failed, " + failure)
+      failed += 1
+      return
+
+    results.add(combination, result.score, result.fps)
+    run_id = None
+
+    if not history is None:
+      run_id = history.add_result(job.cfg, result)
+
+    if not export is None:
+      run_cfg = result.cfg if not result.cfg is None else job.cfg
+      host = result.host if not result.host is None else get_host_info(run_cfg)
+      row = build_result_row(job.cfg, result, host, run_id)
+
+      # Results the benchmark added that the export has no column for
+      # are left out rather than failing the sweep
+      for k in drop_unknown(export.get_columns(), row):
+        if not k in dropped:
+          log("Warning: " + k + " is not a column of the export, use JSON Lines to export every metric")
+          dropped.add(k)
+
+      export.write(row)
+
+    log(prefix + desc + ": score " + str(result.score) + ", " + str(result.fps) + " fps")
+
+  try:
+    for (index, combination) in enumerate(spec.combinations()):
+      run_cfg = spec.apply(cfg, combination)
+
+      desc = ", ".join([ k + "=" + v for (k, v) in zip(spec.keys, combination) ])
+      prefix = "[" + str(index + 1) + "/" + str(total) + "] "
+
+      if dry_run:
+        log(prefix + " ".join([ run_cfg.get("wine", "path"),
+          benchmark.get_benchmark_exe_path(run_cfg.get("benchmark", "path")) ] +
+          benchmark.build_cmdline(run_cfg, False)))
+        continue
+
+      if results.has(combination):
+        log(prefix + desc + ": skipped, results exist")
+        continue
+
+      jobs.append(FFXIVJob(run_cfg, (prefix, desc, combination)))
+
+    if not slots is None:
+      run_jobs(slots, jobs, on_result)
+      return failed
+
+    for job in jobs:
+      log(job.data[0] + job.data[1] + ": running")
+
+      try:
+        (returncode, result) = benchmark.FFXIVBenchmarkRunner(job.cfg).run()
+        error = None
+      except Exception as e:
+        (returncode, result, error) = (None, None, e)
+
+      on_result(job, None, returncode, result, error)
+  finally:
+    if not results is None:
+      results.close()
+
+  return failed
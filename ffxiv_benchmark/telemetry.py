@@ -0,0 +1,294 @@
+from array import array
+
+import threading
+import time
+import glob
+import os
+
+# Channels recorded per sample. Everything is stored as 32-bit floats
+# in preallocated ring buffers, so sampling allocates no Python objects
+# beyond the handful needed to parse the proc files.
+TELEMETRY_CHANNELS = [
+  "time",               # seconds since the sampler was started
+  "process_cpu",        # CPU usage of the benchmark process tree, in % of one core
+  "process_rss",        # resident memory of the benchmark process tree, in MiB
+  "system_cpu",         # overall CPU usage, in %
+  "cpu_freq",           # average current CPU frequency, in MHz
+  "temperature",        # hottest hwmon sensor, in °C
+  "gpu_busy",           # GPU usage as reported by amdgpu, in %
+  "gpu_vram" ]          # VRAM in use as reported by amdgpu, in MiB
+
+TELEMETRY_UNITS = {
+  "process_cpu"         : "%",
+  "process_rss"         : "MiB",
+  "system_cpu"          : "%",
+  "cpu_freq"            : "MHz",
+  "temperature"         : "°C",
+  "gpu_busy"            : "%",
+  "gpu_vram"            : "MiB" }
+
+# Two hours at one sample per second
+TELEMETRY_CAPACITY = 7200
+
+# Names of the figures FFXIVTelemetryBuffer.get_summary may return
+def get_summary_names():
+  return [ "telemetry_" + c + "_" + s for c in TELEMETRY_CHANNELS[1:] for s in [ "min", "avg", "max" ] ]
+
+class FFXIVTelemetryBuffer:
+  def __init__(self, interval, capacity=TELEMETRY_CAPACITY):
+    self.interval = interval
+    self.capacity = capacity
+    self.count = 0
+    self.data = dict([ (c, array("f", bytes(4 * capacity))) for c in TELEMETRY_CHANNELS ])
+
+  def add(self, values):
+    index = self.count % self.capacity
+
+    for (c, v) in zip(TELEMETRY_CHANNELS, values):
+      self.data[c][index] = v
+
+    self.count += 1
+
+  def __len__(self):
+    return min(self.count, self.capacity)
+
+  # Returns the samples of one channel in chronological order
+  def get(self, channel):
+    data = self.data[channel]
+
+    if self.count <= self.capacity:
+      return data[:self.count]
+
+    index = self.count % self.capacity
+    return data[index:] + data[:index]
+
+  def get_summary(self):
+    result = { }
+
+    if len(self) == 0:
+      return result
+
+    for c in TELEMETRY_CHANNELS[1:]:
+      values = self.get(c)
+
+      # Channels whose source does not exist on this system are all zero
+      if max(values) == 0.0:
+        continue
+
+      result["telemetry_" + c + "_min"] = min(values)
+      result["telemetry_" + c + "_avg"] = sum(values) / len(values)
+      result["telemetry_" + c + "_max"] = max(values)
+
+    return result
+
+def open_files(pattern):
+  result = [ ]
+
+  for path in sorted(glob.glob(pattern)):
+    try:
+      result.append(os.open(path, os.O_RDONLY))
+    except OSError:
+      pass
+
+  return result
+
+def read_fd(fd):
+  try:
+    return os.pread(fd, 4096, 0)
+  except OSError:
+    return b""
+
+def read_int(fd):
+  try:
+    return int(read_fd(fd))
+  except ValueError:
+    return 0
+
+# Samples system and process statistics on a background thread while
+# the benchmark is running. Files that are read on every sample are
+# opened once and re-read with pread.
+class FFXIVTelemetrySampler(threading.Thread):
+  # How often to look for new processes in the benchmark's process tree
+  TREE_REFRESH_INTERVAL = 2.0
+
+  def __init__(self, pid, interval):
+    super(FFXIVTelemetrySampler, self).__init__(daemon=True)
+    self.pid = pid
+    self.interval = interval
+    self.buffer = FFXIVTelemetryBuffer(interval)
+    self.stop_event = threading.Event()
+
+    self.clock_ticks = os.sysconf("SC_CLK_TCK")
+    self.page_size = os.sysconf("SC_PAGE_SIZE")
+
+    self.fd_proc_stat = os.open("/proc/stat", os.O_RDONLY)
+    self.fds_cpu_freq = open_files("/sys/devices/system/cpu/cpu[0-9]*/cpufreq/scaling_cur_freq")
+    self.fds_temperature = open_files("/sys/class/hwmon/hwmon*/temp*_input")
+    self.fds_gpu_busy = open_files("/sys/class/drm/card[0-9]*/device/gpu_busy_percent")
+    self.fds_gpu_vram = open_files("/sys/class/drm/card[0-9]*/device/mem_info_vram_used")
+
+    self.process_fds = { }
+    self.tree_refresh_time = 0.0
+
+  def stop(self):
+    self.stop_event.set()
+
+    if self.is_alive():
+      self.join()
+
+    if self.fd_proc_stat is None:
+      return
+
+    for fd in ([ self.fd_proc_stat ] + self.fds_cpu_freq + self.fds_temperature +
+        self.fds_gpu_busy + self.fds_gpu_vram + list(self.process_fds.values())):
+      os.close(fd)
+
+    self.fd_proc_stat = None
+    self.process_fds = { }
+
+  def run(self):
+    start_time = time.monotonic()
+    last_time = start_time
+
+    self.refresh_process_tree()
+    self.tree_refresh_time = start_time
+
+    last_process_cpu = self.get_process_cpu_time()[0]
+    last_system_cpu = self.get_system_cpu_time()
+
+    while not self.stop_event.wait(self.interval):
+      now = time.monotonic()
+
+      if now - self.tree_refresh_time >= self.TREE_REFRESH_INTERVAL:
+        self.refresh_process_tree()
+        self.tree_refresh_time = now
+
+      (process_cpu, process_rss) = self.get_process_cpu_time()
+      system_cpu = self.get_system_cpu_time()
+
+      elapsed = now - last_time
+      system_total = system_cpu[0] - last_system_cpu[0]
+      system_idle = system_cpu[1] - last_system_cpu[1]
+
+      self.buffer.add((
+        now - start_time,
+        # Exiting processes take their CPU time with them
+        100.0 * max(0.0, process_cpu - last_process_cpu) / elapsed if elapsed > 0.0 else 0.0,
+        process_rss / 1048576.0,
+        100.0 * (1.0 - system_idle / system_total) if system_total > 0 else 0.0,
+        self.get_cpu_freq(),
+        max([ read_int(fd) for fd in self.fds_temperature ], default=0) / 1000.0,
+        max([ read_int(fd) for fd in self.fds_gpu_busy ], default=0),
+        max([ read_int(fd) for fd in self.fds_gpu_vram ], default=0) / 1048576.0))
+
+      last_time = now
+      last_process_cpu = process_cpu
+      last_system_cpu = system_cpu
+
+  # Wine starts a number of helper processes, so track the entire
+  # process tree below the one we launched.
+  def refresh_process_tree(self):
+    children = { }
+
+    for name in os.listdir("/proc"):
+      if not name.isdigit():
+        continue
+
+      try:
+        with open("/proc/" + name + "/stat", "rb") as f:
+          fields = f.read().rsplit(b")", 1)[1].split()
+      except (OSError, IndexError):
+        continue
+
+      children.setdefault(int(fields[1]), [ ]).append(int(name))
+
+    tree = set()
+    pending = [ self.pid ]
+
+    while len(pending) > 0:
+      pid = pending.pop()
+      tree.add(pid)
+      pending += [ c for c in children.get(pid, [ ]) if not c in tree ]
+
+    for pid in list(self.process_fds.keys()):
+      if not pid in tree:
+        os.close(self.process_fds.pop(pid))
+
+    for pid in tree:
+      if not pid in self.process_fds:
+        try:
+          self.process_fds[pid] = os.open("/proc/" + str(pid) + "/stat", os.O_RDONLY)
+        except OSError:
+          pass
+
+  # Returns the accumulated CPU time in seconds and resident memory
+  # in bytes. The rss field in stat is the same figure that status
+  # reports as VmRSS, so a single read per process suffices.
+  def get_process_cpu_time(self):
+    ticks = 0
+    rss = 0
+
+    for fd in self.process_fds.values():
+      try:
+        fields = read_fd(fd).rsplit(b")", 1)[1].split()
+        ticks += int(fields[11]) + int(fields[12])
+        rss += int(fields[21])
+      except (IndexError, ValueError):
+        continue
+
+    return (ticks / self.clock_ticks, rss * self.page_size)
+
+  def get_system_cpu_time(self):
+    fields = read_fd(self.fd_proc_stat).split(b"\n", 1)[0].split()[1:]
+    values = [ int(f) for f in fields ]
+
+    # idle and iowait
+    return (sum(values), values[3] + values[4])
+
+  def get_cpu_freq(self):
+    if len(self.fds_cpu_freq) == 0:
+      return 0.0
+
+    return sum([ read_int(fd) for fd in self.fds_cpu_freq ]) / (1000.0 * len(self.fds_cpu_freq))
+
+SPARKLINE_CHARS = "▁▂▃▄▅▆▇█"
+
+def format_sparkline(values, width=60):
+  if len(values) == 0:
+    return ""
+
+  # Average samples into buckets if there are more than fit
+  buckets = [ ]
+  step = max(1.0, len(values) / width)
+  i = 0.0
+
+  while int(i) < len(values):
+    chunk = values[int(i):max(int(i) + 1, int(i + step))]
+    buckets.append(sum(chunk) / len(chunk))
+    i += step
+
+  lo = min(buckets)
+  hi = max(buckets)
+
+  if hi == lo:
+    return SPARKLINE_CHARS[0] * len(buckets)
+
+  scale = (len(SPARKLINE_CHARS) - 1) / (hi - lo)
+  return "".join([ SPARKLINE_CHARS[int((v - lo) * scale)] for v in buckets ])
+
+def format_telemetry(channels):
+  lines = [ ]
+
+  for c in TELEMETRY_CHANNELS[1:]:
+    values = channels.get(c)
+
+    if values is None or len(values) == 0 or max(values) == 0.0:
+      continue
+
+    lines.append("%-12s %8.1f %8.1f %8.1f %-4s %s" % (c, min(values),
+      sum(values) / len(values), max(values), TELEMETRY_UNITS[c], format_sparkline(values)))
+
+  if len(lines) > 0:
+    lines.insert(0, "%-12s %8s %8s %8s" % ("", "min", "avg", "max"))
+
+  return "\n".join(lines)
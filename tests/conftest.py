@@ -0,0 +1,24 @@
+from ffxiv_benchmark.config import FFXIVBenchmarkConfig
+from ffxiv_benchmark import fakewine
+
+import pytest
+import os
+
+# A launcher config that runs the fake benchmark through the fake wine,
+# with everything the launcher writes kept inside the test directory
+@pytest.fixture
+def fake_cfg(tmp_path, monkeypatch):
+  for var in [ "XDG_CONFIG_HOME", "XDG_DATA_HOME", "XDG_CACHE_HOME" ]:
+    monkeypatch.setenv(var, str(tmp_path / var.lower()))
+
+  benchmark_dir = str(tmp_path / "benchmark")
+  fakewine.create_benchmark(benchmark_dir)
+
+  cfg = FFXIVBenchmarkConfig(str(tmp_path / "launcher.ini")).cfg
+  cfg.set("benchmark", "path", benchmark_dir)
+  cfg.set("benchmark", "telemetry_interval", "0")
+  cfg.set("benchmark", "view_mode", "symlink")
+  cfg.set("wine", "path", os.path.abspath(fakewine.__file__))
+  cfg.set("wine", "prefix", str(tmp_path / "prefix"))
+  cfg.set("wine", "environment", "FAKE_WINE_NOISE=0")
+  return cfg
@@ -0,0 +1,72 @@
+from ffxiv_benchmark import benchmark
+
+import pytest
+
+def test_runner_with_fake_wine(fake_cfg):
+  runner = benchmark.FFXIVBenchmarkRunner(fake_cfg)
+  assert runner.check() is None
+
+  (returncode, result) = runner.run()
+
+  assert returncode == 0
+  assert int(result.score) > 0
+  assert float(result.fps) > 0.0
+  assert "result_fpsminimum" in result.metrics
+  assert "ffxivbenchmarklauncher.ini" in result.files
+
+  # The run happened in a private view, the original is untouched
+  config_file = benchmark.get_benchmark_config_file(fake_cfg.get("benchmark", "path"))
+  assert benchmark.get_results(config_file) is None
+
+def test_runner_reports_failures(fake_cfg):
+  fake_cfg.set("wine", "environment", "FAKE_WINE_FAIL=3")
+  assert benchmark.FFXIVBenchmarkRunner(fake_cfg).run() == (3, None)
+
+def test_runner_ignores_stale_results(fake_cfg):
+  # Results of an earlier run are in the config file, but character
+  # creation exits without writing new ones
+  benchmark_dir = fake_cfg.get("benchmark", "path")
+
+  with open(benchmark.get_benchmark_config_file(benchmark_dir), "a") as f:
+    f.write("[SCORE]\nSCORE=1234\nSCORE_FPSAVERAGE=10.0\n")
+
+  runner = benchmark.FFXIVBenchmarkRunner(fake_cfg)
+  assert runner.run(runner.cmdline + [ "Bench.CharacterCreation=1" ]) == (0, None)
+
+def test_warm_shader_cache(fake_cfg):
+  fake_cfg.set("benchmark", "shader_cache", "warm")
+  (returncode, result) = benchmark.FFXIVBenchmarkRunner(fake_cfg).run()
+
+  assert returncode == 0
+  assert result.metrics["cold_fps"] < float(result.fps)
+
+def test_get_results(tmp_path):
+  path = str(tmp_path / "ffxivbenchmarklauncher.ini")
+
+  with open(path, "w") as f:
+    f.write("[EVN]\nSCREENWIDTH_DX11=1920\n\n[SCORE]\nSCORE=14000\nSCORE_FPSAVERAGE=100.5\n"
+      "SCORE_FPSMINIMUM=40.2\n\n[LOADING]\nTOTAL=9.5\n")
+
+  result = benchmark.get_results(path)
+
+  assert (result.score, result.fps) == ("14000", "100.5")
+  assert result.metrics == { "result_fpsminimum" : 40.2, "result_loading_total" : 9.5 }
+
+  with open(path, "w") as f:
+    f.write("[SCORE]\nSCORE=14000\n")
+
+  assert benchmark.get_results(path) is None
+  assert benchmark.get_results(str(tmp_path / "missing.ini")) is None
+
+def test_run_benchmark_kills_on_failure(fake_cfg):
+  processes = [ ]
+
+  def on_start(process):
+    processes.append(process)
+    raise RuntimeError("on_start failed")
+
+  with pytest.raises(RuntimeError):
+    benchmark.run_benchmark(fake_cfg.get("wine", "path"), fake_cfg.get("benchmark", "path"),
+      { "FAKE_WINE_DELAY" : "30" }, [ ], on_start=on_start)
+
+  assert not processes[0].returncode is None
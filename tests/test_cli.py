@@ -0,0 +1,11 @@
+from ffxiv_benchmark import cli
+
+def test_scaling_rejects_borderless(fake_cfg, tmp_path, capsys):
+  config_file = str(tmp_path / "scaling.ini")
+  fake_cfg.set("graphics", "display_mode", "2")
+
+  with open(config_file, "w") as f:
+    fake_cfg.write(f)
+
+  assert cli.main([ "scaling", "--config", config_file, "--resolutions", "1280x720,1920x1080" ]) == cli.EXIT_CONFIG_ERROR
+  assert "windowed or fullscreen" in capsys.readouterr().err
@@ -0,0 +1,59 @@
+from ffxiv_benchmark.history import FFXIVResultHistory
+from ffxiv_benchmark import benchmark
+from ffxiv_benchmark import export
+
+import pytest
+import json
+import csv
+
+def test_result_columns_cover_every_metric(tmp_path, fake_cfg):
+  fake_cfg.set("benchmark", "capture_frametimes", "True")
+  fake_cfg.set("benchmark", "shader_cache", "warm")
+  (returncode, result) = benchmark.FFXIVBenchmarkRunner(fake_cfg).run()
+
+  row = export.build_result_row(fake_cfg, result, { "os" : "Linux" })
+  columns = export.get_result_columns()
+
+  assert [ k for k in row.keys() if not k in columns ] == [ ]
+  assert "metric.cold_fps_low_1" in row
+
+  path = str(tmp_path / "runs.csv")
+  output = export.open_export(path, columns=columns)
+  output.write(row)
+  output.close()
+
+  with open(path, newline="") as f:
+    rows = list(csv.DictReader(f))
+
+  assert rows[0]["score"] == result.score
+  assert rows[0]["metric.stutters"] != ""
+
+def test_unknown_columns_fail(tmp_path):
+  output = export.open_export(str(tmp_path / "runs.csv"))
+  output.write({ "id" : 1, "metric.a" : 1.0 })
+
+  with pytest.raises(ValueError):
+    output.write({ "id" : 2, "metric.a" : 2.0, "metric.b" : 1.0 })
+
+  output.close()
+
+def test_aggregate(tmp_path, fake_cfg):
+  history = FFXIVResultHistory(str(tmp_path / "results.db"))
+
+  for (ssao, score, fps) in [ ("0", 1000, 50.0), ("0", 1200, 60.0), ("6", 2000, 100.0) ]:
+    fake_cfg.set("graphics", "ssao", ssao)
+    history.add_run(fake_cfg, 1920, 1080, score, fps, { "result_fpsminimum" : fps / 2 })
+
+  path = str(tmp_path / "summary.jsonl")
+  assert export.export_aggregate(history, path) == (2, 3)
+  history.close()
+
+  with open(path) as f:
+    rows = dict([ (r["setting.ssao"], r) for r in [ json.loads(l) for l in f ] ])
+
+  assert rows["0"]["runs"] == 2
+  assert rows["0"]["score_mean"] == pytest.approx(1100.0)
+  assert rows["0"]["fps_min"] == 50.0
+  assert rows["0"]["metric.result_fpsminimum"] == pytest.approx(27.5)
+  assert rows["6"]["runs"] == 1
+  assert rows["6"]["score_ci"] is None
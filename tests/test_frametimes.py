@@ -0,0 +1,26 @@
+from ffxiv_benchmark.frametimes import compute_stats, load_frametimes
+
+LOG_HEADER = ("os,cpu,gpu,ram,kernel,driver\n"
+  "Linux,CPU,GPU,16,6.0,mesa\n"
+  "fps,frametime,cpu_load,gpu_load\n")
+
+def test_load_frametimes(tmp_path):
+  log_file = tmp_path / "log.csv"
+  log_file.write_text(LOG_HEADER + "60,16.6,10,90\n50,20.0,10,90\n")
+
+  assert list(load_frametimes(str(log_file))) == [ 16.6, 20.0 ]
+
+def test_load_truncated_frametimes(tmp_path):
+  log_file = tmp_path / "log.csv"
+  log_file.write_text(LOG_HEADER + "60,16.6,10,90\n50,20.0,10,90\n40,2")
+
+  frametimes = load_frametimes(str(log_file))
+
+  assert list(frametimes) == [ 16.6, 20.0 ]
+  assert compute_stats(frametimes)["frames"] == 2
+
+def test_load_empty_frametimes(tmp_path):
+  log_file = tmp_path / "log.csv"
+  log_file.write_text(LOG_HEADER + "60,1")
+
+  assert len(load_frametimes(str(log_file))) == 0
@@ -0,0 +1,34 @@
+from ffxiv_benchmark.history import FFXIVResultHistory
+from ffxiv_benchmark.benchmark import FFXIVBenchmarkResult
+
+import pytest
+
+def make_result():
+  result = FFXIVBenchmarkResult("14000", "100.5")
+  result.metrics = { "result_fpsminimum" : 40.2 }
+  result.files = { "ffxivbenchmarklauncher.ini" : b"[SCORE]\n" }
+  result.host = { "os" : "Linux" }
+  return result
+
+def test_add_result(tmp_path, fake_cfg):
+  history = FFXIVResultHistory(str(tmp_path / "results.db"))
+  run_id = history.add_result(fake_cfg, make_result())
+
+  assert history.get_run(run_id)["score"] == 14000
+  assert history.get_metrics(run_id) == { "result_fpsminimum" : 40.2 }
+  assert history.get_files(run_id) == { "ffxivbenchmarklauncher.ini" : b"[SCORE]\n" }
+  assert history.get_host(run_id) == { "os" : "Linux" }
+  history.close()
+
+def test_add_result_is_atomic(tmp_path, fake_cfg):
+  history = FFXIVResultHistory(str(tmp_path / "results.db"))
+  result = make_result()
+
+  # Fails after the run itself has been inserted
+  result.host = { "os" : object() }
+
+  with pytest.raises(Exception):
+    history.add_result(fake_cfg, result)
+
+  assert history.query() == [ ]
+  history.close()
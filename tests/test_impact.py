@@ -0,0 +1,17 @@
+from ffxiv_benchmark.impact import FFXIVImpactAnalysis
+from ffxiv_benchmark.presets import get_builtin_preset
+
+def test_variants():
+  analysis = FFXIVImpactAnalysis(get_builtin_preset("high-desktop"), [ "ssao", "shadow_lod" ])
+  levels = dict(analysis.model.options)
+
+  # Options are turned down from the preset, or up if they already are
+  # at their lowest level
+  assert analysis.variants == [ ("shadow_lod", "False", True), ("ssao", levels["ssao"][-1], False) ]
+
+def test_variants_of_other_spellings():
+  preset = dict(get_builtin_preset("maximum"))
+  preset["shadow_lod"] = "0"
+
+  analysis = FFXIVImpactAnalysis(preset, [ "shadow_lod" ])
+  assert analysis.variants == [ ("shadow_lod", "True", False) ]
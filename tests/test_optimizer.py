@@ -0,0 +1,91 @@
+from ffxiv_benchmark.optimizer import (FFXIVOptimizer, FFXIVQualityModel, FFXIVMeasurement, FIXED_OPTIONS,
+  get_pareto_front)
+from ffxiv_benchmark.benchmark import FFXIVBenchmarkResult
+from ffxiv_benchmark.presets import get_builtin_preset
+
+import pytest
+
+def get_worst(model):
+  return dict([ (k, levels[-1]) for (k, levels) in model.options ])
+
+def test_levels():
+  model = FFXIVQualityModel()
+  options = dict(model.options)
+
+  assert not "res_dynamic" in options
+  assert options["res_scale"][0] == "100"
+  assert options["ssao"][0] == "0"
+  assert options["lod"] == [ "False", "True" ]
+
+  for (k, levels) in model.options:
+    assert not k in FIXED_OPTIONS
+    assert len(levels) >= 2
+
+def test_quality():
+  model = FFXIVQualityModel()
+
+  assert model.get_quality(model.get_best()) == pytest.approx(1.0)
+  assert model.get_quality(get_worst(model)) == pytest.approx(0.0)
+
+  low = model.get_quality(get_builtin_preset("standard-laptop"))
+  high = model.get_quality(get_builtin_preset("high-desktop"))
+  assert 0.0 < low < high < 1.0
+
+def test_weights():
+  model = FFXIVQualityModel(dict([ (k, 0.0) for (k, levels) in FFXIVQualityModel().options if k != "ssao" ]))
+  values = model.get_best()
+
+  values["glare"] = dict(model.options)["glare"][-1]
+  assert model.get_quality(values) == pytest.approx(1.0)
+
+  values["ssao"] = dict(model.options)["ssao"][-1]
+  assert model.get_quality(values) == pytest.approx(0.0)
+
+def measure(name, quality, fps):
+  return FFXIVMeasurement(name, { }, quality, [ FFXIVBenchmarkResult(str(int(fps * 140)), str(fps)) ], "fps")
+
+def test_pareto_front():
+  measurements = [ measure("a", 1.0, 50.0), measure("b", 0.8, 45.0),
+    measure("c", 0.6, 70.0), measure("d", 0.2, 65.0), measure("e", 0.1, 90.0) ]
+
+  assert [ m.name for m in get_pareto_front(measurements) ] == [ "a", "c", "e" ]
+
+def test_levels_of_other_spellings():
+  model = FFXIVQualityModel()
+  values = model.get_best()
+
+  for (k, v) in values.items():
+    if v == "False":
+      values[k] = "0"
+    elif v == "True":
+      values[k] = "on"
+
+  assert model.get_quality(values) == pytest.approx(1.0)
+  assert model.get_level({ "shadow_lod" : "1" }, "shadow_lod") == 1
+  assert model.get_level({ "res_scale" : "085" }, "res_scale") == 1
+
+def test_bisect_reports_step(fake_cfg):
+  model = FFXIVQualityModel()
+  messages = [ ]
+  optimizer = FFXIVOptimizer(fake_cfg, model, target=60.0, log=messages.append)
+
+  # Every option turned down gains 10 fps
+  def measure(candidates):
+    result = [ ]
+
+    for (n, v) in candidates:
+      fps = 40.0 + 10.0 * sum([ model.get_level(v, k) > 0 for (k, levels) in model.options ])
+      result.append(FFXIVMeasurement(n, v, model.get_quality(v), [
+        FFXIVBenchmarkResult(str(int(fps * 140)), str(fps)) ], "fps"))
+
+    optimizer.measurements += result
+    return result
+
+  optimizer.measure = measure
+  front = optimizer.run()
+
+  found = [ s.split(" is ")[0] for s in messages if s.endswith("reaches the target") ]
+  recommended = optimizer.recommend(front)
+
+  assert found == [ recommended[0].name ]
+  assert recommended[0].fps >= 60.0
@@ -0,0 +1,83 @@
+from ffxiv_benchmark.presets import (FFXIVPresetLibrary, BUILTIN_PRESET_NAMES, BUILTIN_PRESET_VALUES,
+  diff_presets, get_builtin_preset, write_presets)
+from ffxiv_benchmark import settings
+
+import pytest
+
+def test_builtin_table():
+  for (k, v) in BUILTIN_PRESET_VALUES:
+    assert not settings.get_setting(k) is None
+    assert isinstance(v, str) or len(v) == len(BUILTIN_PRESET_NAMES)
+
+  for n in BUILTIN_PRESET_NAMES:
+    for (k, v) in get_builtin_preset(n).items():
+      assert settings.get_setting(k).validate(v) is None
+
+  assert get_builtin_preset("maximum")["ssao"] == "0"
+  assert get_builtin_preset("standard-laptop")["ssao"] == "3"
+  assert get_builtin_preset("standard-laptop")["res_scale"] == "100"
+
+def test_user_presets(tmp_path):
+  path = tmp_path / "presets.ini"
+  path.write_text("[deck]\nbase = standard-laptop\nres_scale = 70\n\n"
+    "[deck-low]\nbase = deck\nssao = 6\n")
+
+  library = FFXIVPresetLibrary()
+  library.load_file(str(path))
+
+  assert library.get_user_names() == [ "deck", "deck-low" ]
+  assert library.get_source("deck") == str(path)
+
+  values = library.get("deck-low")
+  assert values["res_scale"] == "70"
+  assert values["ssao"] == "6"
+  assert values["movement_other"] == "2"
+
+def test_user_preset_replaces_builtin(tmp_path):
+  path = tmp_path / "presets.ini"
+  path.write_text("[maximum]\nssao = 2\n")
+
+  library = FFXIVPresetLibrary()
+  library.load_file(str(path))
+
+  assert library.get("maximum") == { "ssao" : "2" }
+  assert library.get_names()[0] == "maximum"
+
+def test_invalid_presets(tmp_path):
+  path = tmp_path / "presets.ini"
+  library = FFXIVPresetLibrary()
+
+  path.write_text("[bad]\nnot_an_option = 1\n")
+  with pytest.raises(ValueError):
+    library.load_file(str(path))
+
+  path.write_text("[bad]\nres_scale = 10\n")
+  with pytest.raises(ValueError):
+    library.load_file(str(path))
+
+  path.write_text("[a]\nbase = b\n\n[b]\nbase = a\n")
+  library.load_file(str(path))
+  with pytest.raises(ValueError):
+    library.get("a")
+
+  with pytest.raises(ValueError):
+    library.get("missing")
+
+def test_diff():
+  diff = diff_presets(get_builtin_preset("maximum"), get_builtin_preset("high-desktop"))
+  keys = [ k for (k, a, b) in diff ]
+
+  assert "texture_filter" in keys
+  assert not "res_scale" in keys
+
+  # Different spellings of the same value are no difference
+  assert diff_presets({ "lod" : "False", "ssao" : "1" }, { "lod" : "off", "ssao" : "1" }) == [ ]
+  assert diff_presets({ "ssao" : "1" }, { }) == [ ("ssao", "1", None) ]
+
+def test_write_and_load(tmp_path):
+  path = str(tmp_path / "presets.ini")
+  write_presets(path, [ ("fast", { "res_scale" : "50", "ssao" : "6" }) ])
+
+  library = FFXIVPresetLibrary()
+  library.load_file(path)
+  assert library.get("fast") == { "res_scale" : "50", "ssao" : "6" }
@@ -0,0 +1,51 @@
+from ffxiv_benchmark.history import FFXIVResultHistory
+from ffxiv_benchmark.config import clone_config
+from ffxiv_benchmark import remote
+
+import pytest
+import json
+
+def test_agent_run(tmp_path, fake_cfg):
+  fake_cfg.add_section("slot:other")
+  fake_cfg.set("slot:other", "token", "secret")
+
+  agent = remote.FFXIVAgent(fake_cfg, log=lambda m: None)
+
+  # What a controller with a different benchmark, wine and prefix sends
+  controller_cfg = clone_config(fake_cfg)
+  controller_cfg.set("benchmark", "path", "/controller/benchmark")
+  controller_cfg.set("wine", "prefix", "/controller/prefix")
+  controller_cfg.set("graphics", "ssao", "6")
+
+  data = json.loads(json.dumps(agent.run(remote.encode_job(controller_cfg), "test")))
+  assert not "slot:other" in data["config"]
+
+  (returncode, result) = remote.decode_result(data)
+  assert returncode == 0
+  assert result.cfg.get("graphics", "ssao") == "6"
+
+  history = FFXIVResultHistory(str(tmp_path / "results.db"))
+  run = history.get_run(history.add_result(controller_cfg, result))
+  history.close()
+
+  assert run["benchmark_path"] == fake_cfg.get("benchmark", "path")
+  assert run["wine_prefix"] == fake_cfg.get("wine", "prefix")
+  assert run["wine_path"] == fake_cfg.get("wine", "path")
+
+def test_invalid_jobs(fake_cfg):
+  with pytest.raises(ValueError):
+    remote.apply_job(fake_cfg, { "graphics" : { "ssao" : "99" } })
+
+  with pytest.raises(ValueError):
+    remote.apply_job(fake_cfg, { "benchmark" : { "path" : "/elsewhere" } })
+
+def test_agent_requires_token(fake_cfg):
+  assert remote.is_loopback("127.0.0.1")
+  assert remote.is_loopback("localhost")
+  assert remote.is_loopback("[::1]")
+  assert not remote.is_loopback("")
+  assert not remote.is_loopback("0.0.0.0")
+  assert not remote.is_loopback("192.168.1.10")
+
+  with pytest.raises(ValueError):
+    remote.run_agent(fake_cfg, "0.0.0.0:0", log=lambda m: None)
@@ -0,0 +1,27 @@
+from ffxiv_benchmark.scheduler import clone_prefix, run_configs
+
+import pytest
+import os
+
+def test_clone_prefix_replaces_stale_clone(tmp_path):
+  source = tmp_path / "source"
+  source.mkdir()
+  (source / "system.reg").write_text("WINE REGISTRY Version 2\n")
+
+  # A clone that was interrupted before it was renamed into place
+  target = str(tmp_path / "slot" / "prefix")
+  os.makedirs(target + ".tmp")
+
+  clone_prefix(str(source), target)
+
+  assert os.listdir(target) == [ "system.reg" ]
+  assert not os.path.exists(target + ".tmp")
+
+def test_run_configs_reports_failures(fake_cfg):
+  fake_cfg.set("wine", "environment", "FAKE_WINE_FAIL=2")
+  log = [ ]
+
+  with pytest.raises(RuntimeError, match="^base: return code 2$"):
+    run_configs([ fake_cfg ], [ "base" ], 1, log.append)
+
+  assert log == [ "base: failed, return code 2" ]
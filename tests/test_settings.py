@@ -0,0 +1,7 @@
+from ffxiv_benchmark import settings
+
+def test_validate_config(fake_cfg):
+  assert settings.validate_config(fake_cfg) is None
+
+  fake_cfg.set("graphics", "display_res_x", "")
+  assert settings.validate_config(fake_cfg) == "Invalid value for display_res_x: "
@@ -0,0 +1,88 @@
+from ffxiv_benchmark.stats import (FFXIVRunSeries, FFXIVSummary, mann_whitney_u_test,
+  student_t_cdf, student_t_ppf, welch_t_test)
+
+import pytest
+
+def test_student_t():
+  assert student_t_cdf(0.0, 5) == pytest.approx(0.5)
+  assert student_t_ppf(0.975, 10) == pytest.approx(2.228, abs=1.0e-3)
+  assert student_t_ppf(0.975, 2) == pytest.approx(4.303, abs=1.0e-3)
+  assert student_t_cdf(student_t_ppf(0.9, 7), 7) == pytest.approx(0.9)
+
+def test_summary():
+  summary = FFXIVSummary([ 10.0, 12.0, 14.0 ])
+
+  assert summary.n == 3
+  assert summary.mean == pytest.approx(12.0)
+  assert summary.stdev == pytest.approx(2.0)
+  assert summary.cv == pytest.approx(2.0 / 12.0)
+  assert summary.ci == pytest.approx(4.303 * 2.0 / 3.0 ** 0.5, rel=1.0e-3)
+  assert summary.relative_ci() == pytest.approx(summary.ci / 12.0)
+
+def test_summary_single_value():
+  summary = FFXIVSummary([ 5.0 ])
+
+  assert summary.mean == 5.0
+  assert summary.stdev == 0.0
+  assert summary.ci is None
+  assert summary.relative_ci() is None
+  assert summary.format(1) == "5.0, n=1"
+
+def test_series_discards_warmup():
+  series = FFXIVRunSeries(2, warmup=1)
+
+  assert series.is_warmup()
+  assert series.describe_next() == "Warm-up run 1/1"
+
+  series.add("1000", "50.0")
+  assert not series.is_warmup()
+  assert series.describe_next() == "Run 1/2"
+
+  series.add("2000", "60.0")
+  assert not series.is_done()
+
+  series.add("2200", "62.0")
+  assert series.is_done()
+  assert series.scores == [ 2000.0, 2200.0 ]
+  assert series.fps == [ 60.0, 62.0 ]
+
+def test_series_stops_early():
+  series = FFXIVRunSeries(10, ci_target=0.01)
+
+  # Two identical runs are not enough to stop
+  series.add("1000", "50")
+  series.add("1000", "50")
+  assert not series.is_done()
+
+  series.add("1000", "50")
+  assert series.is_done()
+
+def test_series_runs_on_with_noise():
+  series = FFXIVRunSeries(10, ci_target=0.01)
+
+  for score in [ 1000, 1200, 900 ]:
+    series.add(score, 50)
+
+  assert not series.is_done()
+
+def test_welch_t_test():
+  (t, p) = welch_t_test([ 1.0, 2.0, 3.0 ], [ 1.0, 2.0, 3.0 ])
+  assert t == pytest.approx(0.0)
+  assert p == pytest.approx(1.0)
+
+  (t, p) = welch_t_test([ 10.0, 10.1, 9.9, 10.0 ], [ 12.0, 12.1, 11.9, 12.0 ])
+  assert t < 0.0
+  assert p < 0.001
+
+  assert welch_t_test([ 1.0 ], [ 1.0, 2.0 ]) == (None, None)
+  assert welch_t_test([ 1.0, 1.0 ], [ 1.0, 1.0 ]) == (None, None)
+
+def test_mann_whitney_u_test():
+  (u, p) = mann_whitney_u_test([ 1.0, 2.0, 3.0, 4.0 ], [ 5.0, 6.0, 7.0, 8.0 ])
+  assert u == 0.0
+  assert p < 0.05
+
+  (u, p) = mann_whitney_u_test([ 1.0, 3.0, 5.0 ], [ 2.0, 4.0, 6.0 ])
+  assert p > 0.5
+
+  assert mann_whitney_u_test([ ], [ 1.0 ]) == (None, None)
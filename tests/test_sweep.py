@@ -0,0 +1,150 @@
+from ffxiv_benchmark.sweep import FFXIVSweepResults, FFXIVSweepSpec, run_sweep
+from ffxiv_benchmark.presets import FFXIVPresetLibrary
+from ffxiv_benchmark.export import FFXIVCsvExport, get_result_columns
+from ffxiv_benchmark import benchmark
+
+import pytest
+import csv
+
+def write_spec(path, text):
+  path.write_text("[graphics]\n" + text)
+  return str(path)
+
+def read_rows(path):
+  with open(path, newline="") as f:
+    return list(csv.reader(f))
+
+def test_results_are_written_as_they_come(tmp_path):
+  path = str(tmp_path / "results.csv")
+  results = FFXIVSweepResults(path, [ "ssao", "res_scale" ])
+  results.add([ "0", "50" ], "12000", "85.5")
+
+  assert read_rows(path) == [ [ "ssao", "res_scale", "score", "fps" ], [ "0", "50", "12000", "85.5" ] ]
+  results.close()
+
+def test_results_resume(tmp_path):
+  path = str(tmp_path / "results.csv")
+
+  results = FFXIVSweepResults(path, [ "ssao" ])
+  results.add([ "0" ], "12000", "85.5")
+  results.close()
+
+  results = FFXIVSweepResults(path, [ "ssao" ])
+  assert results.has([ "0" ])
+  assert not results.has([ "1" ])
+
+  results.add([ "1" ], "11000", "78.5")
+  results.close()
+
+  assert read_rows(path)[1:] == [ [ "0", "12000", "85.5" ], [ "1", "11000", "78.5" ] ]
+
+def test_results_reject_other_spec(tmp_path):
+  path = str(tmp_path / "results.csv")
+  FFXIVSweepResults(path, [ "ssao" ]).close()
+
+  with pytest.raises(ValueError):
+    FFXIVSweepResults(path, [ "glare" ])
+
+def test_spec(tmp_path):
+  spec = FFXIVSweepSpec(write_spec(tmp_path / "spec.ini", "ssao = 0, 3\nres_scale = 50, 75, 100\n"))
+
+  assert spec.keys == [ "ssao", "res_scale" ]
+  assert spec.count() == 6
+  assert list(spec.combinations())[1] == ("0", "75")
+
+def test_spec_rejects_invalid_values(tmp_path, fake_cfg):
+  spec = FFXIVSweepSpec(write_spec(tmp_path / "spec.ini", "res_scale = 25\n"))
+
+  with pytest.raises(ValueError):
+    spec.validate(fake_cfg)
+
+def test_spec_applies_presets_first(tmp_path, fake_cfg):
+  spec = FFXIVSweepSpec(write_spec(tmp_path / "spec.ini", "preset = standard-laptop\nssao = 0\n"),
+    FFXIVPresetLibrary())
+  spec.validate(fake_cfg)
+
+  cfg = spec.apply(fake_cfg, ("standard-laptop", "0"))
+  assert cfg.get("graphics", "movement_other") == "2"
+  assert cfg.get("graphics", "ssao") == "0"
+
+def test_sweep_with_fake_wine(tmp_path, fake_cfg):
+  spec = FFXIVSweepSpec(write_spec(tmp_path / "spec.ini", "res_scale = 50, 100\n"))
+  path = str(tmp_path / "results.csv")
+  log = [ ]
+
+  assert run_sweep(fake_cfg, spec, path, False, log.append) == 0
+
+  rows = read_rows(path)
+  assert [ r[0] for r in rows[1:] ] == [ "50", "100" ]
+
+  # Halving the resolution scale quarters the pixel count
+  assert float(rows[1][2]) > float(rows[2][2])
+
+  assert run_sweep(fake_cfg, spec, path, False, log.append) == 0
+  assert len(read_rows(path)) == 3
+  assert log[-1].endswith("skipped, results exist")
+
+def test_sweep_counts_failures(tmp_path, fake_cfg):
+  fake_cfg.set("wine", "environment", "FAKE_WINE_FAIL=1")
+  spec = FFXIVSweepSpec(write_spec(tmp_path / "spec.ini", "ssao = 0, 1\n"))
+  path = str(tmp_path / "results.csv")
+  log = [ ]
+
+  assert run_sweep(fake_cfg, spec, path, False, log.append) == 2
+  assert len(read_rows(path)) == 1
+  assert log[-1] == "[2/2] ssao=1: failed, return code 1"
+
+def test_sweep_logs_errors(tmp_path, fake_cfg):
+  # Booting the template puts wine's own DLLs in place
+  fake_cfg.set("wine", "prefix_mode", "template")
+  fake_cfg.set("wine", "prefix_snapshot", "copy")
+  fake_cfg.set("wine", "native_dlls", "d3d11")
+
+  spec = FFXIVSweepSpec(write_spec(tmp_path / "spec.ini", "ssao = 0\n"))
+  log = [ ]
+
+  assert run_sweep(fake_cfg, spec, str(tmp_path / "results.csv"), False, log.append) == 1
+  assert log[-1].startswith("[1/1] ssao=0: failed, Wine prefix template check failed: ")
+
+def test_results_drop_partial_line(tmp_path):
+  path = str(tmp_path / "results.csv")
+
+  results = FFXIVSweepResults(path, [ "ssao", "res_scale" ])
+  results.add([ "0", "50" ], "12000", "85.5")
+  results.close()
+
+  with open(path, "a") as f:
+    f.write("6,100,stan")
+
+  results = FFXIVSweepResults(path, [ "ssao", "res_scale" ])
+  assert not results.has([ "6", "100" ])
+
+  results.add([ "6", "100" ], "9000", "64.3")
+  results.close()
+
+  assert read_rows(path)[1:] == [ [ "0", "50", "12000", "85.5" ], [ "6", "100", "9000", "64.3" ] ]
+
+def test_results_drop_partial_header(tmp_path):
+  path = tmp_path / "results.csv"
+  path.write_text("ssao,sco")
+
+  FFXIVSweepResults(str(path), [ "ssao" ]).close()
+  assert read_rows(str(path)) == [ [ "ssao", "score", "fps" ] ]
+
+def test_sweep_exports_unknown_metrics(tmp_path, fake_cfg):
+  # A benchmark version that reports more than the export knows about
+  with open(benchmark.get_benchmark_config_file(fake_cfg.get("benchmark", "path")), "a") as f:
+    f.write("[SCORE]\nSCORE_EXTRA=5\n[EXTRA]\nLOADTIME=3\n")
+
+  spec = FFXIVSweepSpec(write_spec(tmp_path / "spec.ini", "ssao = 0, 1\n"))
+  export_path = str(tmp_path / "export.csv")
+  output = FFXIVCsvExport(export_path, get_result_columns())
+  log = [ ]
+
+  assert run_sweep(fake_cfg, spec, str(tmp_path / "results.csv"), False, log.append, export=output) == 0
+  output.close()
+
+  rows = read_rows(export_path)
+  assert len(rows) == 3
+  assert not "metric.result_extra" in rows[0]
+  assert len([ m for m in log if m.startswith("Warning: metric.result_extra ") ]) == 1